@@ -0,0 +1,197 @@
+# answer_stream.py  – LLM yanıtlarını token token akıtma
+"""
+`chat.completions.create(stream=True)` üzerinde ince bir katman.
+
+    stream = stream_answer(ai, messages, sources, model=LLM_MODEL, temperature=0.1)
+    for s in stream.sources:          # atıflar ilk token'dan önce hazır
+        ...
+    for token in stream:              # token'lar geldikçe
+        sys.stdout.write(token)
+    stream.ttft_ms, stream.total_ms   # ilk token süresi / toplam süre
+
+asyncio için `astream_answer(aai, ...)` aynı arayüzü `async for` ile sunar.
+İlk token süresi (TTFT) ve toplam süre ayrı histogramlarda tutulur; her
+çağrı `llm` span'ı ve (stream_options.include_usage ile gelen) token
+sayılarıyla metrics.py'ye işlenir.
+Düşük sıcaklıklı çağrılar birebir yanıt önbelleğinden gelebilir
+(completion_cache.py); `cache=False` ile atlanır.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from completion_cache import lookup
+from metrics import REGISTRY, Histogram, observe_span, record_usage
+
+LATENCY_BUCKETS_MS = (50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+TTFT_MS  = Histogram(LATENCY_BUCKETS_MS)     # ilk token'a kadar geçen süre
+TOTAL_MS = Histogram(LATENCY_BUCKETS_MS)     # tamamlanana kadar geçen süre
+REGISTRY.register("llm_ttft_ms", "Yanıt akışında ilk token süresi (ms)", TTFT_MS)
+REGISTRY.register("llm_total_ms", "Yanıt akışının toplam süresi (ms)", TOTAL_MS)
+
+logger = logging.getLogger("AnswerStream")
+
+Source = Dict[str, Any]
+
+
+class _StreamBase:
+    def __init__(self, sources: Optional[List[Source]] = None,
+                 started: Optional[float] = None,
+                 on_done: Optional[Callable[[str], None]] = None,
+                 model: Optional[str] = None, cached: bool = False):
+        self.sources: List[Source] = list(sources or [])
+        self.text = ""
+        self.ttft_ms: Optional[float] = None
+        self.total_ms: Optional[float] = None
+        self.usage: Any = None
+        self.model = model                # None: LLM'siz hazır metin, span kaydedilmez
+        self.cached = cached
+        self._t0 = started if started is not None else time.perf_counter()
+        self._on_complete = on_done       # akış sonuna kadar tüketilince tam metinle çağrılır
+        self._done_callbacks: List[Callable[["_StreamBase"], None]] = []
+
+    def _on_chunk(self, chunk: Any) -> str:
+        if getattr(chunk, "usage", None) is not None:   # include_usage: son parça
+            self.usage = chunk.usage
+        return _delta(chunk)
+
+    def _on_error(self, exc: Exception) -> None:
+        if self.model is not None:
+            observe_span("llm", (time.perf_counter() - self._t0) * 1000.0, "error",
+                         model=self.model, error=type(exc).__name__)
+
+    def _on_token(self, token: str) -> None:
+        if self.ttft_ms is None:
+            self.ttft_ms = (time.perf_counter() - self._t0) * 1000.0
+            TTFT_MS.observe(self.ttft_ms)
+        self.text += token
+
+    def _on_done(self) -> None:
+        self.total_ms = (time.perf_counter() - self._t0) * 1000.0
+        TOTAL_MS.observe(self.total_ms)
+        if self.model is not None:
+            observe_span("llm", self.total_ms, "cached" if self.cached else "ok",
+                         model=self.model, ttft_ms=round(self.ttft_ms or 0.0, 3),
+                         chars=len(self.text))
+            record_usage(self.model, self.usage)
+        logger.debug("Yanıt akışı: ttft=%.0f ms, toplam=%.0f ms, %d karakter",
+                    self.ttft_ms or self.total_ms, self.total_ms, len(self.text))
+        if self._on_complete is not None:
+            self._on_complete(self.text)
+        for fn in self._done_callbacks:
+            fn(self)
+
+    def add_done_callback(self, fn: Callable[["_StreamBase"], None]) -> None:
+        """`fn(akış)`: akış sonuna kadar tüketilince (metin ve süreler hazırken) çağrılır."""
+        self._done_callbacks.append(fn)
+
+
+class AnswerStream(_StreamBase):
+    """Senkron token akışı; bir kez tüketilebilir."""
+
+    def __init__(self, chunks: Iterator[Any], sources: Optional[List[Source]] = None,
+                 started: Optional[float] = None,
+                 on_done: Optional[Callable[[str], None]] = None, **kw):
+        super().__init__(sources, started, on_done, **kw)
+        self._chunks = chunks
+
+    @classmethod
+    def from_text(cls, text: str, sources: Optional[List[Source]] = None) -> "AnswerStream":
+        """Hazır bir yanıtı (ör. küçük sohbet) tek token'lık akış olarak sarar."""
+        return cls(iter([text]), sources)
+
+    def __iter__(self) -> Iterator[str]:
+        try:
+            for chunk in self._chunks:
+                token = self._on_chunk(chunk)
+                if token:
+                    self._on_token(token)
+                    yield token
+        except Exception as e:
+            self._on_error(e)
+            raise
+        self._on_done()
+
+
+class AsyncAnswerStream(_StreamBase):
+    """asyncio token akışı; `async for token in stream` ile tüketilir."""
+
+    def __init__(self, chunks: AsyncIterator[Any], sources: Optional[List[Source]] = None,
+                 started: Optional[float] = None,
+                 on_done: Optional[Callable[[str], None]] = None, **kw):
+        super().__init__(sources, started, on_done, **kw)
+        self._chunks = chunks
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        try:
+            async for chunk in self._chunks:
+                token = self._on_chunk(chunk)
+                if token:
+                    self._on_token(token)
+                    yield token
+        except Exception as e:
+            self._on_error(e)
+            raise
+        self._on_done()
+
+
+def _delta(chunk: Any) -> str:
+    if isinstance(chunk, str):
+        return chunk
+    if not chunk.choices:
+        return ""
+    return chunk.choices[0].delta.content or ""
+
+
+async def _aiter_once(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _with_usage(params: Dict[str, Any]) -> Dict[str, Any]:
+    # Akışın son parçası token sayılarını taşısın (çağıran ayrıca vermediyse)
+    return {"stream_options": {"include_usage": True}, **params}
+
+
+def _request_failed(started: float, model: Optional[str], exc: Exception) -> None:
+    observe_span("llm", (time.perf_counter() - started) * 1000.0, "error",
+                 model=model, error=type(exc).__name__)
+
+
+def _store_fn(store, params: Dict[str, Any]) -> Optional[Callable[[str], None]]:
+    return None if store is None else (lambda text: store.put(params, text))
+
+
+def stream_answer(ai, messages: List[dict], sources: Optional[List[Source]] = None,
+                  cache: bool = True, **params) -> AnswerStream:
+    """`params` doğrudan `chat.completions.create`'e geçer (model, temperature…)."""
+    started = time.perf_counter()                       # TTFT isteğin başından ölçülür
+    params = {"messages": messages, **params}
+    model = params.get("model")
+    store, text = lookup(params, cache)
+    if text is not None:
+        return AnswerStream(iter([text]), sources, started, model=model, cached=True)
+    try:
+        chunks = ai.chat.completions.create(stream=True, **_with_usage(params))
+    except Exception as e:
+        _request_failed(started, model, e)
+        raise
+    return AnswerStream(chunks, sources, started, _store_fn(store, params), model=model)
+
+
+async def astream_answer(aai, messages: List[dict], sources: Optional[List[Source]] = None,
+                         cache: bool = True, **params) -> AsyncAnswerStream:
+    started = time.perf_counter()
+    params = {"messages": messages, **params}
+    model = params.get("model")
+    store, text = lookup(params, cache)
+    if text is not None:
+        return AsyncAnswerStream(_aiter_once(text), sources, started, model=model, cached=True)
+    try:
+        chunks = await aai.chat.completions.create(stream=True, **_with_usage(params))
+    except Exception as e:
+        _request_failed(started, model, e)
+        raise
+    return AsyncAnswerStream(chunks, sources, started, _store_fn(store, params), model=model)
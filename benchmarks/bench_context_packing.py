@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Bağlam paketleme: önce/sonra prompt token raporu (context_packer)
+
+Korpus cullian_vector/data.json + data1.json birleşimidir (aynı bilgi iki
+dosyada da bulunur); her soru için BM25 ile `-k` belge alınır ve üç bağlam
+kıyaslanır:
+
+  bütçesiz   : rag_pipeline'ın eski hâli, tüm belgeler
+  1500 kar.  : rag_pipline'ın eski hâli, belgeler yarıda kesilebilir
+  paketli    : token bütçesi + tekrar bastırma, yalnız bütün belgeler
+
+    python benchmarks/bench_context_packing.py -k 8 --budget 500
+    python benchmarks/bench_context_packing.py --llm     # OPENAI_BASE_URL'e istek atıp gecikme ölçer
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+from context_packer import count_tokens, pack_context                # noqa: E402
+from dataset_io import iter_records                                  # noqa: E402
+from lexical_index import BM25Index, index_text                      # noqa: E402
+
+DATA_FILES   = [ROOT / "cullian_vector" / "data.json", ROOT / "cullian_vector" / "data1.json"]
+MODEL        = "gpt-4o-mini"
+PRICE_IN_1M  = 0.15                     # $ / 1M girdi token (gpt-4o-mini)
+SYSTEM       = "Sen Cullinan Belek oteli hakkında bir uzmansın. Kaynaklara göre yanıtla."
+QUESTIONS    = [
+    "Otelin toplam golf alanı ne kadar?",
+    "Kahvaltı saatleri nedir?",
+    "Akşam yemeğinde kıyafet kodu var mı?",
+    "Spa merkezinde hangi hizmetler var?",
+    "Havalimanına uzaklık ne kadar?",
+    "Lagoon restoran ne zaman açık?",
+    "Swim-up odaların özellikleri neler?",
+    "Çocuk kulübü kaç yaş arası çocukları kabul ediyor?",
+    "Plaj uzunluğu nedir?",
+    "Evcil hayvan kabul ediliyor mu?",
+    "A'la carte restoranlar ücretli mi?",
+    "Check-in ve check-out saatleri nedir?",
+    "Otelde kaç oda var?",
+    "Balayı çiftlerine özel hizmetler neler?",
+    "Aquapark ve kaydırak var mı?",
+    "Doktor hizmeti ücretli mi?",
+    "Otelin genel müdürü kim?",
+    "Antalya havalimanı otele kaç km?",
+    "Hangi kredi kartları geçerli?",
+    "Otelde hangi diller konuşuluyor?",
+    "Otelin adresi nedir?",
+    "Drone kullanabilir miyim?",
+    "Odalarda duş var mı?",
+    "Cullinan Lounge ne işe yarar?",
+]
+
+
+def load_corpus():
+    ids, docs, metas = [], [], []
+    for path in DATA_FILES:
+        for rec in iter_records(path):
+            ids.append(f"{path.stem}:{rec.get('chunk_id') or rec.get('id')}")
+            docs.append(rec.get("text_for_embedding") or rec.get("text") or "")
+            metas.append(rec.get("metadata") or {})
+    return ids, docs, metas
+
+
+def render(idx: int, doc: str, meta: dict) -> str:
+    src = meta.get("source_document") or meta.get("source", "?")
+    return f"[{idx}] {doc}  (Kaynak: {src})"
+
+
+def prompt_tokens(question: str, context: str) -> int:
+    return count_tokens(SYSTEM, MODEL) + count_tokens(
+        f"Soru: {question}\n\n--- KAYNAKLAR ---\n{context}\n\nCevabın:", MODEL)
+
+
+def pct(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def llm_latency_ms(ai, question: str, context: str) -> float:
+    t0 = time.perf_counter()
+    ai.chat.completions.create(model=MODEL, max_tokens=1, temperature=0, messages=[
+        {"role": "system", "content": SYSTEM},
+        {"role": "user", "content": f"Soru: {question}\n\n--- KAYNAKLAR ---\n{context}\n\nCevabın:"},
+    ])
+    return (time.perf_counter() - t0) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Bağlam paketleme önce/sonra raporu")
+    ap.add_argument("-k", type=int, default=8, help="Soru başına alınan belge")
+    ap.add_argument("--budget", type=int, default=500, help="Paketleyici token bütçesi")
+    ap.add_argument("--questions", help="Satır başına bir soru içeren dosya")
+    ap.add_argument("--llm", action="store_true", help="Her bağlamla LLM gecikmesini de ölç")
+    args = ap.parse_args()
+
+    questions = (Path(args.questions).read_text(encoding="utf-8").split("\n")
+                 if args.questions else QUESTIONS)
+    questions = [q.strip() for q in questions if q.strip()]
+    ids, docs, metas = load_corpus()
+    bm25 = BM25Index.build(ids, (index_text(d, m) for d, m in zip(docs, metas)))
+    pos = {id_: i for i, id_ in enumerate(ids)}
+    ai = None
+    if args.llm:
+        from openai import OpenAI
+        ai = OpenAI()
+
+    rows: Dict[str, Dict[str, List[float]]] = {
+        name: {"tokens": [], "docs": [], "ms": []} for name in ("bütçesiz", "1500 kar.", "paketli")}
+    cut = dups = 0
+    for q in questions:
+        hits = [pos[i] for i, _ in bm25.search(q, args.k)]
+        d, m = [docs[i] for i in hits], [metas[i] for i in hits]
+        full = "\n".join(render(i, doc, meta) for i, (doc, meta) in enumerate(zip(d, m), 1))
+        trunc = full[:1500]
+        packed = pack_context(d, m, render, budget=args.budget, model=MODEL, separator="\n")
+        cut += len(full) > 1500 and full[1500] != "\n"
+        dups += packed.duplicates
+        for name, ctx, n in (("bütçesiz", full, len(d)), ("1500 kar.", trunc, trunc.count("\n[") + bool(trunc)),
+                             ("paketli", packed.text, len(packed.docs))):
+            rows[name]["tokens"].append(prompt_tokens(q, ctx))
+            rows[name]["docs"].append(n)
+            if ai:
+                rows[name]["ms"].append(llm_latency_ms(ai, q, ctx))
+
+    print(f"{len(questions)} soru, k={args.k}, bütçe={args.budget} token, korpus {len(ids)} kayıt")
+    print(f"{'bağlam':<11}{'token ort':>10}{'p50':>7}{'p95':>7}{'belge ort':>11}"
+          f"{'$ / 1k istek':>14}" + (f"{'LLM ms':>9}" if ai else ""))
+    for name, r in rows.items():
+        mean = statistics.mean(r["tokens"])
+        line = (f"{name:<11}{mean:>10.0f}{pct(r['tokens'], .5):>7.0f}{pct(r['tokens'], .95):>7.0f}"
+                f"{statistics.mean(r['docs']):>11.1f}{mean * 1000 * PRICE_IN_1M / 1e6:>14.4f}")
+        if ai:
+            line += f"{statistics.mean(r['ms']):>9.0f}"
+        print(line)
+    base, after = (statistics.mean(rows[n]["tokens"]) for n in ("bütçesiz", "paketli"))
+    print(f"Paketli: prompt token %{100 * (1 - after / base):.0f} daha az; "
+          f"{dups} tekrar belge atlandı; 1500 karakter kesmesi {cut} soruda belgeyi yarıda bıraktı.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Embedding boyutu benchmark'ı: 256 / 512 / 1024 / 3072
+
+Var olan (tam boyutlu) koleksiyonların vektörlerinden her boyut istemcide
+türetilir (ilk N bileşen + L2 normalizasyon; API `dimensions` ile aynı
+sonuç, bkz. embedding_dims.py) – yeniden embed gerekmez, API çağrısı yok.
+
+  intent     IntentIndex leave-one-out doğruluğu (k, mod router'ınki), tam
+             boyutla tahmin uyumu, mesaj başına sınıflandırma süresi, matris boyutu
+  retrieval  boyut başına geçici bir Chroma koleksiyonu (aynı hnsw:space)
+             kurulur; recall@k = HNSW sonucu ∩ tam boyutta kesin en yakın k,
+             sorgu gecikmesi ve diskteki indeks boyutu
+
+Sorgular: intent örnekleri (gerçek misafir cümleleri) otel koleksiyonunda
+aranır; yalnız biri verilirse o koleksiyonun kayıtları kendisi hariç aranır.
+
+    python benchmarks/bench_dims.py --intent-db db/intent_db --hotel-db db/hotel_db
+    python benchmarks/bench_dims.py --dims 128,256,512,1024,3072 --json dims.json
+    python benchmarks/bench_dims.py                    # sentetik veri (yalnız düzenek testi)
+
+Sentetik vektörlerde bileşen varyansı boyut indeksiyle azalır (Matryoshka
+eğitimine benzer); gerçek kararlar için gerçek koleksiyonlarla çalıştırın.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BENCH = Path(__file__).resolve().parent
+sys.path.append(str(BENCH.parent))
+sys.path.append(str(BENCH))
+from bench_stages import summarize                    # noqa: E402
+from embedding_dims import reduce                     # noqa: E402
+from intent_classifier import IntentIndex, vote       # noqa: E402
+
+DIMS        = (256, 512, 1024, 3072)
+INTENT_K    = 5                     # router.predict_intent varsayılanı
+INTENT_MODE = "majority"            # router.INTENT_MODE
+ADD_BATCH   = 1000
+
+
+# ───── Veri ──────────────────────────────────────────────────────────────
+def load_collection(db: str, name: str) -> Dict[str, Any]:
+    import chromadb
+    col = chromadb.PersistentClient(path=db).get_collection(name)
+    data = col.get(include=["embeddings", "metadatas"])
+    return {"vectors": np.asarray(data["embeddings"], dtype=np.float32),
+            "metas": data["metadatas"], "space": (col.metadata or {}).get("hnsw:space", "l2")}
+
+
+def synthetic(n: int, n_clusters: int, dim: int, noise: float, seed: int) -> tuple:
+    """Kümelenmiş, önde yüksek varyanslı (Matryoshka benzeri) birim vektörler."""
+    rng = np.random.default_rng(seed)
+    scale = (1.0 + np.arange(dim)) ** -0.5
+    centers = rng.normal(size=(n_clusters, dim)) * scale
+    labels = rng.integers(0, n_clusters, size=n)
+    vecs = centers[labels] + noise * rng.normal(size=(n, dim)) * scale
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs.astype(np.float32), [f"intent_{i:02d}" for i in labels]
+
+
+# ───── Ölçümler ──────────────────────────────────────────────────────────
+def intent_metrics(vectors: np.ndarray, labels: List[str], space: str, dims: int,
+                   ref: Optional[np.ndarray], probes: int) -> Dict[str, Any]:
+    index = IntentIndex(np.asarray(reduce(vectors, dims), dtype=np.float32), labels, space=space)
+    neigh, dist = index.loo_neighbors(INTENT_K)
+    pred = vote(index.label_ids[neigh], dist, len(index.intents), INTENT_MODE).argmax(axis=1)
+
+    single = []
+    for v in index.vectors[:probes]:
+        t0 = time.perf_counter()
+        index.predict(v, k=INTENT_K, mode=INTENT_MODE)
+        single.append((time.perf_counter() - t0) * 1e6)
+    return {
+        "accuracy": round(float(np.mean(pred == index.label_ids)), 4),
+        "agreement_full": None if ref is None else round(float(np.mean(pred == ref)), 4),
+        "predict_us": summarize(single),
+        "matrix_mb": round(index.vectors.nbytes / 2**20, 2),
+    }, pred
+
+
+def dir_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def exact_topk(docs: np.ndarray, queries: np.ndarray, space: str, k: int,
+               exclude: Optional[np.ndarray]) -> List[List[int]]:
+    """Tam boyutta kesin en yakın k belge (`exclude`: sorgunun kendisi olan belge)."""
+    index = IntentIndex(docs, [str(i) for i in range(len(docs))], space=space)
+    idx, _ = index.topk(queries, k + (exclude is not None))
+    return [_without(row.tolist(), exclude, n)[:k] for n, row in enumerate(idx)]
+
+
+def _without(ids: List[int], exclude: Optional[np.ndarray], n: int) -> List[int]:
+    return ids if exclude is None else [i for i in ids if i != exclude[n]]
+
+
+def retrieval_metrics(docs: np.ndarray, queries: np.ndarray, space: str, dims: int,
+                      truth: List[List[int]], k: int, exclude: Optional[np.ndarray],
+                      work: Path) -> Dict[str, Any]:
+    import chromadb
+    path = work / f"d{dims}"
+    col = chromadb.PersistentClient(path=str(path)).create_collection(
+        f"dims_{dims}", metadata={"hnsw:space": space})
+    doc_vecs = reduce(docs, dims)
+    t0 = time.perf_counter()
+    for s in range(0, len(doc_vecs), ADD_BATCH):
+        col.add(ids=[str(i) for i in range(s, min(s + ADD_BATCH, len(doc_vecs)))],
+                embeddings=doc_vecs[s:s + ADD_BATCH])
+    build_s = time.perf_counter() - t0
+
+    lat, recall = [], []
+    for n, (q, gold) in enumerate(zip(reduce(queries, dims), truth)):
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q], n_results=k + (exclude is not None), include=[])
+        lat.append((time.perf_counter() - t0) * 1000.0)
+        got = _without([int(i) for i in res["ids"][0]], exclude, n)[:k]
+        recall.append(len(set(got) & set(gold)) / k)
+    return {
+        "recall_at_k": round(float(np.mean(recall)), 4),
+        "query_ms": summarize(lat),
+        "build_s": round(build_s, 2),
+        "disk_mb": round(dir_size(path) / 2**20, 2),
+        "vectors_mb": round(len(doc_vecs) * dims * 4 / 2**20, 2),
+    }
+
+
+# ───── Rapor ─────────────────────────────────────────────────────────────
+def print_table(results: Dict[int, Dict[str, Any]]) -> None:
+    print(f"\n{'boyut':>6}  {'intent doğr.':>12} {'tam ile uyum':>12} {'sınıfl. p50':>12} "
+          f"{'matris':>8}  {'recall@k':>9} {'sorgu p50':>10} {'p95':>7} {'disk':>9}")
+    for dims, r in results.items():
+        i, q = r.get("intent"), r.get("retrieval")
+        intent = (f"{i['accuracy']:>12.2%} "
+                  + (f"{i['agreement_full']:>12.2%}" if i["agreement_full"] is not None else f"{'-':>12}")
+                  + f" {i['predict_us']['p50']:>9.0f} µs {i['matrix_mb']:>5.1f} MB"
+                  if i else f"{'-':>12} {'-':>12} {'-':>12} {'-':>8}")
+        retr = (f"{q['recall_at_k']:>9.2%} {q['query_ms']['p50']:>7.2f} ms {q['query_ms']['p95']:>7.2f}"
+                f" {q['disk_mb']:>6.1f} MB" if q else "")
+        print(f"{dims:>6}  {intent}  {retr}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Embedding boyutu: doğruluk / recall / gecikme / boyut")
+    ap.add_argument("--intent-db", help="user_intents'in Chroma dizini (ör. db/intent_db)")
+    ap.add_argument("--intent-collection", default="user_intents")
+    ap.add_argument("--hotel-db", help="Otel koleksiyonunun Chroma dizini (ör. db/hotel_db)")
+    ap.add_argument("--hotel-collection", default="hotel_facts")
+    ap.add_argument("--dims", default=",".join(map(str, DIMS)))
+    ap.add_argument("-k", "--top-k", type=int, default=4, help="recall@k için k")
+    ap.add_argument("--queries", type=int, default=300, help="Retrieval sorgu örneklemi")
+    ap.add_argument("--probes", type=int, default=200, help="Tek mesaj gecikmesi için örnek")
+    ap.add_argument("--synthetic-n", type=int, default=3000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="Sonuçları JSON olarak yaz")
+    args = ap.parse_args()
+
+    if args.intent_db:
+        data = load_collection(args.intent_db, args.intent_collection)
+        intent_vecs, intent_space = data["vectors"], data["space"]
+        intent_labels = [m["intent"] for m in data["metas"]]
+    elif not args.hotel_db:
+        intent_vecs, intent_labels = synthetic(args.synthetic_n, 24, 3072, 1.6, args.seed)
+        intent_space = "l2"
+    else:
+        intent_vecs = None
+    if args.hotel_db:
+        data = load_collection(args.hotel_db, args.hotel_collection)
+        docs, space = data["vectors"], data["space"]
+    elif args.intent_db:                   # otel koleksiyonu yoksa intent örnekleri içinde arama
+        docs, space = intent_vecs, intent_space
+    else:
+        docs, _ = synthetic(args.synthetic_n, 300, 3072, 1.0, args.seed + 1)
+        space = "l2"
+
+    full = docs.shape[1]
+    dims_list = sorted({min(int(d), full) for d in args.dims.split(",")})
+    rng = np.random.default_rng(args.seed)
+    if args.hotel_db and intent_vecs is not None and intent_vecs.shape[1] == full:
+        picks = rng.choice(len(intent_vecs), size=min(args.queries, len(intent_vecs)), replace=False)
+        queries, exclude = intent_vecs[picks], None
+    else:                                  # belgeler kendileri sorgu: kendisi sonuçtan çıkarılır
+        exclude = rng.choice(len(docs), size=min(args.queries, len(docs)), replace=False)
+        queries = docs[exclude]
+    truth = exact_topk(docs, queries, space, args.top_k, exclude)
+    print(f"{len(docs)} belge × {full} boyut ({space}), {len(queries)} sorgu"
+          + (f", {len(intent_vecs)} intent örneği" if intent_vecs is not None else "")
+          + ("" if args.hotel_db or args.intent_db else " – SENTETİK"))
+
+    results: Dict[int, Dict[str, Any]] = {}
+    ref = None
+    work = Path(tempfile.mkdtemp(prefix="bench-dims-"))
+    try:
+        for dims in sorted(dims_list, reverse=True):          # tam boyut önce: uyum referansı
+            r: Dict[str, Any] = {}
+            if intent_vecs is not None:
+                r["intent"], pred = intent_metrics(intent_vecs, intent_labels, intent_space,
+                                                   dims, ref, args.probes)
+                if ref is None and dims >= intent_vecs.shape[1]:
+                    ref = pred
+                    r["intent"]["agreement_full"] = 1.0
+            r["retrieval"] = retrieval_metrics(docs, queries, space, dims, truth,
+                                               args.top_k, exclude, work)
+            results[dims] = r
+            print(f"  {dims} boyut tamam")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    results = dict(sorted(results.items()))
+    print_table(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps({"dims": results, "documents": len(docs),
+                                               "queries": len(queries), "top_k": args.top_k,
+                                               "space": space}, indent=2), encoding="utf-8")
+        print(f"\n💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
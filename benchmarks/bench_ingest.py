@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Ingest duvar saati karşılaştırması: eski seri döngü ↔ ingest_pipeline
+
+• Eski yol  : 100'lük batch → embed → collection.add → sonraki batch
+• Yeni yol  : token bütçeli batch'ler, `--workers` paralel istek, yazma örtüşmeli
+
+Her iki yol da yerel OpenAI taklidine (fake_openai.py) ve geçici (Ephemeral)
+bir Chroma koleksiyonuna karşı çalışır. Taklit aynı süreçte koştuğundan
+vektörleri ölçümden önce üretilir ve base64 döner (gerçek API gibi); süre
+taklidin CPU'sunu değil istek gecikmesini + Chroma yazmasını ölçer.
+
+    python benchmarks/bench_ingest.py --latency-ms 300 --per-item-ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+from openai import OpenAI
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+from bench_stages import chroma_metadata                      # noqa: E402
+from fake_openai import hash_vector, start_server             # noqa: E402
+from ingest_pipeline import MAX_BATCH_TOKENS, EmbeddingPipeline, RateLimiter  # noqa: E402
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Ingest benchmark'ı")
+    ap.add_argument("--data", default=str(ROOT / "cullian_vector" / "data1.json"))
+    ap.add_argument("--latency-ms", type=float, default=300.0)
+    ap.add_argument("--per-item-ms", type=float, default=2.0)
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--max-batch-tokens", type=int, default=MAX_BATCH_TOKENS)
+    args = ap.parse_args()
+
+    raw = json.loads(Path(args.data).read_text(encoding="utf-8"))
+    # Aynı chunk_id'li kayıtlar: son kayıt kazanır (ingest'in upsert sırası, bench_stages)
+    docs = [{**d, "metadata": chroma_metadata(d.get("metadata") or {})}
+            for d in {d["chunk_id"]: d for d in raw}.values()]
+    server = start_server(latency_ms=args.latency_ms, per_item_ms=args.per_item_ms,
+                          dim=args.dim)
+    # Taklit aynı süreçte: vektör üretimi ölçümden önce yapılır, yoksa iki yol
+    # da istek gecikmesini değil taklidin CPU'sunu (GIL) ölçer
+    for d in docs:
+        hash_vector(d["text_for_embedding"], args.dim)
+    ai = OpenAI(base_url=server.base_url, api_key="sk-fake")
+    chroma = chromadb.EphemeralClient()
+
+    def embed(texts):
+        resp = ai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        return [d.embedding for d in resp.data]
+
+    def fresh(name: str):
+        try:
+            chroma.delete_collection(name)
+        except Exception:
+            pass
+        return chroma.create_collection(name)
+
+    # ── Eski seri yol ───────────────────────────────────────────────────
+    col = fresh("bench_serial")
+    t0 = time.perf_counter()
+    for i in range(0, len(docs), 100):
+        batch = docs[i : i + 100]
+        col.add(ids=[d["chunk_id"] for d in batch],
+                documents=[d["text_for_embedding"] for d in batch],
+                metadatas=[d["metadata"] for d in batch],
+                embeddings=embed([d["text_for_embedding"] for d in batch]))
+    serial_s = time.perf_counter() - t0
+
+    # ── Paralel hat ─────────────────────────────────────────────────────
+    col = fresh("bench_pipeline")
+
+    def write(batch, vecs):
+        col.add(ids=[d["chunk_id"] for d in batch],
+                documents=[d["text_for_embedding"] for d in batch],
+                metadatas=[d["metadata"] for d in batch],
+                embeddings=vecs)
+
+    stats = EmbeddingPipeline(embed, write, max_inflight=args.workers,
+                              limiter=RateLimiter(),
+                              max_batch_tokens=args.max_batch_tokens).run(docs)
+
+    print(f"Veri: {Path(args.data).name} ({len(docs)} kayıt"
+          + (f", {len(raw) - len(docs)} tekrar eden chunk_id atıldı" if len(raw) > len(docs) else "")
+          + ") | "
+          f"sahte gecikme {args.latency_ms:.0f} ms + {args.per_item_ms} ms/metin")
+    print(f"{'yol':<10} {'istek':>6} {'süre (s)':>10}")
+    print(f"{'seri':<10} {(len(docs) + 99) // 100:>6} {serial_s:>10.2f}")
+    print(f"{'pipeline':<10} {stats.batches:>6} {stats.elapsed_s:>10.2f}")
+    print(f"Hızlanma: ×{serial_s / stats.elapsed_s:.1f}  ({stats.tokens} token)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Intent sınıflandırıcı benchmark'ı (intent_classifier.IntentIndex)
+
+• Sentetik veri (varsayılan)   : python benchmarks/bench_intent.py
+• Gerçek intent veritabanı     : python benchmarks/bench_intent.py --db db/intent_db
+
+Ölçülenler:
+  - tek mesaj başına sınıflandırma gecikmesi (mod başına)
+  - toplu (batch) sınıflandırmada mesaj başına gecikme
+  - eski yol (Chroma query + Counter) ile uyum oranı ve gecikmesi (--db ile)
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from intent_classifier import MODES, IntentIndex, majority_reference  # noqa: E402
+
+
+def synthetic(n_intents: int, per_intent: int, dim: int, noise: float, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_intents, dim)).astype(np.float32)
+    labels, vecs = [], []
+    for i, c in enumerate(centers):
+        pts = c + noise * rng.normal(size=(per_intent, dim)).astype(np.float32)
+        vecs.append(pts)
+        labels += [f"intent_{i:02d}"] * per_intent
+    vecs = np.vstack(vecs)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)   # OpenAI vektörleri birim uzunlukta
+    return vecs, labels
+
+
+def timeit(fn, repeat: int) -> float:
+    fn()                                                   # ısınma
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="IntentIndex gecikme benchmark'ı")
+    ap.add_argument("--db", help="Chroma intent veritabanı dizini (ör. db/intent_db)")
+    ap.add_argument("--collection", default="user_intents")
+    ap.add_argument("--intents", type=int, default=16)
+    ap.add_argument("--per-intent", type=int, default=80)
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--noise", type=float, default=1.2)
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--batch", type=int, default=256)
+    args = ap.parse_args()
+
+    col = None
+    if args.db:
+        import chromadb
+        col = chromadb.PersistentClient(path=args.db).get_collection(args.collection)
+        t0 = time.perf_counter()
+        index = IntentIndex.from_collection(col)
+        print(f"Yükleme: {len(index)} vektör, {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    else:
+        vecs, labels = synthetic(args.intents, args.per_intent, args.dim, args.noise)
+        index = IntentIndex(vecs, labels)
+        print(f"Sentetik: {len(index)} vektör × {args.dim} boyut, {len(index.intents)} intent")
+
+    rng = np.random.default_rng(1)
+    picks = rng.choice(len(index), size=min(args.queries, len(index)), replace=False)
+    queries = index.vectors[picks] + 0.01 * rng.normal(size=(len(picks), index.vectors.shape[1]))
+    queries = queries.astype(np.float32)
+
+    # ── Eski çoğunluk oyu ile uyum (kaba kuvvet referans) ───────────────
+    idx, _ = index.topk(queries, args.k)
+    ref = [majority_reference([index.labels[j] for j in row]) for row in idx]
+    new = index.predict_batch(queries, k=args.k, mode="majority")
+    agree = sum(a == b for a, b in zip(ref, new)) / len(ref)
+    print(f"Counter çoğunluk oyu ile uyum: {agree:.2%}")
+
+    # ── Gecikmeler ──────────────────────────────────────────────────────
+    batch = np.resize(queries, (args.batch, queries.shape[1]))
+    print(f"\n{'mod':<10} {'tek çağrı (µs)':>16} {'batch/mesaj (µs)':>18}")
+    for mode in MODES:
+        single = timeit(lambda: index.predict(queries[0], k=args.k, mode=mode), 200)
+        per_msg = timeit(lambda: index.predict_batch(batch, k=args.k, mode=mode), 5) / len(batch)
+        print(f"{mode:<10} {single * 1e6:>16.1f} {per_msg * 1e6:>18.1f}")
+
+    if col is not None:
+        def chroma_once():
+            res = col.query(query_embeddings=[queries[0].tolist()], n_results=args.k,
+                            include=["metadatas"])
+            return majority_reference([m["intent"] for m in res["metadatas"][0]])
+
+        chroma_lat = timeit(chroma_once, 50)
+        print(f"{'chroma':<10} {chroma_lat * 1e6:>16.1f} {'-':>18}")
+
+        hits = 0
+        for q, pred in zip(queries, new):
+            res = col.query(query_embeddings=[q.tolist()], n_results=args.k,
+                            include=["metadatas"])
+            hits += majority_reference([m["intent"] for m in res["metadatas"][0]]) == pred
+        print(f"\nChroma + Counter ile uyum: {hits / len(queries):.2%}")
+
+
+if __name__ == "__main__":
+    main()
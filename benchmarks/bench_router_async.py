@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Senkron `router` ↔ asyncio `arouter` throughput karşılaştırması
+
+Yerel OpenAI taklidi (fake_openai.py) arka planda başlatılır, router bu
+sunucuya yönlendirilir. Her sorguya benzersiz ek verilir; böylece embedding
+önbelleği ölçümü bozmaz (embedding, anlamsal ve birebir yanıt önbellekleri
+geçici dosyalardadır; sahte yanıtlar .cache/ altına yazılmaz).
+
+Geçici bir çalışma dizininde intent (corpus_tr.json) ve otel (data1.json)
+koleksiyonları bench_stages ile aynı şekilde kurulur. Depoda bulunmayan
+`chains.*` handler'ları (booking_api, small_talk, ticket_system) anında
+dönen taklitlerle değiştirilir ve çıktıda listelenir; otel soruları
+router'ın kendi RAG yolundan (katalog / Chroma + sahte LLM) geçer.
+
+    python benchmarks/bench_router_async.py -n 200 -c 100 --latency-ms 150
+    python benchmarks/bench_router_async.py --stage intent
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+from bench_stages import CORPUS, build_workspace  # noqa: E402
+from fake_openai import start_server  # noqa: E402
+
+EMBEDDING_MODEL = "text-embedding-3-large"
+
+QUERIES = [
+    "merhaba",
+    "havuz saat kaçta açılıyor?",
+    "deniz manzaralı oda var mı?",
+    "rezervasyon yapmak istiyorum",
+    "havalimanı transferi ücretli mi?",
+    "otopark var mı?",
+    "teşekkürler, iyi günler",
+    "odada klima çalışmıyor",
+]
+
+
+# Eksik handler modülü → (fonksiyon adı, taklit)
+CHAIN_STUBS = {
+    "chains.booking_api":   ("handle_booking", lambda intent, query, **kw: "[booking_api taklidi]"),
+    "chains.small_talk":    ("respond_small_talk", lambda intent, query=None: "[small_talk taklidi]"),
+    "chains.ticket_system": ("create_ticket", lambda query, **kw: "[ticket_system taklidi]"),
+}
+
+
+def stub_missing_chains() -> List[str]:
+    """Import edilemeyen `chains.*` modüllerini taklitle kaydeder; taklit edilenleri döndürür."""
+    stubbed = []
+    for name, (attr, fn) in CHAIN_STUBS.items():
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            mod = types.ModuleType(name)
+            setattr(mod, attr, fn)
+            sys.modules[name] = mod
+            stubbed.append(name)
+    return stubbed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="router vs arouter throughput")
+    ap.add_argument("-n", "--requests", type=int, default=200)
+    ap.add_argument("-c", "--concurrency", type=int, default=100)
+    ap.add_argument("--latency-ms", type=float, default=150.0)
+    ap.add_argument("--stage", choices=["intent", "full"], default="full",
+                    help="intent: yalnızca predict_intent; full: router/arouter")
+    args = ap.parse_args()
+
+    server = start_server(latency_ms=args.latency_ms)
+    work = Path(tempfile.mkdtemp(prefix="bench-router-"))
+    os.environ.update({
+        "OPENAI_BASE_URL": server.base_url,
+        "OPENAI_API_KEY": "sk-fake",
+        "EMBED_CACHE_PATH": str(work / "embeddings.sqlite3"),
+        "SEMANTIC_CACHE_PATH": str(work / "semantic.sqlite3"),
+        "FAST_PATH_STATS": str(work / "fast_path.sqlite3"),
+        "COMPLETION_CACHE_PATH": str(work / "completions.sqlite3"),
+        "REQUEST_JOURNAL": "0",
+    })
+    os.chdir(work)                       # router db/ yollarını çalışma dizinine göre açar
+
+    from resources import openai_client
+    corpus = json.loads(CORPUS.read_text(encoding="utf-8"))
+    build_workspace(openai_client(), corpus, EMBEDDING_MODEL)
+    stubbed = stub_missing_chains()
+    import router as rt
+    rt.warmup()
+    server.requests.clear()              # kurulum ve ısıtma istekleri sayılmasın
+
+    def queries(tag: str):
+        return [f"{QUERIES[i % len(QUERIES)]} ({tag}{i})" for i in range(args.requests)]
+
+    # ── Senkron: tek worker, sırayla ────────────────────────────────────
+    t0 = time.perf_counter()
+    for i, q in enumerate(queries("s")):
+        if args.stage == "intent":
+            rt.predict_intent(q)
+        else:
+            rt.router(f"guest-s{i}", q)
+    sync_s = time.perf_counter() - t0
+
+    # ── asyncio: tek süreç, `concurrency` eşzamanlı konuşma ─────────────
+    async def run_async() -> float:
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one(i: int, q: str):
+            async with sem:
+                if args.stage == "intent":
+                    return await rt.apredict_intent(q)
+                return await rt.arouter(f"guest-{i}", q)
+
+        t = time.perf_counter()
+        await asyncio.gather(*(one(i, q) for i, q in enumerate(queries("a"))))
+        return time.perf_counter() - t
+
+    async_s = asyncio.run(run_async())
+
+    print(f"Aşama: {args.stage}  |  istek: {args.requests}  |  "
+          f"sahte gecikme: {args.latency_ms:.0f} ms")
+    if stubbed:
+        print("Taklit handler'lar (depoda yok):", ", ".join(stubbed))
+    print(f"{'yol':<8} {'süre (s)':>10} {'istek/s':>10}")
+    print(f"{'sync':<8} {sync_s:>10.2f} {args.requests / sync_s:>10.1f}")
+    print(f"{'async':<8} {async_s:>10.2f} {args.requests / async_s:>10.1f}")
+    print(f"Hızlanma: ×{sync_s / async_s:.1f}")
+    print("Sunucu istekleri:", server.requests)
+    print("Batch istatistikleri:", rt.embed_batcher.stats()["batch_size"])
+    shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
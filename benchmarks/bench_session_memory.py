@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Bellek içi oturum deposu: oturum başına bellek + çok thread'li çekişme
+
+1) Bellek : `--guests` (varsayılan 100k) eşzamanlı misafir için dolu state,
+            tracemalloc ile ölçülür; `__slots__`'lı BookingState, slots'suz
+            eşdeğeriyle kıyaslanır.
+2) Çekişme: `--threads` thread 100k misafir arasında rastgele diyalog turları
+            yürütür; tek kilit (shards=1) ↔ kilit şeritli (shards=64) tur/sn.
+3) Tahliye: kısa TTL ve küçük `max_entries` ile deponun sınırlı kaldığı gösterilir.
+
+    python benchmarks/bench_session_memory.py --guests 100000 --threads 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+import session_manager as sm                                  # noqa: E402
+from chains.booking_dialog import _advance                   # noqa: E402
+
+TURNS = ["rezervasyon", "2025-07-01", "2025-07-05", "1", "2", "8,5"]
+
+
+@dataclass
+class DictBookingState:                 # slots'suz karşılaştırma
+    step: str = "date_in"
+    date_in: Optional[str] = None
+    date_out: Optional[str] = None
+    rooms: int = 1
+    adults: int = 2
+    child_ages: List[int] = field(default_factory=list)
+
+
+def measure_memory(n: int, cls) -> float:
+    store = sm.MemorySessionStore(max_entries=n)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for i in range(n):
+        store.put(f"guest-{i:06d}",
+                  cls("child", "2025-07-01", "2025-07-05", 1, 2, [8, 5]))
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return used / n
+
+
+def contention(n: int, threads: int, shards: int, seconds: float) -> float:
+    store = sm.MemorySessionStore(shards=shards, max_entries=n)
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def worker(w: int) -> None:
+        rnd = random.Random(w)
+        while not stop.is_set():
+            uid = f"guest-{rnd.randrange(n)}"
+            st = store.get(uid)
+            step = 0 if st is None else ["date_in", "date_out", "rooms",
+                                         "adults", "child"].index(st.step) + 1
+            store.update(uid, lambda s, m=TURNS[step]: _advance(s, m))
+            counts[w] += 1
+
+    ts = [threading.Thread(target=worker, args=(w,)) for w in range(threads)]
+    for t in ts:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in ts:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Oturum deposu bellek/çekişme benchmark'ı")
+    ap.add_argument("-g", "--guests", type=int, default=100_000)
+    ap.add_argument("-t", "--threads", type=int, default=16)
+    ap.add_argument("-s", "--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+
+    slot_b = measure_memory(args.guests, sm.BookingState)
+    dict_b = measure_memory(args.guests, DictBookingState)
+    print(f"Bellek ({args.guests:,} oturum, depo dahil):")
+    print(f"  slots      : {slot_b:7.0f} bayt/oturum  ({slot_b * args.guests / 2**20:6.1f} MiB)")
+    print(f"  __dict__   : {dict_b:7.0f} bayt/oturum  ({dict_b * args.guests / 2**20:6.1f} MiB)")
+
+    print(f"Çekişme ({args.threads} thread, {args.seconds:.0f} sn):")
+    for shards in (1, sm.SESSION_SHARDS):
+        rate = contention(args.guests, args.threads, shards, args.seconds)
+        print(f"  shards={shards:<3}: {rate:>10,.0f} tur/sn")
+
+    # Tahliye: sahte saatle 1 sn TTL (≈5000 canlı), 10k kayıt sınırı
+    now = [0.0]
+    store = sm.MemorySessionStore(max_entries=10_000, idle_ttl_s=1.0, clock=lambda: now[0])
+    for i in range(args.guests):
+        now[0] = i / 5000                # 5000 misafir/sn
+        store.put(f"guest-{i}", sm.BookingState())
+    print(f"Tahliye: {store.stats()}")
+
+
+if __name__ == "__main__":
+    main()
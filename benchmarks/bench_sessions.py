@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Oturum deposu gecikmesi: tur başına get (peek_state) ve update
+(handle_booking_intent = WATCH/GET + MULTI/SET) süreleri.
+
+Her misafir 6 turluk rezervasyon diyaloğunu baştan sona yürütür; son turda
+URL dönmesi ve state'in silinmesi doğrulanır.
+
+    python benchmarks/bench_sessions.py --backend memory
+    python benchmarks/bench_sessions.py --backend fakeredis      # pip install fakeredis
+    python benchmarks/bench_sessions.py --backend redis --redis-url redis://localhost:6379/0
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(ROOT))
+import session_manager as sm                                  # noqa: E402
+from chains.booking_dialog import handle_booking_intent      # noqa: E402
+
+TURNS = ["rezervasyon", "2025-07-01", "2025-07-05", "1", "2", "8,5"]
+
+
+def make_store(args) -> sm.SessionStore:
+    if args.backend == "memory":
+        return sm.MemorySessionStore()
+    if args.backend == "fakeredis":
+        import fakeredis
+        return sm.RedisSessionStore(fakeredis.FakeRedis(), ttl_s=args.ttl)
+    return sm.RedisSessionStore.from_url(args.redis_url, ttl_s=args.ttl)
+
+
+def pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Oturum deposu benchmark'ı")
+    ap.add_argument("--backend", choices=["memory", "fakeredis", "redis"], default="memory")
+    ap.add_argument("--redis-url", default="redis://localhost:6379/0")
+    ap.add_argument("-g", "--guests", type=int, default=2000)
+    ap.add_argument("-t", "--threads", type=int, default=8)
+    ap.add_argument("--ttl", type=int, default=sm.SESSION_TTL_S)
+    args = ap.parse_args()
+
+    store = make_store(args)
+    sm.configure_store(store)
+    timings: Dict[str, List[float]] = {"get": [], "update": []}
+
+    def guest(i: int) -> None:
+        uid = f"bench-{i}"
+        for turn, msg in enumerate(TURNS):
+            t0 = time.perf_counter()
+            sm.peek_state(uid)
+            t1 = time.perf_counter()
+            reply, done = handle_booking_intent(uid, msg)
+            t2 = time.perf_counter()
+            timings["get"].append((t1 - t0) * 1000)
+            timings["update"].append((t2 - t1) * 1000)
+            if done != (turn == len(TURNS) - 1):
+                raise AssertionError(f"{uid} tur {turn}: beklenmeyen yanıt {reply!r}")
+        if sm.peek_state(uid) is not None:
+            raise AssertionError(f"{uid}: diyalog bitti ama state silinmedi")
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(guest, range(args.guests)))
+    wall = time.perf_counter() - t0
+
+    turns = args.guests * len(TURNS)
+    print(f"Depo: {args.backend}  |  misafir: {args.guests}  |  tur: {turns}  |  "
+          f"thread: {args.threads}")
+    print(f"{'işlem':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ort ms':>8}")
+    for name, vals in timings.items():
+        print(f"{name:<8} {pct(vals, 50):>8.3f} {pct(vals, 95):>8.3f} "
+              f"{pct(vals, 99):>8.3f} {statistics.fmean(vals):>8.3f}")
+    print(f"Toplam: {wall:.2f} sn → {turns / wall:,.0f} tur/sn")
+
+
+if __name__ == "__main__":
+    main()
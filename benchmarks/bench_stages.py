@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+"""
+Aşama bazlı gecikme benchmark'ı (çevrimdışı, yerel OpenAI taklidiyle)
+
+Sabit Türkçe sorgu korpusu (corpus_tr.json) her sorgu için aşağıdaki
+aşamalardan sırayla geçirilir; aşama başına p50/p95/p99 raporlanır ve
+sonuç commit bilgisiyle JSON'a yazılır (iki commit `--compare` ile kıyaslanır).
+
+Geçici bir çalışma dizininde otel (data1.json) ve intent (korpus etiketleri)
+koleksiyonları fake_openai'nin hash vektörleriyle kurulur; gerçek API ya da
+mevcut veritabanı gerekmez.
+
+  filters          rag_pipeline.extract_filters
+  fast_path        oda kataloğu (room_catalog) yanıtı
+  embed            rag_pipeline.embed_texts, önbellek soğuk (her turda temizlenir)
+  embed_cached     aynı çağrı, önbellek isabeti
+  retrieval        yerel filtre + BM25 + tek Chroma sorgusu (+RRF), main ile aynı karar
+  build_context    rag_pipeline.build_context (bütçesiz)
+  pack_context     token bütçeli bağlam (main'in kullandığı)
+  llm_ttft / llm   stream_answer ilk token / toplam (yanıt önbelleği kapalı)
+  intent_index     embedding (önbellekte) + IntentIndex.predict
+  predict_intent   router.predict_intent  ┐ eksik chains/ handler'ları
+  router           router.router          ┘ taklitle (bench_router_async)
+  booking_turn     booking_dialog.handle_booking_intent, diyalog turu başına
+
+    python benchmarks/bench_stages.py --latency-ms 150 --repeat 3
+    python benchmarks/bench_stages.py --compare benchmarks/results/stages-<commit>-<zaman>.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH = Path(__file__).resolve().parent
+ROOT = BENCH.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "cullian_rag"))
+sys.path.append(str(BENCH))
+from fake_openai import start_server                 # noqa: E402
+
+CORPUS      = BENCH / "corpus_tr.json"
+RESULTS_DIR = BENCH / "results"
+HOTEL_DATA  = ROOT / "cullian_vector" / "data1.json"
+SEED_BATCH  = 100
+PERCENTILES = (50, 95, 99)
+
+
+# ───── İstatistik ────────────────────────────────────────────────────────
+def percentile(values: List[float], p: float) -> float:
+    """En yakın sıra yöntemi (örnek sayısı az olduğunda da gerçek bir ölçüm döner)."""
+    s = sorted(values)
+    return s[max(0, math.ceil(p / 100 * len(s)) - 1)]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    out = {"n": len(samples), "mean": round(sum(samples) / len(samples), 3)}
+    out.update({f"p{p}": round(percentile(samples, p), 3) for p in PERCENTILES})
+    out["max"] = round(max(samples), 3)
+    return out
+
+
+def git_info() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", "-C", str(ROOT), *args], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"),
+                "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+# ───── Çalışma dizini ────────────────────────────────────────────────────
+def chroma_metadata(meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Chroma yalnız skaler kabul eder: None atılır, liste/sözlük JSON metne döner."""
+    out = {}
+    for k, v in meta.items():
+        if v is None:
+            continue
+        if isinstance(v, (list, dict)):
+            k, v = (f"{k}_json" if not k.endswith("_json") else k), json.dumps(v, ensure_ascii=False)
+        out[k] = v
+    return out
+
+
+def seed(ai, col, ids: List[str], docs: List[str], metas: List[dict], model: str) -> None:
+    """Önbelleği atlayarak (doğrudan istemciyle) embed edip ekler."""
+    for i in range(0, len(ids), SEED_BATCH):
+        batch = slice(i, i + SEED_BATCH)
+        resp = ai.embeddings.create(model=model, input=docs[batch])
+        col.add(ids=ids[batch], documents=docs[batch], metadatas=metas[batch],
+                embeddings=[d.embedding for d in resp.data])
+
+
+def build_workspace(ai, corpus: dict, model: str) -> None:
+    """Geçerli dizinde rag_pipeline (chroma_db/) ve router (db/) koleksiyonlarını kurar."""
+    from dataset_io import iter_records
+    from resources import collection
+
+    records = {r["chunk_id"]: r for r in iter_records(HOTEL_DATA)}
+    ids = list(records)
+    docs = [records[i]["text_for_embedding"] for i in ids]
+    metas = [chroma_metadata(records[i].get("metadata") or {}) for i in ids]
+    seed(ai, collection("chroma_db", "cullinan_hotel_facts"), ids, docs, metas, model)
+    seed(ai, collection("db/hotel_db", "hotel_facts"), ids, docs, metas, model)
+
+    queries = corpus["queries"]
+    seed(ai, collection("db/intent_db", "user_intents"),
+         [f"q{i}" for i in range(len(queries))], [q["q"] for q in queries],
+         [{"intent": q["intent"]} for q in queries], model)
+
+
+# ───── Ölçüm ─────────────────────────────────────────────────────────────
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self.skipped: Dict[str, str] = {}
+
+    def time(self, stage: str, fn: Callable, *args):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        self.samples[stage].append((time.perf_counter() - t0) * 1000)
+        return out
+
+    def add(self, stage: str, ms: float) -> None:
+        self.samples[stage].append(ms)
+
+    def results(self) -> Dict[str, Dict[str, Any]]:
+        out: Dict[str, Dict[str, Any]] = {s: summarize(v) for s, v in self.samples.items()}
+        out.update({s: {"skipped": why} for s, why in self.skipped.items()})
+        return out
+
+
+def run(args, corpus: dict) -> Dict[str, Dict[str, Any]]:
+    import rag_pipeline as rp
+    from context_packer import pack_context
+    from embedding_cache import get_embedding_cache
+    from intent_classifier import IntentIndex
+    from lexical_index import is_decisive, load_or_build as load_bm25
+    from metadata_index import load_or_build as load_metadata_index
+    from resources import collection, openai_client
+    from room_catalog import load_or_build as load_room_catalog
+    from semantic_cache import collection_version
+    from answer_stream import stream_answer
+    from chains.booking_dialog import handle_booking_intent
+    logging.getLogger().setLevel(logging.ERROR)     # rag_pipeline INFO logları ölçümü kirletmesin
+
+    ai = openai_client()
+    build_workspace(ai, corpus, rp.EMBEDDING_MODEL)
+    col = collection("chroma_db", "cullinan_hotel_facts")
+    version = collection_version(col)
+    meta_index = load_metadata_index(col, Path("chroma_db"), version)
+    bm25 = load_bm25(col, Path("chroma_db"), version)
+    catalog = load_room_catalog(col, Path("chroma_db"), version)
+    intents = IntentIndex.from_collection(collection("db/intent_db", "user_intents"))
+
+    rec = Recorder()
+    try:
+        from bench_router_async import stub_missing_chains
+        stubbed = stub_missing_chains()     # depoda olmayan chains.* → anında dönen taklit
+        if stubbed:
+            print(f"⚠️  Taklit edilen handler'lar: {', '.join(stubbed)}")
+        import router as rt
+    except Exception as e:                          # chains/ eksik, bağımlılık yok …
+        rt = None
+        why = f"router import edilemedi: {type(e).__name__}: {e}"
+        rec.skipped.update({"predict_intent": why, "router": why})
+
+    def retrieval(q: str, vec: List[float]):
+        allowed = rp.allowed_ids(meta_index, rp.extract_filters(q), col)
+        lex = bm25.search(q, rp.FUSION_FETCH, allowed)
+        if is_decisive(lex):
+            return rp.fetch_by_ids(meta_index, [i for i, _ in lex[:args.top_k]])
+        return rp.retrieve(col, meta_index, vec, allowed, lex, args.top_k)
+
+    for n in range(args.repeat):
+        get_embedding_cache().store.clear()
+        for i, item in enumerate(corpus["queries"]):
+            q = item["q"]
+            rec.time("filters", rp.extract_filters, q)
+            rec.time("fast_path", catalog.answer, q)
+            vec = rec.time("embed", rp.embed_texts, ai, [q])[0]
+            rec.time("embed_cached", rp.embed_texts, ai, [q])
+            docs, metas = rec.time("retrieval", retrieval, q, vec)
+            rec.time("build_context", rp.build_context, docs, metas)
+            packed = rec.time("pack_context", pack_context, docs, metas, rp.render_block,
+                              rp.CONTEXT_BUDGET, rp.LLM_MODEL)
+
+            msgs = [{"role": "system", "content": rp.SYSTEM_PROMPT},
+                    {"role": "user", "content": f"Soru: {q}\n\n--- KAYNAKLAR ---\n{packed.text}\n\nCevabın:"}]
+            stream = stream_answer(ai, msgs, rp.build_sources(packed.metas), model=rp.LLM_MODEL,
+                                   temperature=0.1, max_tokens=rp.MAX_TOKENS_OUT, cache=False)
+            for _ in stream:
+                pass
+            rec.add("llm_ttft", stream.ttft_ms or 0.0)
+            rec.add("llm", stream.total_ms or 0.0)
+
+            rec.time("intent_index", lambda: intents.predict(rp.embed_texts(ai, [q])[0]))
+            if rt is not None:
+                rec.time("predict_intent", rt.predict_intent, q)
+                rec.time("router", rt.router, f"bench-{n}-{i}", q)
+
+        for d, dialog in enumerate(corpus["dialogs"]):
+            for msg in dialog:
+                rec.time("booking_turn", handle_booking_intent, f"bench-dialog-{n}-{d}", msg)
+    return rec.results()
+
+
+# ───── Rapor ─────────────────────────────────────────────────────────────
+def print_table(stages: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'aşama':<16}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}{'ort':>10}   (ms)")
+    for name, s in stages.items():
+        if "skipped" in s:
+            print(f"{name:<16}  atlandı – {s['skipped']}")
+            continue
+        print(f"{name:<16}{s['n']:>5}{s['p50']:>10.2f}{s['p95']:>10.2f}{s['p99']:>10.2f}{s['mean']:>10.2f}")
+
+
+def print_compare(prev: dict, cur: dict) -> None:
+    print(f"\nKıyas: {prev['meta'].get('commit')} → {cur['meta'].get('commit')}")
+    print(f"{'aşama':<16}{'p50 önce':>10}{'sonra':>10}{'Δ%':>8}{'p95 önce':>10}{'sonra':>10}{'Δ%':>8}")
+    for name, s in cur["stages"].items():
+        old = prev["stages"].get(name)
+        if not old or "skipped" in old or "skipped" in s:
+            continue
+        row = f"{name:<16}"
+        for p in ("p50", "p95"):
+            delta = 100 * (s[p] - old[p]) / old[p] if old[p] else 0.0
+            row += f"{old[p]:>10.2f}{s[p]:>10.2f}{delta:>+8.0f}"
+        print(row)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Aşama bazlı gecikme benchmark'ı")
+    ap.add_argument("--corpus", default=str(CORPUS), help="Sorgu korpusu (JSON)")
+    ap.add_argument("--repeat", type=int, default=3, help="Korpusun kaç tur koşacağı")
+    ap.add_argument("-k", "--top-k", type=int, default=4)
+    ap.add_argument("--latency-ms", type=float, default=100.0, help="Sahte istek gecikmesi")
+    ap.add_argument("--token-ms", type=float, default=5.0, help="Akışta token arası gecikme")
+    ap.add_argument("--dim", type=int, default=3072, help="Sahte embedding boyutu")
+    ap.add_argument("--out", help="Sonuç dosyası (vars: benchmarks/results/stages-<commit>-<zaman>.json)")
+    ap.add_argument("--compare", help="Önceki sonuç dosyası; aşama bazlı fark yazdırılır")
+    args = ap.parse_args()
+
+    corpus = json.loads(Path(args.corpus).read_text(encoding="utf-8"))
+    server = start_server(latency_ms=args.latency_ms, token_ms=args.token_ms, dim=args.dim)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="bench-stages-") as work:
+        os.environ.update({
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_KEY": "sk-fake",
+            "EMBED_CACHE_PATH": str(Path(work) / "embeddings.sqlite3"),
+            "SEMANTIC_CACHE_PATH": str(Path(work) / "semantic.sqlite3"),
+            "FAST_PATH_STATS": str(Path(work) / "fast_path.sqlite3"),
+            "COMPLETION_CACHE": "0",
+        })
+        os.chdir(work)                  # rag_pipeline ./chroma_db, router ./db yollarını kullanır
+        try:
+            stages = run(args, corpus)
+        finally:
+            os.chdir(cwd)
+
+    result = {
+        "meta": {**git_info(), "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "python": platform.python_version(), "corpus": Path(args.corpus).name,
+                 "queries": len(corpus["queries"]), "repeat": args.repeat, "top_k": args.top_k,
+                 "latency_ms": args.latency_ms, "token_ms": args.token_ms, "dim": args.dim,
+                 "server_requests": server.requests},
+        "stages": stages,
+    }
+    print(f"{len(corpus['queries'])} sorgu × {args.repeat} tur, sahte gecikme "
+          f"{args.latency_ms:.0f} ms, commit {result['meta']['commit']}"
+          f"{' (değişiklik var)' if result['meta']['dirty'] else ''}")
+    print_table(stages)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / (
+        f"stages-{result['meta']['commit'] or 'nogit'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n💾 {out}")
+    if args.compare:
+        print_compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), result)
+
+
+if __name__ == "__main__":
+    main()
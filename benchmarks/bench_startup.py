@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Soğuk açılış: modül düzeyinde açılan istemciler ↔ resources.py (tembel)
+
+Her senaryo ayrı bir Python sürecinde `--runs` kez çalışır (paket önbelleği
+sıcak, süreç soğuk); süre senaryonun kendi kodudur, yorumlayıcı açılışı
+hariç. Chroma dizinleri geçici bir klasörde oluşturulur.
+
+  eski başlık     : router.py'nin önceki import'u (openai + chromadb import,
+                    2 OpenAI istemcisi, 3 PersistentClient + koleksiyon)
+  tembel import   : `import resources` – hiçbir istemci açılmaz
+  router bağımlılık: router.py'nin chains/ dışındaki tüm import'ları (yeni hâli)
+  tembel + warmup : aynı kaynakların resources.warmup() ile açılması
+  router import   : gerçek `import router` (chains/ ve config varsa)
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_PRELUDE = "import resource, sys, time\nsys.path.insert(0, {root!r})\nt0 = time.perf_counter()\n"
+_REPORT = ("\nprint(__import__('json').dumps({'ms': (time.perf_counter() - t0) * 1000, "
+           "'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n")
+_DBS = [("db/intent_db", "user_intents"), ("db/hotel_db", "hotel_facts"),
+        ("db/booking_db", "booking_logs")]
+
+SCENARIOS = {
+    "eski başlık": """
+import chromadb, openai
+from openai import OpenAI, AsyncOpenAI
+client, aclient = OpenAI(), AsyncOpenAI()
+for path, name in {dbs!r}:
+    chromadb.PersistentClient(path=path).get_or_create_collection(name)
+""",
+    "tembel import": """
+import resources
+""",
+    "router bağımlılık": """
+import tenacity, embedding_cache, embed_batcher, intent_classifier, answer_stream
+import model_registry, resources, room_catalog, session_manager
+""",
+    "tembel + warmup": """
+import resources
+resources.warmup(collections={dbs!r}, asyncio=True)
+""",
+    "router import": """
+import router
+""",
+}
+
+
+def run(code: str, cwd: str) -> dict:
+    env = {**os.environ, "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "sk-bench")}
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        last = (out.stderr.strip().splitlines() or ["?"])[-1]
+        raise RuntimeError(last)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Soğuk açılış (import) benchmark'ı")
+    ap.add_argument("--runs", type=int, default=5, help="Senaryo başına süreç sayısı")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'senaryo':<18}{'ms p50':>9}{'ms min':>9}{'RSS MB':>9}")
+        base = None
+        for name, body in SCENARIOS.items():
+            code = _PRELUDE.format(root=str(ROOT)) + body.format(dbs=_DBS) + _REPORT
+            try:
+                rows = [run(code, tmp) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"{name:<18}  atlandı: {e}")
+                continue
+            ms = statistics.median(r["ms"] for r in rows)
+            rss = statistics.median(r["rss_mb"] for r in rows)
+            base = base or ms
+            note = f"   (eski başlığın %{100 * ms / base:.0f}'i)" if ms != base else ""
+            print(f"{name:<18}{ms:>9.0f}{min(r['ms'] for r in rows):>9.0f}{rss:>9.0f}{note}")
+
+
+if __name__ == "__main__":
+    main()
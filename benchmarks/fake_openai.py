@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""
+Yerel, deterministik OpenAI taklidi (benchmark'lar için)
+
+• POST /v1/embeddings        → metnin sha256'sından üretilen birim vektörler
+• POST /v1/chat/completions  → sabit şablonlu yanıt (`stream: true` → SSE parçaları)
+• Her isteğe `--latency-ms` (+ metin başına `--per-item-ms`) gecikme eklenir;
+  akışta token'lar `--token-ms` arayla gönderilir.
+
+Tek başına:
+    python benchmarks/fake_openai.py --port 8765 --latency-ms 150
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-fake
+
+Kod içinden:
+    server = start_server(latency_ms=150)      # arka plan thread'inde
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+DEFAULT_DIM = 3072
+
+
+@lru_cache(maxsize=8192)
+def hash_vector(text: str, dim: int = DEFAULT_DIM) -> List[float]:
+    """
+    Aynı metin → aynı birim vektör (sha256 tohumlu Gauss). Önbellekli:
+    benchmark'lar ölçümden önce `hash_vector(t, dim)` ile ısıtıp taklidin
+    CPU'sunu (aynı süreç, aynı GIL) ölçülen yoldan çıkarabilir.
+    """
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vec = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vec) ** 0.5
+    return [v / norm for v in vec]
+
+
+def _b64(vec: List[float]) -> str:
+    return base64.b64encode(struct.pack(f"<{len(vec)}f", *vec)).decode("ascii")
+
+
+def fake_answer(messages: list) -> str:
+    question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    digest = hashlib.sha256(question.encode("utf-8")).hexdigest()[:8]
+    return f"Bu, yerel test sunucusunun yanıtıdır [1]. (#{digest})"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args) -> None:      # sessiz
+        pass
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        cfg = self.server.cfg
+        self.server.count(self.path)
+
+        if self.path.endswith("/embeddings"):
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            time.sleep((cfg["latency_ms"] + cfg["per_item_ms"] * len(inputs)) / 1000.0)
+            dim = body.get("dimensions") or cfg["dim"]
+            # openai istemcisi varsayılan olarak base64 ister (float32, little-endian)
+            encode = _b64 if body.get("encoding_format") == "base64" else list
+            payload = {
+                "object": "list",
+                "model": body.get("model"),
+                "data": [{"object": "embedding", "index": i, "embedding": encode(hash_vector(t, dim))}
+                         for i, t in enumerate(inputs)],
+                "usage": {"prompt_tokens": sum(len(t) // 4 + 1 for t in inputs),
+                          "total_tokens": sum(len(t) // 4 + 1 for t in inputs)},
+            }
+            return self._json(payload)
+
+        if self.path.endswith("/chat/completions"):
+            time.sleep(cfg["latency_ms"] / 1000.0)
+            answer = fake_answer(body.get("messages", []))
+            if body.get("stream"):
+                return self._stream(body.get("model"), answer, cfg["token_ms"])
+            payload = {
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": answer}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(answer.split()),
+                          "total_tokens": len(answer.split())},
+            }
+            return self._json(payload)
+
+        self.send_error(404)
+
+    def _stream(self, model: str, answer: str, token_ms: float) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        tokens = [w + " " for w in answer.split(" ")]
+        for i, tok in enumerate(tokens):
+            chunk = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": tok},
+                             "finish_reason": "stop" if i == len(tokens) - 1 else None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(token_ms / 1000.0)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _json(self, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(self, host: str, port: int, **cfg):
+        super().__init__((host, port), _Handler)
+        self.cfg = cfg
+        self.requests: dict = {}
+        self._lock = threading.Lock()
+
+    def count(self, path: str) -> None:
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 100.0,
+                 per_item_ms: float = 0.0, token_ms: float = 20.0,
+                 dim: int = DEFAULT_DIM) -> FakeOpenAIServer:
+    """Sunucuyu arka plan thread'inde başlatır (port=0 → boş port)."""
+    server = FakeOpenAIServer(host, port, latency_ms=latency_ms, per_item_ms=per_item_ms,
+                              token_ms=token_ms, dim=dim)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-openai").start()
+    return server
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Yerel OpenAI taklidi")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=100.0)
+    ap.add_argument("--per-item-ms", type=float, default=0.0)
+    ap.add_argument("--token-ms", type=float, default=20.0,
+                    help="Akışta token'lar arası gecikme")
+    ap.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    args = ap.parse_args()
+
+    server = FakeOpenAIServer(args.host, args.port, latency_ms=args.latency_ms,
+                              per_item_ms=args.per_item_ms, token_ms=args.token_ms,
+                              dim=args.dim)
+    print(f"🧪 Fake OpenAI → {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
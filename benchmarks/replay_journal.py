@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+İstek günlüğünü (request_journal.py) yeniden oynatan yük aracı
+
+Günlükteki mesajlar kayıt zamanlarındaki aralıklarla `router.router`'a
+verilir; `--speed` aralıkları ölçekler (2 → iki kat hızlı, 0 → beklemeden),
+`-c` eşzamanlı çağrı sayısını sınırlar. Aynı kullanıcının mesajları
+sırası korunarak ardışık işlenir (rezervasyon diyaloğu adımları karışmaz).
+
+Çağrı başına gecikme, zamanlama kayması (planlanan → gerçek başlangıç) ve
+hatalar raporlanır. Oynatılan trafik varsayılan olarak günlüğe yazılmaz
+(REQUEST_JOURNAL=0); `--journal` ile ayrı bir dosyaya yazılabilir.
+
+    python benchmarks/replay_journal.py logs/requests.jsonl --speed 4 -c 16
+    python benchmarks/replay_journal.py logs/requests.jsonl --speed 0 --fake --latency-ms 150
+    python benchmarks/replay_journal.py logs/requests.jsonl --journal logs/replay.jsonl
+
+Gerçek API'ye gidilecekse `--fake` verilmez; embedding/yanıt önbellekleri
+o zaman ayarlandıkları yerden (EMBED_CACHE_PATH …) kullanılır. Depoda
+bulunmayan `chains.*` handler'ları `--fake` ile (ya da hedef import
+edilemezse) bench_router_async'teki taklitlerle değiştirilir.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BENCH = Path(__file__).resolve().parent
+ROOT = BENCH.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(BENCH))
+from bench_router_async import EMBEDDING_MODEL, stub_missing_chains  # noqa: E402
+from bench_stages import CORPUS, build_workspace, summarize         # noqa: E402
+from fake_openai import start_server                 # noqa: E402
+
+
+def load_records(path: str, limit: Optional[int], include_errors: bool) -> List[Dict[str, Any]]:
+    from request_journal import iter_journal
+    recs = [r for r in iter_journal(path)
+            if r.get("query") is not None and (include_errors or "error" not in r)]
+    recs.sort(key=lambda r: r.get("ts", 0.0))
+    return recs[:limit] if limit else recs
+
+
+def load_target(spec: str, stub_chains: bool = False) -> Callable[[str, str], Any]:
+    """
+    "modül:fonksiyon" → `fn(user_id, query)`. `stub_chains` ya da import
+    hatası: depoda olmayan `chains.*` handler'ları bench_router_async'teki
+    anında dönen taklitlerle değiştirilir ve listelenir.
+    """
+    module, _, name = spec.partition(":")
+    if stub_chains and (stubbed := stub_missing_chains()):
+        print(f"⚠️  Taklit edilen handler'lar: {', '.join(stubbed)}")
+    try:
+        mod = importlib.import_module(module)
+    except ImportError as e:
+        if stub_chains or not (stubbed := stub_missing_chains()):
+            raise
+        print(f"⚠️  {module} import edilemedi ({e}); taklit edilen handler'lar: {', '.join(stubbed)}")
+        mod = importlib.import_module(module)
+    return getattr(mod, name or "router")
+
+
+def replay(fn: Callable[[str, str], Any], recs: List[Dict[str, Any]], speed: float,
+           concurrency: int, user_prefix: str) -> Dict[str, Any]:
+    latencies: List[float] = []
+    lags: List[float] = []
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    last: Dict[str, Future] = {}        # kullanıcı → son mesajının işi
+
+    def one(user_id: str, query: str, due: float, prev: Optional[Future]) -> None:
+        if prev is not None:
+            prev.exception()            # önceki mesaj bitmeden başlama (hata da olsa)
+        start = time.perf_counter()
+        try:
+            fn(user_id, query)
+        except Exception as e:
+            with lock:
+                errors[type(e).__name__] += 1
+        finally:
+            end = time.perf_counter()
+            with lock:
+                latencies.append((end - start) * 1000.0)
+                lags.append(max(0.0, start - due) * 1000.0)
+
+    ts0 = recs[0].get("ts", 0.0)
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="replay") as pool:
+        for r in recs:
+            due = t0 + ((r.get("ts", ts0) - ts0) / speed if speed > 0 else 0.0)
+            if (wait := due - time.perf_counter()) > 0:
+                time.sleep(wait)
+            user_id = f"{user_prefix}{r.get('user_id', 'anon')}"
+            # Önceki işler havuz kuyruğunda önde olduğundan bekleme kilitlenmez
+            last[user_id] = pool.submit(one, user_id, r["query"], due, last.get(user_id))
+    wall = time.perf_counter() - t0
+
+    span_s = recs[-1].get("ts", ts0) - ts0
+    return {
+        "requests": len(recs),
+        "users": len(last),
+        "wall_s": round(wall, 3),
+        "rps": round(len(recs) / wall, 2) if wall else 0.0,
+        "recorded_rps": round(len(recs) / span_s, 2) if span_s else None,
+        "latency_ms": summarize(latencies),
+        "schedule_lag_ms": summarize(lags),
+        "errors": dict(errors),
+    }
+
+
+def print_report(res: Dict[str, Any], recorded: List[float]) -> None:
+    print(f"{res['requests']} istek, {res['users']} kullanıcı, {res['wall_s']:.1f} s "
+          f"→ {res['rps']:.1f} istek/s"
+          + (f" (kayıtta {res['recorded_rps']:.1f} istek/s)" if res["recorded_rps"] else ""))
+    print(f"{'':16s}{'ort':>9s}{'p50':>9s}{'p95':>9s}{'p99':>9s}{'max':>9s}")
+    rows = [("gecikme", res["latency_ms"]), ("kayma", res["schedule_lag_ms"])]
+    if recorded:
+        rows.append(("kayıttaki", summarize(recorded)))
+    for label, s in rows:
+        print(f"{label:16s}" + "".join(f"{s[k]:9.1f}" for k in ("mean", "p50", "p95", "p99", "max")))
+    if res["errors"]:
+        print("hatalar: " + ", ".join(f"{k}×{v}" for k, v in res["errors"].items()))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="İstek günlüğünü router'a yeniden oynatır")
+    ap.add_argument("journal", nargs="?", help="Günlük dosyası (vars: REQUEST_JOURNAL_PATH); "
+                                              "döndürülmüş .1 … .N kopyaları da okunur")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="Zaman çarpanı: 1 kayıttaki hız, 4 dört kat hızlı, 0 beklemeden")
+    ap.add_argument("-c", "--concurrency", type=int, default=8, help="Eşzamanlı çağrı sınırı")
+    ap.add_argument("-n", "--limit", type=int, help="İlk N kayıt")
+    ap.add_argument("--target", default="router:router", help="Çağrılacak fn(user_id, query)")
+    ap.add_argument("--user-prefix", default="replay-",
+                    help="Oturumlar gerçek kullanıcılarınkine karışmasın diye user_id öneki")
+    ap.add_argument("--include-errors", action="store_true", help="Hatayla bitmiş kayıtları da oynat")
+    ap.add_argument("--journal", dest="out_journal",
+                    help="Oynatılan trafiği bu günlüğe yaz (vars: yazılmaz)")
+    ap.add_argument("--fake", action="store_true",
+                    help="Yerel OpenAI taklidi + geçici önbellekler (gerçek API'ye gitmez)")
+    ap.add_argument("--latency-ms", type=float, default=100.0, help="--fake: sahte istek gecikmesi")
+    ap.add_argument("--out", help="Sonucu JSON olarak yaz")
+    args = ap.parse_args()
+
+    # Göreli yollar --fake'in çalışma dizinine geçişinden etkilenmesin
+    for attr in ("journal", "out", "out_journal"):
+        if getattr(args, attr):
+            setattr(args, attr, str(Path(getattr(args, attr)).resolve()))
+
+    # Ayarlar modüller import edilmeden önce ortamdan okunur
+    if args.out_journal:
+        os.environ["REQUEST_JOURNAL_PATH"] = args.out_journal
+    else:
+        os.environ["REQUEST_JOURNAL"] = "0"
+    from request_journal import REQUEST_JOURNAL_PATH
+    recs = load_records(args.journal or REQUEST_JOURNAL_PATH, args.limit, args.include_errors)
+    if not recs:
+        sys.exit("Oynatılacak kayıt yok.")
+
+    if args.fake:
+        server = start_server(latency_ms=args.latency_ms)
+        work = Path(tempfile.mkdtemp(prefix="replay-"))
+        os.environ.update({
+            "OPENAI_BASE_URL": server.base_url,
+            "OPENAI_API_KEY": "sk-fake",
+            "EMBED_CACHE_PATH": str(work / "embeddings.sqlite3"),
+            "SEMANTIC_CACHE_PATH": str(work / "semantic.sqlite3"),
+            "FAST_PATH_STATS": str(work / "fast_path.sqlite3"),
+            "COMPLETION_CACHE_PATH": str(work / "completions.sqlite3"),
+        })
+        # Sahte embedding'ler gerçek koleksiyonlarla eşleşmez: intent/otel
+        # koleksiyonları bench_router_async'teki gibi geçici dizinde kurulur
+        os.chdir(work)
+        from resources import openai_client
+        build_workspace(openai_client(), json.loads(CORPUS.read_text(encoding="utf-8")),
+                        EMBEDDING_MODEL)
+
+    fn = load_target(args.target, stub_chains=args.fake)
+    if callable(warm := getattr(sys.modules[fn.__module__], "warmup", None)):
+        warm()                          # açılış maliyeti ilk oynatılan isteğe binmesin
+
+    res = replay(fn, recs, args.speed, args.concurrency, args.user_prefix)
+    res.update(speed=args.speed, concurrency=args.concurrency, target=args.target)
+    print_report(res, [r["latency_ms"] for r in recs if "latency_ms" in r])
+    if args.out:
+        Path(args.out).write_text(json.dumps(res, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\n💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 # chains/booking_dialog.py
 import re
-from typing import Tuple
-from session_manager import get_state, clear_state
+from typing import Optional, Tuple
+from session_manager import BookingState, update_state
 from chains.booking_url import build_url
 
 ASK = {
@@ -20,50 +20,53 @@ def handle_booking_intent(user_id: str, user_msg: str) -> Tuple[str, bool]:
     Dönen ikili:
     - bot_cevabı
     - completed = True → URL hazır, False → bilgi toplamaya devam
+
+    State tek bir `update_state` çağrısıyla okunup yazılır; Redis deposunda
+    bu, tur başına tek WATCH/MULTI round-trip'i demektir.
     """
-    st = get_state(user_id)
+    return update_state(user_id, lambda st: _advance(st, user_msg))
 
+def _advance(st: Optional[BookingState], user_msg: str):
+    """(yeni state | None=diyalog bitti, (bot_cevabı, completed))"""
     # 1) İlk kez gelindiyse merhaba de
-    if st.step == "date_in" and st.date_in is None:
-        st.step = "date_in"
-        return (ASK["date_in"], False)
+    if st is None:
+        return BookingState(step="date_in"), (ASK["date_in"], False)
 
     # 2) Gelen mesaja göre state güncelle
     if st.step == "date_in":
         if _valid_date(user_msg):
             st.date_in = user_msg
             st.step = "date_out"
-            return (ASK["date_out"], False)
+            return st, (ASK["date_out"], False)
         else:
-            return ("Tarih biçimi yanlış, lütfen YYYY-MM-DD şeklinde girin.", False)
+            return st, ("Tarih biçimi yanlış, lütfen YYYY-MM-DD şeklinde girin.", False)
 
     if st.step == "date_out":
         if _valid_date(user_msg):
             st.date_out = user_msg
             st.step = "rooms"
-            return (ASK["rooms"], False)
+            return st, (ASK["rooms"], False)
         else:
-            return ("Tarih biçimi yanlış, lütfen YYYY-MM-DD şeklinde girin.", False)
+            return st, ("Tarih biçimi yanlış, lütfen YYYY-MM-DD şeklinde girin.", False)
 
     if st.step == "rooms":
         if user_msg.isdigit() and 1 <= int(user_msg) <= 9:
             st.rooms = int(user_msg)
             st.step = "adults"
-            return (ASK["adults"], False)
+            return st, (ASK["adults"], False)
         else:
-            return ("Oda sayısı 1-9 arasında olmalı.", False)
+            return st, ("Oda sayısı 1-9 arasında olmalı.", False)
 
     if st.step == "adults":
         if user_msg.isdigit() and 1 <= int(user_msg) <= 9:
             st.adults = int(user_msg)
             st.step = "child"
-            return (ASK["child"], False)
+            return st, (ASK["child"], False)
         else:
-            return ("Yetişkin sayısı 1-9 arasında olmalı.", False)
+            return st, ("Yetişkin sayısı 1-9 arasında olmalı.", False)
 
     if st.step == "child":
         ages = [int(a) for a in user_msg.split(",") if a.strip().isdigit()]
-        st.child_ages = ages
         # ↑ kullanıcı “0” yazarsa boş liste
         url = build_url(
             date_in  = st.date_in,
@@ -72,5 +75,7 @@ def handle_booking_intent(user_id: str, user_msg: str) -> Tuple[str, bool]:
             child_ages = ages,
             rooms    = st.rooms,
         )
-        clear_state(user_id)             # diyaloğu kapat
-        return (f"Rezervasyon bağlantınız hazır → {url}", True)
+        return None, (f"Rezervasyon bağlantınız hazır → {url}", True)   # diyaloğu kapat
+
+    # Bilinmeyen adım (eski sürüm state'i) → baştan başla
+    return BookingState(step="date_in"), (ASK["date_in"], False)
@@ -0,0 +1,146 @@
+# completion_cache.py  – düşük sıcaklıklı LLM çağrıları için birebir yanıt önbelleği
+"""
+Aynı (model, mesajlar, örnekleme parametreleri) ile yapılan ikinci
+`chat.completions.create` çağrısı OpenAI'a gitmez; ilk yanıtın metni bayt
+bayt aynı döner. Anlamsal önbellekten farklı olarak benzerlik eşiği yoktur:
+tek harf farklı prompt farklı anahtardır, doğruluk riski taşımaz.
+
+• Anahtar  : sha256(mesajlar + parametrelerin kanonik JSON'u); akış/zaman aşımı
+             gibi yanıtı değiştirmeyen parametreler hariç
+• Kapsam   : temperature ≤ COMPLETION_CACHE_MAX_TEMP ve n == 1 olan çağrılar;
+             daha yüksek sıcaklıkta çeşitlilik istendiği varsayılır, önbellek atlanır
+• Katmanlar: bellek LRU → SQLite (bkz. tiered_cache.py), boyut tabanlı tahliye
+
+Kullanım:
+    text = cached_completion(client, model=..., messages=..., temperature=0.2)
+    stream_answer(...)               # answer_stream akışları da bu önbelleği kullanır
+
+İstatistik / temizlik:
+    python completion_cache.py --stats
+    python completion_cache.py --clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from metrics import observe_span, record_usage, span
+from tiered_cache import TieredCache
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+COMPLETION_CACHE_PATH      = Path(os.getenv(
+    "COMPLETION_CACHE_PATH",
+    Path(__file__).resolve().parent / ".cache" / "completions.sqlite3"))
+COMPLETION_CACHE_MAX_ITEMS = int(os.getenv("COMPLETION_CACHE_MAX_ITEMS", 2_000))
+COMPLETION_CACHE_MAX_BYTES = int(os.getenv("COMPLETION_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+COMPLETION_CACHE_MAX_TEMP  = float(os.getenv("COMPLETION_CACHE_MAX_TEMP", 0.3))
+COMPLETION_CACHE_ENABLED   = os.getenv("COMPLETION_CACHE", "1") != "0"
+# ────────────────────────────────────────────────────────────────────────
+
+KEY_VERSION = 1
+# Yanıt içeriğini etkilemeyen (taşıma/izleme) parametreler anahtara girmez
+_TRANSPORT_PARAMS = {"stream", "stream_options", "timeout", "extra_headers",
+                     "extra_query", "user", "metadata", "store"}
+
+
+def completion_key(params: Dict[str, Any]) -> str:
+    body = {k: v for k, v in params.items() if k not in _TRANSPORT_PARAMS}
+    canon = json.dumps([KEY_VERSION, body], sort_keys=True, ensure_ascii=False,
+                       separators=(",", ":"), default=str)
+    return hashlib.sha256(canon.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Parametre sözlüğü → yanıt metni; uygun olmayan çağrılar `bypassed` sayılır."""
+
+    def __init__(self, store: TieredCache, max_temperature: float = COMPLETION_CACHE_MAX_TEMP):
+        self.store = store
+        self.max_temperature = max_temperature
+        self.bypassed = 0
+
+    def cacheable(self, params: Dict[str, Any]) -> bool:
+        # OpenAI'da temperature verilmezse 1.0'dır
+        ok = (params.get("temperature", 1.0) <= self.max_temperature
+              and params.get("n", 1) == 1)
+        if not ok:
+            self.bypassed += 1
+        return ok
+
+    def get(self, params: Dict[str, Any]) -> Optional[str]:
+        raw = self.store.get(completion_key(params))
+        return None if raw is None else raw.decode("utf-8")
+
+    def put(self, params: Dict[str, Any], text: str) -> None:
+        self.store.set(completion_key(params), text.encode("utf-8"))
+
+    def stats(self) -> Dict[str, float]:
+        return {**self.store.stats(), "bypassed": self.bypassed,
+                "max_temperature": self.max_temperature}
+
+
+# ── Süreç genelinde paylaşılan örnek ─────────────────────────────────────
+_default: Optional[CompletionCache] = None
+_default_lock = threading.Lock()
+
+
+def get_completion_cache() -> CompletionCache:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = CompletionCache(TieredCache(
+                    COMPLETION_CACHE_PATH,
+                    max_items=COMPLETION_CACHE_MAX_ITEMS,
+                    max_bytes=COMPLETION_CACHE_MAX_BYTES,
+                ))
+    return _default
+
+
+def lookup(params: Dict[str, Any], enabled: bool = True):
+    """(önbellek | None, kayıtlı metin | None); önbellek None ise çağrı önbelleksizdir."""
+    if not (enabled and COMPLETION_CACHE_ENABLED):
+        return None, None
+    cache = get_completion_cache()
+    if not cache.cacheable(params):
+        return None, None
+    return cache, cache.get(params)
+
+
+def cached_completion(ai, cache: bool = True, **params) -> str:
+    """Akışsız `chat.completions.create`; yanıt metnini döndürür."""
+    model, t0 = params.get("model"), time.perf_counter()
+    store, text = lookup(params, cache)
+    if text is not None:
+        observe_span("llm", (time.perf_counter() - t0) * 1000.0, "cached", model=model)
+        return text
+    with span("llm", model=model):
+        resp = ai.chat.completions.create(**params)
+    record_usage(model, resp.usage)
+    text = resp.choices[0].message.content or ""
+    if store is not None:
+        store.put(params, text)
+    return text
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="LLM yanıt önbelleği yönetimi")
+    ap.add_argument("--stats", action="store_true", help="Önbellek istatistiklerini yazdır")
+    ap.add_argument("--clear", action="store_true", help="Önbelleği tamamen boşalt")
+    args = ap.parse_args()
+
+    cache = get_completion_cache()
+    if args.clear:
+        cache.store.clear()
+        print(f"🧹 {COMPLETION_CACHE_PATH} temizlendi.")
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
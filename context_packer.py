@@ -0,0 +1,162 @@
+# context_packer.py  – token bütçeli, tekrarsız LLM bağlamı
+"""
+Retrieval sonuçlarını LLM'e göndermeden önce paketler:
+
+• Token sayımı    : hedef modelin tokenizer'ı (tiktoken, isteğe bağlı);
+                    yoksa/yüklenemezse karakter tabanlı, temkinli tahmin
+• Tekrar bastırma : aday, eklenmiş bir belgeye dolgu (DUP_FILLER: "oteli",
+                    "uzaklıktadır" …) dışında yeni kök getirmiyorsa ve kökler
+                    aynı sırayla geçiyorsa ya da kelime 3'lü shingle Jaccard
+                    benzerliği yüksekse atlanır; aynı bilginin data.json
+                    ("Genel Müdür: Onur Ataç") ve data1.json ("… Genel Müdürü
+                    Onur Ataç'tır") kopyaları tek kez gider. Yeni bir kök
+                    ("ücretli"), yer değiştirmiş sayılar ya da olumsuzluk
+                    ("ücretsiz", "değil") farkı olan aday tutulur
+• Bütçe           : belgeler alaka sırasıyla, yalnızca BÜTÜN olarak eklenir;
+                    sığmayan atlanır, sıradaki (daha kısa) denenir
+
+Numaralandırma paketlenmiş sıraya göre yapılır; atıf listesi
+`PackedContext.metas` üzerinden kurulmalıdır.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple
+
+from lexical_index import casefold_tr, tokenize_tr
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+CONTEXT_TOKENS   = 1200                 # varsayılan bağlam bütçesi
+DUP_JACCARD      = 0.8                  # bu shingle benzerliği ve üstü "aynı metin"
+DUP_MIN_TOKENS   = 4                    # kapsama kuralı: kapsanan belgenin en az kök sayısı
+DUP_FILLER       = frozenset({          # kapsayanın getirebileceği bilgi taşımayan kökler
+    "otel", "oteli", "otelin", "uzaklıktadır", "bulunmaktadır", "mevcuttur", "vardır",
+})
+SHINGLE_SIZE     = 3                    # kelime n-gram uzunluğu
+CHARS_PER_TOKEN  = 3.0                  # tokenizer yoksa (Türkçe için temkinli)
+BLOCK_SEPARATOR  = "\n\n"
+# ────────────────────────────────────────────────────────────────────────
+
+logger = logging.getLogger(__name__)
+_WORD = re.compile(r"\w+")
+# Kökte kaybolan olumsuzluk: "ücretli"/"ücretsiz" ikisi de "ücret" köküne iner
+_NEGATION = re.compile(r"\w{2,}(?:sız|siz|suz|süz)\w*|değil\w*|yok\w*")
+
+# (sıra no, belge, metadata) → bağlamdaki blok metni
+Render = Callable[[int, str, dict], str]
+
+
+# ───── Token sayımı ──────────────────────────────────────────────────────
+@lru_cache(maxsize=8)
+def _encoder(model: str):
+    try:
+        import tiktoken                 # isteğe bağlı: pip install tiktoken
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:                # bilinmeyen model adı (ör. fine-tune)
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:              # kurulu değil / encoding indirilemedi
+        logger.warning("tiktoken kullanılamıyor (%s); token sayısı tahmin edilecek",
+                       type(e).__name__)
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    enc = _encoder(model)
+    if enc is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(enc.encode(text))
+
+
+# ───── Tekrar tespiti ────────────────────────────────────────────────────
+def shingles(text: str, n: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    words = _WORD.findall(casefold_tr(text))
+    if len(words) < n:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + n]) for i in range(len(words) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _in_order(short: Sequence[str], long: Sequence[str]) -> bool:
+    """`short`, `long`'un (araya başka kökler girebilen) alt dizisi mi?"""
+    rest = iter(long)
+    return all(tok in rest for tok in short)
+
+
+@dataclass(frozen=True)
+class _Fingerprint:
+    shingles: FrozenSet[str]
+    seq: Tuple[str, ...]                # etkisiz kelimeler hariç kökler, metin sırasıyla
+    stems: FrozenSet[str]
+    negations: FrozenSet[str]           # "ücretsiz", "değil" … (kökte kaybolur)
+
+    @classmethod
+    def of(cls, text: str) -> "_Fingerprint":
+        seq = tuple(tokenize_tr(text))
+        return cls(shingles(text), seq, frozenset(seq),
+                   frozenset(_NEGATION.findall(casefold_tr(text))))
+
+    def duplicate_of(self, kept: "_Fingerprint", threshold: float) -> bool:
+        # Dolgu dışında yeni kök ("ücretli", "kapalı") ya da farklı olumsuzluk
+        # ("ücretsiz") getiren aday yeni bilgi taşır; benzerliği ne olursa olsun tutulur.
+        if self.negations != kept.negations or not self.stems - kept.stems <= DUP_FILLER:
+            return False
+        # Kısa "Anahtar: Değer" satırı ile cümle hâlinde Jaccard düşük kalır;
+        # kökler aynı sırayla geçiyorsa (sayılar yer değiştirmemişse) tekrardır.
+        shorter, longer = sorted((self.seq, kept.seq), key=len)
+        if len(shorter) >= DUP_MIN_TOKENS and _in_order(shorter, longer):
+            return True
+        return jaccard(self.shingles, kept.shingles) >= threshold
+
+
+# ───── Paketleme ─────────────────────────────────────────────────────────
+@dataclass
+class PackedContext:
+    text: str = ""
+    docs: List[str] = field(default_factory=list)
+    metas: List[dict] = field(default_factory=list)
+    tokens: int = 0
+    duplicates: int = 0                 # benzer belge nedeniyle atlanan
+    over_budget: int = 0                # bütçeye sığmadığı için atlanan
+
+
+def pack_context(docs: Sequence[str], metas: Sequence[Optional[dict]], render: Render,
+                 budget: int = CONTEXT_TOKENS, model: str = "gpt-4o-mini",
+                 dup_threshold: float = DUP_JACCARD,
+                 separator: str = BLOCK_SEPARATOR) -> PackedContext:
+    """
+    `docs` alaka sırasında (en alakalı ilk) olmalıdır. Bloklar `render` ile
+    numaralandırılarak üretilir; ayırıcılar dahil toplam `budget` aşılmaz.
+    """
+    out = PackedContext()
+    seen: List[_Fingerprint] = []
+    sep = count_tokens(separator, model)
+    blocks: List[str] = []
+    for doc, meta in zip(docs, metas):
+        meta = meta or {}
+        fp = _Fingerprint.of(doc)
+        if any(fp.duplicate_of(prev, dup_threshold) for prev in seen):
+            out.duplicates += 1
+            continue
+        block = render(len(blocks) + 1, doc, meta)
+        cost = count_tokens(block, model) + (sep if blocks else 0)
+        if out.tokens + cost > budget:
+            out.over_budget += 1
+            continue
+        seen.append(fp)
+        blocks.append(block)
+        out.docs.append(doc)
+        out.metas.append(meta)
+        out.tokens += cost
+    out.text = separator.join(blocks)
+    return out
@@ -1,10 +1,14 @@
 # fine_tune.py
 
 import os
+import sys
 import time
 from openai import OpenAI
 from config import load_api_key
 
+sys.path.append("..")
+from completion_cache import cached_completion
+
 
 def main() -> None:
     api_key = load_api_key()
@@ -61,7 +65,8 @@ def main() -> None:
     print(f"🎉 Fine-tune tamamlandı. Model adı: **{ft_model}**")
 
     # 4) Basit model kullanım örneği
-    resp = client.chat.completions.create(
+    answer = cached_completion(
+        client,
         model=ft_model,
         messages=[
             {"role": "system", "content": "Cullinan Belek konusunda bir asistansın."},
@@ -69,7 +74,7 @@ def main() -> None:
         ],
         temperature=0.2
     )
-    print("👁️ Demo yanıt:", resp.choices[0].message.content)
+    print("👁️ Demo yanıt:", answer)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+"""
+User-Intent • sınıflandırıcı değerlendirmesi (leave-one-out, API'siz)
+
+• `user_intents` koleksiyonundaki tüm vektörler tek `get` ile yüklenir
+• Her kayıt, kendisi hariç veri setine göre sınıflandırılır: mesafe matrisi
+  NumPy ile dilim dilim hesaplanır, en yakın max(k) komşu bir kez bulunur ve
+  tüm k / oylama modu kombinasyonları bu komşulardan puanlanır
+  (intent_classifier.vote – router ile aynı oylama)
+• Rapor: k × mod doğruluk tablosu, seçilen ayar için karışıklık matrisi,
+  intent başına doğruluk, yanlış/belirsiz örnekler ve farklı etiketli
+  neredeyse-aynı kayıtlar
+
+    python evaluate_intent.py                                  # ./chroma_db
+    python evaluate_intent.py --db ../db/intent_db -k 1,3,5,7,9 --json eval.json
+    python evaluate_intent.py --k-eval 7 --mode weighted --show 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+sys.path.append("..")                    # proje kökü
+from intent_classifier import MODES, IntentIndex, vote  # noqa: E402
+from resources import collection        # noqa: E402
+
+# ────────── Parametreler ──────────
+PERSIST_DIR     = Path("./chroma_db")
+COLLECTION_NAME = "user_intents"
+K_VALUES        = (1, 3, 5, 7, 9, 15)
+EVAL_K          = 5                      # router.predict_intent varsayılanı
+EVAL_MODE       = "majority"             # router.INTENT_MODE
+CHUNK_ROWS      = 1024                   # mesafe matrisi dilimi (satır)
+DUPLICATE_EPS   = 1e-4                   # bu mesafenin altı "neredeyse aynı" kayıt
+# ───────────────────────────────────
+
+
+def load(db: Path, name: str):
+    col = collection(db, name, create=False)
+    data = col.get(include=["embeddings", "metadatas", "documents"])
+    labels = [m["intent"] for m in data["metadatas"]]
+    space = (col.metadata or {}).get("hnsw:space", "l2")
+    index = IntentIndex(np.asarray(data["embeddings"], dtype=np.float32), labels, space=space)
+    return index, data["documents"] or [""] * len(labels)
+
+
+def evaluate(index: IntentIndex, ks: List[int], modes: List[str], chunk: int):
+    """(k, mod) → LOO tahminleri (intent id dizisi) ve komşular."""
+    neigh, dist = index.loo_neighbors(max(ks), chunk)
+    neigh_labels = index.label_ids[neigh]
+    preds: Dict[tuple, np.ndarray] = {}
+    for mode in modes:
+        if mode == "centroid":                  # k'dan bağımsız
+            preds[(0, mode)] = index.loo_centroid_scores(chunk).argmax(axis=1)
+            continue
+        for k in ks:
+            k = min(k, neigh.shape[1])
+            scores = vote(neigh_labels[:, :k], dist[:, :k], len(index.intents), mode)
+            preds[(k, mode)] = scores.argmax(axis=1)
+    return preds, neigh, dist
+
+
+def confusion(true: np.ndarray, pred: np.ndarray, n: int) -> np.ndarray:
+    m = np.zeros((n, n), dtype=np.int64)
+    np.add.at(m, (true, pred), 1)
+    return m
+
+
+def macro(m: np.ndarray) -> float:
+    support = m.sum(axis=1)
+    return float(np.mean(np.diag(m)[support > 0] / support[support > 0]))
+
+
+# ───── Rapor ─────────────────────────────────────────────────────────────
+def print_grid(index: IntentIndex, preds: Dict[tuple, np.ndarray], ks: List[int],
+               modes: List[str]) -> None:
+    true, n = index.label_ids, len(index.intents)
+    print(f"\n{'k':>4} " + "".join(f"{m:>20}" for m in modes))
+    for k in ks:
+        cells = []
+        for mode in modes:
+            p = preds[(0, mode)] if mode == "centroid" else preds[(min(k, len(index) - 1), mode)]
+            m = confusion(true, p, n)
+            cells.append(f"{np.trace(m) / len(true):>10.2%} ({macro(m):.2%})")
+        print(f"{k:>4} " + "".join(f"{c:>20}" for c in cells))
+    print("     doğruluk (intent ortalaması)")
+
+
+def print_confusion(index: IntentIndex, m: np.ndarray) -> None:
+    names = index.intents
+    width = max(len(x) for x in names)
+    print("\nKarışıklık matrisi (satır: gerçek, sütun: tahmin)")
+    print(" " * (width + 5) + "".join(f"{j:>5}" for j in range(len(names))))
+    for i, row in enumerate(m):
+        cells = "".join(f"{'·' if v == 0 else v:>5}" for v in row)
+        print(f"{i:>3}  {names[i]:<{width}}{cells}")
+
+
+def print_per_intent(index: IntentIndex, m: np.ndarray) -> None:
+    support = m.sum(axis=1)
+    acc = np.divide(np.diag(m), support, out=np.zeros(len(support)), where=support > 0)
+    print(f"\n{'intent':<28}{'örnek':>7}{'doğru':>9}  en çok karıştığı")
+    for i in np.argsort(acc, kind="stable"):
+        off = m[i].copy()
+        off[i] = 0
+        worst = (f"{index.intents[off.argmax()]} ({off.max()})" if off.max() else "-")
+        print(f"{index.intents[i]:<28}{support[i]:>7}{acc[i]:>9.1%}  {worst}")
+
+
+def ambiguous(index: IntentIndex, docs: List[str], pred: np.ndarray, neigh: np.ndarray,
+              k: int, limit: int) -> List[Dict[str, Any]]:
+    """Yanlış sınıflananlar + doğru olup komşularının yarısı başka intent olanlar."""
+    own = index.label_ids[:, None] == index.label_ids[neigh[:, :k]]
+    purity = own.mean(axis=1)
+    wrong = pred != index.label_ids
+    picks = np.flatnonzero(wrong | (purity <= 0.5))
+    picks = picks[np.lexsort((purity[picks], ~wrong[picks]))][:limit]
+    return [{
+        "text": docs[i],
+        "intent": index.labels[i],
+        "predicted": index.intents[pred[i]],
+        "purity": round(float(purity[i]), 3),
+        "neighbors": [index.labels[j] for j in neigh[i, :k]],
+    } for i in picks]
+
+
+def duplicates(index: IntentIndex, docs: List[str], neigh: np.ndarray,
+               dist: np.ndarray) -> List[Dict[str, Any]]:
+    """En yakın komşusu neredeyse aynı olup etiketi farklı kayıt çiftleri."""
+    out, seen = [], set()
+    for i in np.flatnonzero(dist[:, 0] <= DUPLICATE_EPS):
+        for j, d in zip(neigh[i], dist[i]):
+            if d > DUPLICATE_EPS:
+                break
+            pair = (min(i, j), max(i, j))
+            if index.labels[i] != index.labels[j] and pair not in seen:
+                seen.add(pair)
+                out.append({"a": docs[pair[0]], "a_intent": index.labels[pair[0]],
+                            "b": docs[pair[1]], "b_intent": index.labels[pair[1]]})
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Intent sınıflandırıcı leave-one-out değerlendirmesi")
+    ap.add_argument("--db", default=str(PERSIST_DIR), help="Chroma dizini")
+    ap.add_argument("--collection", default=COLLECTION_NAME)
+    ap.add_argument("-k", default=",".join(map(str, K_VALUES)), help="Virgülle k değerleri")
+    ap.add_argument("--modes", default=",".join(MODES), help="Virgülle oylama modları")
+    ap.add_argument("--k-eval", type=int, default=EVAL_K, help="Ayrıntılı rapor için k")
+    ap.add_argument("--mode", default=EVAL_MODE, choices=MODES, help="Ayrıntılı rapor için mod")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--show", type=int, default=20, help="Listelenecek belirsiz örnek sayısı")
+    ap.add_argument("--json", help="Tüm sonuçları JSON olarak yaz")
+    args = ap.parse_args()
+
+    ks = sorted({int(x) for x in args.k.split(",")} | {args.k_eval})
+    modes = [m.strip() for m in args.modes.split(",")]
+    if unknown := set(modes) - set(MODES):
+        sys.exit(f"❌ Bilinmeyen mod: {', '.join(sorted(unknown))}")
+    if args.mode not in modes:
+        modes.append(args.mode)
+
+    t0 = time.perf_counter()
+    index, docs = load(Path(args.db), args.collection)
+    if len(index) < 2:
+        sys.exit("❌ Değerlendirme için en az iki kayıt gerekir.")
+    t_load = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    preds, neigh, dist = evaluate(index, ks, modes, args.chunk)
+    t_eval = time.perf_counter() - t0
+    print(f"{len(index)} örnek, {len(index.intents)} intent, {index.vectors.shape[1]} boyut, "
+          f"{index.space} · yükleme {t_load:.2f} s, değerlendirme {t_eval:.2f} s "
+          f"({len(preds)} ayar)")
+
+    print_grid(index, preds, ks, modes)
+    accs = {key: float(np.mean(p == index.label_ids)) for key, p in preds.items()}
+    best = max(accs, key=accs.get)
+    print(f"\nEn iyi: mode={best[1]}" + (f", k={best[0]}" if best[1] != "centroid" else "")
+          + f" → {accs[best]:.2%}")
+
+    k_eval = min(args.k_eval, neigh.shape[1])
+    key = (0, args.mode) if args.mode == "centroid" else (k_eval, args.mode)
+    pred = preds[key]
+    m = confusion(index.label_ids, pred, len(index.intents))
+    print(f"\n── Ayrıntı: mode={args.mode}, k={k_eval} → {accs[key]:.2%} "
+          f"(intent ortalaması {macro(m):.2%}) ──")
+    print_confusion(index, m)
+    print_per_intent(index, m)
+
+    amb = ambiguous(index, docs, pred, neigh, k_eval, args.show)
+    print(f"\nYanlış / belirsiz örnekler (ilk {len(amb)}):")
+    for a in amb:
+        mark = "✗" if a["predicted"] != a["intent"] else "~"
+        print(f" {mark} [{a['intent']} → {a['predicted']}, saflık {a['purity']:.2f}] {a['text']}")
+
+    dups = duplicates(index, docs, neigh, dist)
+    if dups:
+        print(f"\n⚠️  Farklı etiketli neredeyse-aynı {len(dups)} kayıt çifti:")
+        for d in dups[:args.show]:
+            print(f"   {d['a_intent']} / {d['b_intent']}: {d['a']!r} ~ {d['b']!r}")
+
+    if args.json:
+        result = {
+            "collection": args.collection, "examples": len(index), "intents": index.intents,
+            "space": index.space,
+            "grid": [{"k": k or None, "mode": mode, "accuracy": round(acc, 4)}
+                     for (k, mode), acc in sorted(accs.items())],
+            "eval": {"k": k_eval, "mode": args.mode, "confusion": m.tolist()},
+            "ambiguous": amb, "conflicting_duplicates": dups,
+        }
+        Path(args.json).write_text(json.dumps(result, ensure_ascii=False, indent=2),
+                                   encoding="utf-8")
+        print(f"\n💾 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,16 @@ User-Intent • ChromaDB ingestion
 
 • intent_dataset.jsonl   ➜   ./chroma_db   ➜   collection: "user_intents"
 • Otel koleksiyonuna *dokunmaz* çünkü ayrı dizin kullanır.
+• --resume: yarıda kalan yüklemeye checkpoint'ten devam eder
+  (--save-vectors ile vektörler de saklanır).
+• --dims N: N boyutlu vektör (ör. 256); sınıflandırma için tam 3072 boyut
+  gerekmez. Boyut koleksiyon metadata'sına yazılır, router sorguyu aynı
+  boyuta indirir (bkz. embedding_dims.py, evaluate_intent.py ile kıyaslayın).
 """
 
 from __future__ import annotations
-import json, sys
+import argparse, sys
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List
 from chromadb.errors import NotFoundError
@@ -24,6 +30,12 @@ from tqdm import tqdm
 # ────────── Ortak API anahtarı ──────────
 sys.path.append("..")                    # proje kökü
 from config import load_api_key          # noqa: E402
+from dataset_io import iter_records      # noqa: E402
+from embedding_dims import METHODS, dims_metadata, embed_kwargs, reduce, resolve_dims  # noqa: E402
+from ingest_checkpoint import IngestCheckpoint  # noqa: E402
+from ingest_pipeline import (            # noqa: E402
+    DEFAULT_RPM, DEFAULT_TPM, EmbeddingPipeline, RateLimiter,
+)
 openai.api_key = load_api_key()
 
 # ────────── Parametreler ──────────
@@ -31,7 +43,8 @@ DATA_PATH       = Path("intent_dataset.jsonl")  # JSONL, build_intent_jsonl.py 
 PERSIST_DIR     = Path("./chroma_db")           # sadece bu klasörde
 COLLECTION_NAME = "user_intents"
 EMBEDDING_MODEL = "text-embedding-3-large"
-BATCH_SIZE      = 100
+MAX_INFLIGHT    = 4                             # aynı anda uçuştaki embedding isteği
+CHECKPOINT_PATH = Path(".cache") / f"ingest_{COLLECTION_NAME}.sqlite3"
 # ───────────────────────────────────
 
 client = OpenAI()
@@ -48,47 +61,77 @@ TRANSIENT_ERRORS = (
     stop=stop_after_attempt(6),
     retry=retry_if_exception_type(TRANSIENT_ERRORS),
 )
-def embed(texts: List[str]) -> List[List[float]]:
-    """OpenAI embedding – otomatik retry’lı."""
-    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
-    return [d.embedding for d in resp.data]
-
-def read_dataset(path: Path) -> List[Dict[str, Any]]:
-    with path.open("r", encoding="utf-8") as f:
-        return [json.loads(line) for line in f]
-
-def batched(lst: list, size: int):
-    for i in range(0, len(lst), size):
-        yield lst[i : i + size]
+def embed(texts: List[str], dims: int | None = None, method: str = "api") -> List[List[float]]:
+    """OpenAI embedding – otomatik retry’lı, `dims` boyutunda."""
+    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts,
+                                    **embed_kwargs(dims, method))
+    return reduce([d.embedding for d in resp.data], dims)
 
 def main() -> None:
+    ap = argparse.ArgumentParser(description="User-Intent • ChromaDB ingestion")
+    ap.add_argument("--resume", action="store_true",
+                    help="Yarıda kalan yüklemeye checkpoint'ten devam et")
+    ap.add_argument("--save-vectors", action="store_true",
+                    help="Checkpoint'e embedding vektörlerini de yaz")
+    ap.add_argument("--workers", type=int, default=MAX_INFLIGHT,
+                    help="Eşzamanlı embedding isteği sayısı")
+    ap.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="İstek/dk sınırı")
+    ap.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="Token/dk sınırı")
+    ap.add_argument("--dims", type=int,
+                    help="Vektör boyutu (ör. 256; vars: modelin tam boyutu, "
+                         "--resume'da koleksiyonunki)")
+    ap.add_argument("--dims-method", choices=METHODS, default="api",
+                    help="api: `dimensions` parametresi, truncate: tam vektörü kes + normalize et")
+    args = ap.parse_args()
+
     if not DATA_PATH.exists():
         sys.exit(f"❌ {DATA_PATH} yok – önce build_intent_jsonl.py çalıştırın.")
-    docs = read_dataset(DATA_PATH)
-    print(f"📑 {len(docs)} intent cümlesi yüklendi.")
+    docs = iter_records(DATA_PATH)           # akış halinde, tek tek kayıt
 
     chroma = chromadb.PersistentClient(path=str(PERSIST_DIR))
-
-    # Sadece "user_intents" koleksiyonunu temizle
-    try:
-        chroma.delete_collection(COLLECTION_NAME)
-        print(f"🧹 Eski '{COLLECTION_NAME}' koleksiyonu silindi.")
-    except (ValueError, KeyError, NotFoundError):
-        pass
-
-    collection = chroma.get_or_create_collection(COLLECTION_NAME)
-
-    for batch in tqdm(list(batched(docs, BATCH_SIZE)), desc="Embedding & Insert"):
-        ids       = [d["chunk_id"]           for d in batch]
-        texts     = [d["text_for_embedding"] for d in batch]
-        metadatas = [d["metadata"]           for d in batch]
-        embeddings = embed(texts)
-        collection.add(ids=ids,
-                       documents=texts,
-                       metadatas=metadatas,
-                       embeddings=embeddings)
-
-    print(f"✅ Tamamlandı – {collection.count()} intent vektörü kaydedildi.")
+    ckpt = IngestCheckpoint(CHECKPOINT_PATH, save_vectors=args.save_vectors)
+
+    def write(batch: List[Dict[str, Any]], embeddings: List[List[float]]) -> None:
+        collection.upsert(ids=[d["chunk_id"] for d in batch],
+                          documents=[d["text_for_embedding"] for d in batch],
+                          metadatas=[d["metadata"] for d in batch],
+                          embeddings=embeddings)
+        ckpt.commit(batch, embeddings)       # yazıldıktan sonra işaretle
+
+    if args.resume:
+        collection = chroma.get_or_create_collection(COLLECTION_NAME)
+        try:
+            dims = resolve_dims(collection, args.dims)
+        except ValueError as e:
+            sys.exit(f"❌ {e}")
+        print(f"⏩ Checkpoint'ten devam (son yazılan: {ckpt.last_chunk_id()})")
+        todo = ckpt.pending(docs, collection, restore_fn=write)
+    else:
+        # Sadece "user_intents" koleksiyonunu temizle
+        try:
+            chroma.delete_collection(COLLECTION_NAME)
+            print(f"🧹 Eski '{COLLECTION_NAME}' koleksiyonu silindi.")
+        except (ValueError, KeyError, NotFoundError):
+            pass
+        dims = args.dims
+        collection = chroma.get_or_create_collection(COLLECTION_NAME, metadata=dims_metadata(dims))
+        ckpt.reset()
+        todo = docs
+
+    with tqdm(desc="Embedding & Insert") as bar:
+        stats = EmbeddingPipeline(
+            embed_fn=partial(embed, dims=dims, method=args.dims_method),
+            write_fn=write,
+            max_inflight=args.workers,
+            limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+            on_batch=lambda b: bar.update(len(b)),
+        ).run(todo)
+    print(f"⏱️  {stats.batches} istek, {stats.tokens} token, {stats.elapsed_s:.1f} sn")
+    if args.resume:
+        print(f"⏩ {ckpt.skipped} kayıt atlandı, {ckpt.restored} vektör diskten geri yüklendi.")
+
+    print(f"✅ Tamamlandı – {collection.count()} intent vektörü kaydedildi "
+          f"({dims or 'tam'} boyut).")
 
 if __name__ == "__main__":
     try:
@@ -5,11 +5,15 @@ Cullinan Belek • RAG demo 2.0  (İzlenebilir Hibrit Arama)
 ──────────────────────────────────────────────────────────
 - Embedding  : OpenAI text-embedding-3-large
 - Retriever  : ChromaDB (./chroma_db, collection: cullinan_hotel_facts)
+               + BM25 (Türkçe tokenizer), Reciprocal Rank Fusion ile birleşik
+- Filtreler  : yerel metadata bitset indeksi; soru başına tek Chroma sorgusu
+- Bağlam     : token bütçeli, tekrarları ayıklanmış (context_packer)
 - LLM        : gpt-4o-mini
+- Ölçüm      : embed / chroma_query / build_context / llm span'ları (metrics.py)
 """
 
 from __future__ import annotations
-import argparse, logging, sys, re, json, textwrap
+import argparse, atexit, logging, sys, json, time
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -20,25 +24,29 @@ from rich import print, box
 from rich.table import Table
 
 sys.path.append("..")
-from config import load_api_key  # kendi util’iniz
+from embedding_cache import cached_embed, get_embedding_cache
+from embedding_dims import cache_model, collection_dims, embed_kwargs, reduce
+from answer_stream import stream_answer
+from context_packer import CONTEXT_TOKENS
+from semantic_cache import SemanticAnswerCache, collection_version
+# Retrieval + bağlam + prompt router ile ortak; adlar `rp.<ad>` olarak da kullanılıyor (bench_stages)
+from hotel_rag import (FUSION_FETCH, LLM_MODEL, MAX_TOKENS_OUT, SYSTEM_PROMPT,
+                       allowed_ids, build_context, build_sources, extract_filters,
+                       fetch_by_ids, rag_request, render_block, retrieve)
+from room_catalog import fast_path_stats, record_path
+from room_catalog import load_or_build as load_room_catalog
+from resources import collection, openai_client
+from metrics import count_retries, record_usage, render_prometheus, span
 
 # ╭─ Genel Ayarlar ───────────────────────────────────────────────────────╮
 PERSIST_DIR      = Path("./chroma_db")
 COLLECTION_NAME  = "cullinan_hotel_facts"
 EMBEDDING_MODEL  = "text-embedding-3-large"
-LLM_MODEL        = "gpt-4o-mini"
-MAX_TOKENS_OUT   = 500
+CONTEXT_BUDGET   = CONTEXT_TOKENS   # bağlama ayrılan token (--context-tokens)
 
 LOG_DIR          = Path("./logs")
 LOG_DIR.mkdir(exist_ok=True)
 LOG_FILE         = LOG_DIR / "pipeline.log"
-
-# Metadata alan isimlerini tek yerde tutalım
-FIELD_CAP_ADULT  = "maks_kapasite_yetiskin"
-FIELD_CAP_CHILD  = "maks_kapasite_cocuk"
-FIELD_SWIM_UP    = "swim_up"
-FIELD_VIEW       = "manzara"
-FIELD_BATHROOMS  = "banyo_sayisi"
 # ╰───────────────────────────────────────────────────────────────────────╯
 
 
@@ -54,101 +62,40 @@ logging.basicConfig(
 logger = logging.getLogger("RAGPipeline")
 
 
-# ───── Sistem Promptu ────────────────────────────────────────────────────
-SYSTEM_PROMPT = (
-    "Sen Cullinan Belek oteli hakkında bir uzmansın. Sana SAĞLANAN NUMARALANDIRILMIŞ KAYNAKLARI kullanarak kullanıcının sorusunu yanıtla. "
-    "Kaynaklarda hem doğal dil metinleri hem de yapısal veriler (kapasite, metrekare, yatak tipleri vb.) bulunabilir. "
-    "Özellikle sayısal veya kesin bilgi istenen sorularda metinden ziyade YAPISAL VERİLERİ temel al. "
-    "Cevabında ilgili kaynak numaralarını köşeli parantezle belirt (örn. [1]). "
-    "Eğer kaynaklarda cevap yoksa 'Bu konuda bilgim yok.' de."
-)
-
-
 # ───── Yardımcı Fonksiyonlar ─────────────────────────────────────────────
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-def embed_texts(ai: OpenAI, texts: List[str]) -> List[List[float]]:
-    resp = ai.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6),
+       before_sleep=count_retries("embed"))
+def _embed_remote(ai: OpenAI, texts: List[str], dims: int | None = None) -> List[List[float]]:
+    with span("embed_remote", n=len(texts)):
+        resp = ai.embeddings.create(model=EMBEDDING_MODEL, input=texts, **embed_kwargs(dims))
+    record_usage(EMBEDDING_MODEL, resp.usage, embedding=True)
     return [d.embedding for d in resp.data]
 
 
+def embed_texts(ai: OpenAI, texts: List[str], dims: int | None = None) -> List[List[float]]:
+    """`dims`: koleksiyonun boyutu (bkz. embedding_dims.collection_dims)."""
+    with span("embed", n=len(texts), dims=dims):
+        vecs = cached_embed(list(texts), cache_model(EMBEDDING_MODEL, dims),
+                            lambda miss: _embed_remote(ai, miss, dims))
+    return reduce(vecs, dims)
+
+
 class OpenAIEmbeddingFunction(chromadb.EmbeddingFunction):
-    def __init__(self, ai_client: OpenAI):
+    def __init__(self, ai_client: OpenAI, dims: int | None = None):
         self._ai = ai_client
+        self.dims = dims
 
     def __call__(self, input: chromadb.Documents) -> chromadb.Embeddings:
-        return embed_texts(self._ai, input)
-
-
-# ───── Filtre Çıkarma ────────────────────────────────────────────────────
-def extract_filters(question: str) -> Dict[str, Any]:
-    """
-    Soru -> Chroma 'where' filtresi.
-    Farklı senaryolar düşünülerek OR/AND yapıları eklenmiştir.
-    """
-    q = question.lower()
-    clauses: List[Dict[str, Any]] = []
-
-    # Yetişkin kapasitesi (>=)
-    if m := re.search(r'(\d+)\s*(kişilik|yetişkin)', q):
-        num = int(m.group(1))
-        clauses.append({
-            "$or": [
-                {FIELD_CAP_ADULT: {"$gte": num}},         # numerik ise
-                {FIELD_CAP_ADULT: str(num)}               # metin ise (eşit)
-            ]
-        })
-
-    # Swim-up
-    if "swim-up" in q or "swim up" in q:
-        clauses.append({FIELD_SWIM_UP: True})
-
-    # Manzara
-    if "deniz manzaralı" in q:
-        clauses.append({FIELD_VIEW: {"$in": ["Deniz", "Bahçe + Deniz"]}})
-    if "golf manzaralı" in q:
-        clauses.append({FIELD_VIEW: "Golf"})
-
-    # Banyo sayısı (>=)
-    if m := re.search(r'(en az|min(?:imum)?)\s*(\d+)\s*banyo', q):
-        num = int(m.group(2))
-        clauses.append({FIELD_BATHROOMS: {"$gte": num}})
-
-    if not clauses:
-        return {}
-    return {"$and": clauses} if len(clauses) > 1 else clauses[0]
-
-
-# ───── Bağlam Birleştirme ────────────────────────────────────────────────
-def build_context(docs: List[str], metas: List[dict]) -> str:
-    parts = []
-    for idx, (doc, meta) in enumerate(zip(docs, metas), 1):
-        oda = meta.get("oda_tipi", "Genel Bilgi")
-        cap_a = meta.get(FIELD_CAP_ADULT)
-        cap_c = meta.get(FIELD_CAP_CHILD, 0)
-        cap_txt = f"{cap_a} yetişkin" if cap_a is not None else "Kapasite belirsiz"
-        if cap_c:
-            cap_txt += f" + {cap_c} çocuk"
-
-        yatak_txt = ""
-        if (raw := meta.get("yatak_opsiyonlari_json")):
-            try:
-                j = json.loads(raw)
-                yatak_txt = " / ".join(
-                    f"{opt['opsiyon_adi']}: " +
-                    ", ".join(f"{y['adet']}×{y['boyut']}" for y in opt["yataklar"])
-                    for opt in j
-                )
-            except Exception:
-                yatak_txt = "Yatak detayı okunamadı"
-
-        ctx = (
-            f"[{idx}] Oda Tipi: {oda} | Kapasite: {cap_txt}\n"
-            f"    Metin: {doc}\n"
-            f"    Yataklar: {yatak_txt}\n"
-            f"    (Kaynak: {meta.get('source_document', '?')})"
-        )
-        parts.append(ctx)
-    return "\n\n".join(parts)
+        return embed_texts(self._ai, input, self.dims)
+
+
+def print_sources(q_text: str, sources: List[Dict[str, Any]]) -> None:
+    print(f"\n[bold yellow]❓ Soru:[/bold yellow] {q_text}\n")
+    print("[bold cyan]🔍 Kaynaklar:[/bold cyan]")
+    for src in sources:
+        print(f"  [{src['n']}] {src['oda_tipi']}  "
+              f"(Kaynak: {src['source_document']})")
+    print("\n[bold green]💬 Yanıt:[/bold green]\n")
 
 
 # ───── Ana Çalışma ───────────────────────────────────────────────────────
@@ -161,23 +108,34 @@ def main() -> None:
     ap.add_argument("-T", "--temperature", type=float, default=0.1, help="LLM sıcaklığı")
     ap.add_argument("--inspect", action="store_true",
                     help="Koleksiyondan örnek meta alanlarını yazdır ve çık")
+    ap.add_argument("--no-cache", action="store_true",
+                    help="Yanıt önbelleklerini (anlamsal + birebir) atla")
+    ap.add_argument("--no-fast-path", action="store_true",
+                    help="Oda kataloğu hızlı yolunu atla (her soru RAG'e gider)")
+    ap.add_argument("--context-tokens", type=int, default=CONTEXT_BUDGET,
+                    help=f"Bağlam token bütçesi (vars: {CONTEXT_BUDGET})")
+    ap.add_argument("--retrieval", choices=["hybrid", "vector", "lexical"], default="hybrid",
+                    help="hybrid: BM25 + vektör (RRF), BM25 kesinse yalnız BM25\n"
+                         "vector: yalnız Chroma\nlexical: yalnız BM25 (embedding yok)")
+    ap.add_argument("--metrics", action="store_true",
+                    help="Çıkışta Prometheus metin biçiminde metrikleri yazdır")
     args = ap.parse_args()
+    if args.metrics:
+        atexit.register(lambda: sys.stdout.write(render_prometheus()))
 
     q_text = " ".join(args.question).strip()
 
     # ── OpenAI bağlantısı
     try:
-        ai = OpenAI(api_key=load_api_key())
+        ai = openai_client()
     except Exception as e:
         logger.error("API anahtarı yüklenemedi: %s", e)
         sys.exit(1)
 
-    # ── Chroma bağlantısı
-    chroma = chromadb.PersistentClient(path=str(PERSIST_DIR))
-    col = chroma.get_collection(
-        name=COLLECTION_NAME,
-        embedding_function=OpenAIEmbeddingFunction(ai)
-    )
+    # ── Chroma bağlantısı (süreç içinde paylaşılan istemci, bkz. resources.py)
+    embed_fn = OpenAIEmbeddingFunction(ai)
+    col = collection(PERSIST_DIR, COLLECTION_NAME, create=False, embedding_function=embed_fn)
+    embed_fn.dims = dims = collection_dims(col)      # ingest boyutu (--dims) sorguda da kullanılır
 
     if args.inspect:
         sample = col.get(limit=3, include=["metadatas"])
@@ -187,47 +145,54 @@ def main() -> None:
         print(table)
         sys.exit(0)
 
-    # ── Filtre çıkar + logla
-    where = extract_filters(q_text)
-    logger.info("Filtre: %s", where or "Yok")
-
-    # ── Sorgu 1: filtreli
-    res = col.query(query_texts=[q_text], n_results=args.top_k,
-                    where=where, include=["documents", "metadatas"])
-
-    # Geri dönüş yoksa filtresiz dene
-    if not res["documents"][0]:
-        logger.warning("Filtreli sorguda sonuç yok, filtresiz deniyorum…")
-        res = col.query(query_texts=[q_text], n_results=args.top_k,
-                        include=["documents", "metadatas"])
-        if not res["documents"][0]:
-            print("[bold red]Hiç sonuç bulunamadı.[/bold red]")
-            sys.exit(0)
-
-    docs, metas = res["documents"][0], res["metadatas"][0]
-    context = build_context(docs, metas)
+    # ── Yapısal hızlı yol: kapasite/manzara/banyo soruları katalogdan, LLM'siz
+    if not args.no_fast_path:
+        catalog = load_room_catalog(col, PERSIST_DIR, collection_version(col))
+        t0 = time.perf_counter()
+        fast = catalog.answer(q_text)
+        record_path("fast" if fast else "rag")
+        if fast:
+            answer, sources = fast
+            logger.info("Hızlı yol (oda kataloğu): %.3f ms", (time.perf_counter() - t0) * 1000)
+            print_sources(q_text, sources)
+            print(answer)
+            logger.info("Hızlı yol payı: %s", fast_path_stats())
+            return
+
+    # ── Filtre + BM25/vektör + anlamsal önbellek + bağlam (router ile ortak)
+    sem_cache = None if args.no_cache else SemanticAnswerCache()
+    req = rag_request(col, PERSIST_DIR, q_text, lambda texts: embed_texts(ai, texts, dims),
+                      top_k=args.top_k, budget=args.context_tokens,
+                      retrieval=args.retrieval, sem_cache=sem_cache)
+    if req.hit:
+        print_sources(q_text, req.hit.sources)
+        print(req.hit.answer)
+        logger.info("Anlamsal önbellek: %s", sem_cache.stats())
+        return
+    if not req.messages:
+        print("[bold red]Hiç sonuç bulunamadı.[/bold red]")
+        sys.exit(0)
 
     # ── LLM çağrısı
-    msgs = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user",
-         "content": f"Soru: {q_text}\n\n--- KAYNAKLAR ---\n{context}\n\nCevabın:"}
-    ]
-    reply = ai.chat.completions.create(
+    stream = stream_answer(
+        ai, req.messages, req.sources,
         model=LLM_MODEL,
-        messages=msgs,
         temperature=args.temperature,
-        max_tokens=MAX_TOKENS_OUT
-    ).choices[0].message.content
+        max_tokens=MAX_TOKENS_OUT,
+        cache=not args.no_cache
+    )
 
-    # ── Çıktılar
-    print(f"\n[bold yellow]❓ Soru:[/bold yellow] {q_text}\n")
-    print("[bold cyan]🔍 Kaynaklar:[/bold cyan]")
-    for i, m in enumerate(metas, 1):
-        print(f"  [{i}] {m.get('oda_tipi', 'Bilinmeyen')}  "
-              f"(Kaynak: {m.get('source_document', '?')})")
-    print("\n[bold green]💬 Yanıt:[/bold green]\n")
-    print(textwrap.fill(reply, width=100))
+    # ── Çıktılar (kaynaklar ilk token'dan önce)
+    print_sources(q_text, stream.sources)
+    for token in stream:
+        sys.stdout.write(token)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+    logger.info("LLM: ilk token %.0f ms, toplam %.0f ms",
+                stream.ttft_ms or 0.0, stream.total_ms)
+    if req.remember(stream):
+        logger.info("Anlamsal önbellek: %s", sem_cache.stats())
+    logger.info("Embedding önbelleği: %s", get_embedding_cache().stats())
 
 
 # ──────────────────────────────────────────────────────────────────────────
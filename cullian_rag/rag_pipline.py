@@ -7,11 +7,16 @@ Kullanım:
 $ python rag_pipeline.py "Plaj uzunluğu nedir?"
 """
 
-import sys, textwrap, chromadb, openai
+import sys, textwrap, openai
 from typing import List
 sys.path.append('..')
 from config import load_api_key
 from utils import resolve_finetuned_model
+from context_packer import pack_context
+from completion_cache import cached_completion
+from model_registry import warmup
+from resources import collection
+from embedding_dims import collection_dims, reduce
 
 # -- Parametreler --------------------------------------------------------
 FT_JOB_ID           = "ftjob-4PgvjKjT6FqQywNiX9qKsN8H"
@@ -19,7 +24,7 @@ PERSIST_DIR         = "./chroma_db"
 COLLECTION_NAME     = "cullinan_hotel_facts"
 LLM_MODEL           = "gpt-4o-mini"          # çıktıyı üretecek sohbet modeli
 K_RETRIEVE          = 4
-MAX_CONTEXT_CHARS   = 1500                   # LLM’e taşınacak toplam metin limiti
+MAX_CONTEXT_TOKENS  = 500                    # LLM’e taşınacak bağlam (token, bütün belgeler)
 SYSTEM_PROMPT       = """\
 Sen lüks otel uzmanı bir yardımcı asistansın.
 Yanıtlarda sadece güvenilir kaynaklardan gelen bilgiler kullanılmalı.
@@ -32,14 +37,14 @@ def embed_texts(texts: List[str], model_name: str) -> List[List[float]]:
     resp = openai.embeddings.create(model=model_name, input=texts)
     return [d.embedding for d in resp.data]
 
+def render_block(idx: int, doc: str, meta: dict) -> str:
+    return f"[{idx}] {doc}  (Kaynak: {meta.get('source', '?')})"
+
 def build_context(docs: List[str], metas: List[dict]) -> str:
     """Seçilen dokümanları numaralandırıp tek gövde yap."""
-    parts = []
-    for idx, (doc, meta) in enumerate(zip(docs, metas), 1):
-        parts.append(f"[{idx}] {doc}  (Kaynak: {meta['source']})")
-    ctx = "\n".join(parts)
-    # Aşırı uzun olduysa ilk MAX_CONTEXT_CHARS karakteri bırak
-    return ctx[:MAX_CONTEXT_CHARS]
+    # Belgeler yarıda kesilmez: bütçeye sığmayan ve tekrar eden belge atlanır
+    return pack_context(docs, metas, render_block, budget=MAX_CONTEXT_TOKENS,
+                        model=LLM_MODEL, separator="\n").text
 
 # -- Ana akış ------------------------------------------------------------
 def main():
@@ -50,15 +55,18 @@ def main():
     # 1) OpenAI kimlik
     openai.api_key = load_api_key()
 
-    # 2) Embedding modelini çöz
+    # 2) Embedding modelini çöz (yerel kayıttan) ve modelleri arka planda ısıt;
+    #    ısıtma Chroma açılışıyla örtüşür
     embed_model = resolve_finetuned_model(FT_JOB_ID)
+    warmup(openai, [embed_model], [LLM_MODEL], background=True)
 
-    # 3) Vektör DB -> benzer dokümanlar
-    client = chromadb.PersistentClient(path=PERSIST_DIR)
-    col    = client.get_collection(
-        collection_name=COLLECTION_NAME,
-        embedding_function=lambda txts: embed_texts(txts, embed_model)
+    # 3) Vektör DB -> benzer dokümanlar; sorgu vektörü koleksiyonun boyutuna
+    #    indirilir (`dims` lambda çağrıldığında okunur)
+    col = collection(
+        PERSIST_DIR, COLLECTION_NAME, create=False,
+        embedding_function=lambda txts: reduce(embed_texts(txts, embed_model), dims)
     )
+    dims = collection_dims(col)
 
     # embed_texts bir defa çağrılacak
     results = col.query(
@@ -77,13 +85,13 @@ def main():
         {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user",   "content": f"Soru: {question}\n\n---\n{context_block}\n\nCevabın:"}
     ]
-    completion = openai.chat.completions.create(
+    answer = cached_completion(
+        openai,
         model=LLM_MODEL,
         messages=msgs,
         temperature=0.2,
         max_tokens=400
     )
-    answer = completion.choices[0].message.content
     print("\n🔹 Yanıt:\n")
     print(textwrap.fill(answer, width=100))
 
@@ -1,9 +1,5 @@
-import openai
-from config import load_api_key
+from model_registry import get_registry
 
-def resolve_finetuned_model(ft_job_id: str) -> str:
-    openai.api_key = load_api_key()
-    job = openai.fine_tuning.jobs.retrieve(ft_job_id)
-    if job.status != "succeeded":
-        raise RuntimeError(f"Fine-tune hâlâ {job.status}")
-    return job.fine_tuned_model
+def resolve_finetuned_model(ft_job_id: str, refresh: bool = False) -> str:
+    # Eşleme yerelde saklanır (bkz. model_registry); API'ye her sorguda gidilmez
+    return get_registry().resolve(ft_job_id, refresh)
@@ -3,14 +3,26 @@
 Cullinan Belek • ChromaDB ingestion
 
 • data.json  ➜  ./chroma_db  ➜  collection: "cullinan_hotel_facts"
-• Eski koleksiyonu siler, tamamını yeniden oluşturur.
+• Varsayılan: eski koleksiyonu siler, tamamını yeniden oluşturur.
+• --incremental: yalnızca yeni/değişen kayıtları embed + upsert eder,
+  veri setinden çıkan kayıtları siler (koleksiyon hiç boşalmaz).
+• --dry-run: artımlı planı (eklenecek/güncellenecek/silinecek) yazdırır.
+• Her çalıştırma sonunda BM25 indeksi, oda kataloğu ve metadata indeksi
+  (chroma_db/<koleksiyon>.bm25.json, .rooms.json, .meta.json) yenilenir.
+• --resume: yarıda kalan tam yüklemeye checkpoint'ten devam eder; yazılmış
+  batch'ler yeniden embed edilmez (--save-vectors ile vektörler de saklanır).
 • OpenAI 2024-03 embedding modellerinden `text-embedding-3-large` kullanır.
+• --dims N: N boyutlu vektör (API `dimensions` ya da --dims-method truncate
+  ile istemcide kesme); boyut koleksiyon metadata'sına yazılır, sorgu
+  tarafı (router, query.py, rag_pipeline.py) aynı boyutu kullanır; koleksiyon
+  boyutunu okumayan istemciler için çalıştırma başında uyarı basılır.
 """
 
 from __future__ import annotations
 
-import json
+import argparse
 import sys
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List
 
@@ -30,6 +42,17 @@ from tqdm import tqdm
 # ---------------------------------------------------------------------------
 sys.path.append("..")                # proje kökünü modül arama yoluna ekle
 from config import load_api_key      # noqa: E402  (import konumu bilinçli)
+from dataset_io import iter_records  # noqa: E402
+from embedding_dims import METHODS, dims_metadata, embed_kwargs, reduce, resolve_dims  # noqa: E402
+from ingest_checkpoint import HASH_FIELD, IngestCheckpoint, content_hash, plan_incremental  # noqa: E402
+from ingest_pipeline import (        # noqa: E402
+    DEFAULT_RPM, DEFAULT_TPM, EmbeddingPipeline, RateLimiter,
+)
+from lexical_index import BM25Index, index_path  # noqa: E402
+from metadata_index import MetadataIndex         # noqa: E402
+from metadata_index import index_path as meta_index_path  # noqa: E402
+from room_catalog import RoomCatalog, catalog_path  # noqa: E402
+from semantic_cache import collection_version    # noqa: E402
 
 openai.api_key = load_api_key()      # tek satırda kimlik doğrulama
 
@@ -40,7 +63,8 @@ DATA_PATH       = Path("data1_fixed.json")
 PERSIST_DIR     = Path("./chroma_db")
 COLLECTION_NAME = "cullinan_hotel_facts"
 EMBEDDING_MODEL = "text-embedding-3-large"   # gerekirse değiştirilebilir
-BATCH_SIZE      = 100                        # max 2048 token / istek
+MAX_INFLIGHT    = 4                          # aynı anda uçuştaki embedding isteği
+CHECKPOINT_PATH = Path(".cache") / f"ingest_{COLLECTION_NAME}.sqlite3"
 # ---------------------------------------------------------------------------
 
 # ── OpenAI istemcisi ────────────────────────────────────────────────────────
@@ -59,71 +83,156 @@ TRANSIENT_ERRORS = (
     stop=stop_after_attempt(6),
     retry=retry_if_exception_type(TRANSIENT_ERRORS),
 )
-def embed(texts: List[str]) -> List[List[float]]:
-    """Metin listesini embed eder, hata durumunda otomatik yeniden dener."""
+def embed(texts: List[str], dims: int | None = None, method: str = "api") -> List[List[float]]:
+    """Metin listesini embed eder (`dims` boyutunda), hata durumunda otomatik yeniden dener."""
     try:
-        resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+        resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts,
+                                        **embed_kwargs(dims, method))
     except openai.AuthenticationError as exc:
         raise RuntimeError(
             "🚫 OpenAI kimlik doğrulaması başarısız. "
             "Geçerli bir anahtar kullandığınızdan emin olun."
         ) from exc
-    return [d.embedding for d in resp.data]
+    return reduce([d.embedding for d in resp.data], dims)
+
+
+def with_hash(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {**doc["metadata"], HASH_FIELD: content_hash(doc)}
 
 
-def read_dataset(path: Path) -> List[Dict[str, Any]]:
-    """Hem JSON array hem de satır-başı JSONL formatını destekler."""
-    with path.open("r", encoding="utf-8") as f:
-        first = f.readline().strip()
-        f.seek(0)
-        if first.startswith("{") and first.endswith("}"):
-            return [json.loads(line) for line in f]  # JSONL
-        return json.load(f)  # JSON array
+def print_plan(new: list, changed: list, removed: list, unchanged: int) -> None:
+    print(f"➕ yeni       : {len(new)}")
+    print(f"✏️  değişen    : {len(changed)}")
+    print(f"🗑️  silinecek  : {len(removed)}")
+    print(f"⏭️  değişmeyen : {unchanged}")
+    for label, ids in (("+", [d["chunk_id"] for d in new]),
+                       ("~", [d["chunk_id"] for d in changed]),
+                       ("-", removed)):
+        for id_ in ids[:20]:
+            print(f"   {label} {id_}")
+        if len(ids) > 20:
+            print(f"   {label} … (+{len(ids) - 20})")
 
 
-def batched(lst: list, size: int):
-    """Listeyi sabit büyüklükte yığınlara (batch) böler."""
-    for i in range(0, len(lst), size):
-        yield lst[i : i + size]
+def bump_content_version(collection) -> None:
+    """Anlamsal yanıt önbelleğinin eski kayıtları geçersiz sayması için."""
+    meta = {k: v for k, v in (collection.metadata or {}).items()
+            if not k.startswith("hnsw:")}
+    meta["content_version"] = int(meta.get("content_version", 0)) + 1
+    collection.modify(metadata=meta)
+
+
+def existing_dims(collection, requested: int | None) -> int | None:
+    """Var olan koleksiyona yazarken boyut; uyuşmazlıkta tam ingest önerip çıkar."""
+    try:
+        return resolve_dims(collection, requested)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
 
 
 def main() -> None:
-    # 1) Veri ----------------------------------------------------------------
+    ap = argparse.ArgumentParser(description="Cullinan Belek • ChromaDB ingestion")
+    ap.add_argument("--incremental", action="store_true",
+                    help="Yalnızca yeni/değişen kayıtları embed et, çıkanları sil")
+    ap.add_argument("--dry-run", action="store_true",
+                    help="Artımlı planı yazdır, hiçbir şey değiştirme")
+    ap.add_argument("--resume", action="store_true",
+                    help="Yarıda kalan tam yüklemeye checkpoint'ten devam et")
+    ap.add_argument("--save-vectors", action="store_true",
+                    help="Checkpoint'e embedding vektörlerini de yaz")
+    ap.add_argument("--workers", type=int, default=MAX_INFLIGHT,
+                    help="Eşzamanlı embedding isteği sayısı")
+    ap.add_argument("--rpm", type=int, default=DEFAULT_RPM, help="İstek/dk sınırı")
+    ap.add_argument("--tpm", type=int, default=DEFAULT_TPM, help="Token/dk sınırı")
+    ap.add_argument("--dims", type=int,
+                    help="Vektör boyutu (ör. 256/512/1024; vars: modelin tam boyutu, "
+                         "artımlı/devam modunda koleksiyonunki)")
+    ap.add_argument("--dims-method", choices=METHODS, default="api",
+                    help="api: `dimensions` parametresi, truncate: tam vektörü kes + normalize et")
+    args = ap.parse_args()
+    if args.dims:
+        print(f"⚠️  --dims {args.dims}: '{COLLECTION_NAME}' yalnız koleksiyon boyutunu okuyan "
+              "istemcilerle sorgulanabilir\n"
+              "    (router hotel RAG, query.py, rag_pipeline.py → collection_dims). Sorguyu tam\n"
+              "    boyutta embed eden her okuyucu (ör. depoda bulunmayan chains/rag_hotel.answer_hotel)\n"
+              "    boyut uyuşmazlığıyla hata verir; bu koleksiyonu onlara açmadan önce güncelleyin.")
+
+    # 1) Veri (akış halinde; liste olarak belleğe alınmaz) -------------------
     if not DATA_PATH.exists():
         sys.exit(f"❌ {DATA_PATH} bulunamadı.")
-    docs = read_dataset(DATA_PATH)
-    print(f"📑 {len(docs)} kayıt yüklendi.")
+    docs = iter_records(DATA_PATH)
 
     # 2) ChromaDB ------------------------------------------------------------
     chroma = chromadb.PersistentClient(path=str(PERSIST_DIR))
+    ckpt = IngestCheckpoint(CHECKPOINT_PATH, save_vectors=args.save_vectors)
 
-    # Mevcut koleksiyonu sil → temiz başlangıç
-    try:
-        chroma.delete_collection(COLLECTION_NAME)
-        print(f"🧹 Eski '{COLLECTION_NAME}' koleksiyonu silindi.")
-    except (ValueError, KeyError):
-        pass  # zaten yoksa
-
-    collection = chroma.get_or_create_collection(COLLECTION_NAME)
-
-    # 3) Embedding + ekleme --------------------------------------------------
-    for batch in tqdm(list(batched(docs, BATCH_SIZE)),
-                      desc="Embedding & Insert"):
-        ids       = [d["chunk_id"]           for d in batch]
-        texts     = [d["text_for_embedding"] for d in batch]
-        metadatas = [d["metadata"]           for d in batch]
-
-        embeddings = embed(texts)
-
-        collection.add(
-            ids=ids,
-            documents=texts,
-            metadatas=metadatas,
+    def write(batch: List[Dict[str, Any]], embeddings: List[List[float]]) -> None:
+        collection.upsert(
+            ids=[d["chunk_id"] for d in batch],
+            documents=[d["text_for_embedding"] for d in batch],
+            metadatas=[with_hash(d) for d in batch],
             embeddings=embeddings,
         )
-
-    print(f"✅ Tamamlandı → {collection.count()} vektör kaydedildi.")
-
+        ckpt.commit(batch, embeddings)       # yazıldıktan sonra işaretle
+
+    if args.incremental or args.dry_run:
+        collection = chroma.get_or_create_collection(COLLECTION_NAME)
+        dims = existing_dims(collection, args.dims)
+        new, changed, removed, unchanged = plan_incremental(docs, collection)
+        print_plan(new, changed, removed, unchanged)
+        if args.dry_run:
+            return
+        todo = new + changed
+    elif args.resume:
+        # Koleksiyona dokunmadan checkpoint'te kalınan yerden devam et
+        collection = chroma.get_or_create_collection(COLLECTION_NAME)
+        dims = existing_dims(collection, args.dims)
+        print(f"⏩ Checkpoint'ten devam (son yazılan: {ckpt.last_chunk_id()})")
+        todo, removed, unchanged = ckpt.pending(docs, collection, restore_fn=write), [], 0
+    else:
+        # Mevcut koleksiyonu sil → temiz başlangıç
+        try:
+            chroma.delete_collection(COLLECTION_NAME)
+            print(f"🧹 Eski '{COLLECTION_NAME}' koleksiyonu silindi.")
+        except (ValueError, KeyError):
+            pass  # zaten yoksa
+
+        dims = args.dims
+        collection = chroma.get_or_create_collection(COLLECTION_NAME, metadata=dims_metadata(dims))
+        ckpt.reset()
+        todo, removed, unchanged = docs, [], 0
+
+    # 3) Embedding + ekleme (paralel embed, yazma ile örtüşür) ---------------
+    total = len(todo) if isinstance(todo, list) else None
+    with tqdm(total=total, desc="Embedding & Upsert") as bar:
+        stats = EmbeddingPipeline(
+            embed_fn=partial(embed, dims=dims, method=args.dims_method),
+            write_fn=write,
+            max_inflight=args.workers,
+            limiter=RateLimiter(rpm=args.rpm, tpm=args.tpm),
+            on_batch=lambda b: bar.update(len(b)),
+        ).run(todo)
+    print(f"⏱️  {stats.batches} istek, {stats.tokens} token, {stats.elapsed_s:.1f} sn "
+          f"(hız sınırı beklemesi {stats.throttled_s:.1f} sn)")
+    if stats.duplicates:
+        print(f"⚠️  {stats.duplicates} kayıt tekrar eden chunk_id taşıyor; her id için son kayıt yazıldı.")
+
+    if args.resume and not args.incremental:
+        unchanged = ckpt.skipped
+        print(f"⏩ {ckpt.skipped} kayıt atlandı, {ckpt.restored} vektör diskten geri yüklendi.")
+    if removed:
+        collection.delete(ids=removed)
+    if args.incremental and (stats.texts or removed):
+        bump_content_version(collection)
+
+    # 4) BM25 + oda kataloğu + metadata indeksi: son hâlden, sürüm etiketli ---
+    version = collection_version(collection)
+    BM25Index.from_collection(collection).save(index_path(PERSIST_DIR, COLLECTION_NAME), version)
+    RoomCatalog.from_collection(collection).save(catalog_path(PERSIST_DIR, COLLECTION_NAME), version)
+    MetadataIndex.from_collection(collection).save(meta_index_path(PERSIST_DIR, COLLECTION_NAME), version)
+
+    print(f"✅ Tamamlandı → {collection.count()} vektör kayıtlı, {dims or 'tam'} boyut "
+          f"({stats.texts} embed edildi, {unchanged} atlandı, {len(removed)} silindi).")
 
 if __name__ == "__main__":
     try:
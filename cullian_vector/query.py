@@ -10,12 +10,14 @@ from __future__ import annotations
 import argparse, sys
 from pathlib import Path
 
-import chromadb                   # pip install chromadb
 from openai import OpenAI         # pip install openai>=1.14
 from rich import print            # pip install rich
 
 sys.path.append("..")
-from config import load_api_key
+from embedding_cache import cached_embed, get_embedding_cache
+from embedding_dims import cache_model, collection_dims, embed_kwargs, reduce
+from answer_stream import stream_answer
+from resources import collection, openai_client
 
 # ─────────── Ayarlar ────────────────────────────────────────────────────
 PERSIST_DIR     = Path("./chroma_db")
@@ -25,12 +27,18 @@ ANSWER_MODEL    = "gpt-4o-mini"          # yoksa gpt-3.5-turbo seçin
 # ────────────────────────────────────────────────────────────────────────
 
 
-def embed_texts(client: OpenAI, texts: list[str]) -> list[list[float]]:
-    """Metinleri OpenAI embedding vektörlerine dönüştürür."""
-    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+def _embed_remote(client: OpenAI, texts: list[str], dims: int | None = None) -> list[list[float]]:
+    resp = client.embeddings.create(model=EMBEDDING_MODEL, input=texts, **embed_kwargs(dims))
     return [d.embedding for d in resp.data]
 
 
+def embed_texts(client: OpenAI, texts: list[str], dims: int | None = None) -> list[list[float]]:
+    """Metinleri OpenAI embedding vektörlerine dönüştürür (önbellekli, `dims` boyutunda)."""
+    vecs = cached_embed(texts, cache_model(EMBEDDING_MODEL, dims),
+                        lambda miss: _embed_remote(client, miss, dims))
+    return reduce(vecs, dims)
+
+
 def print_hit(rank: int, doc: str, meta: dict, dist: float):
     print(f"[bold cyan][{rank}][/bold cyan] {doc}")
     print(f"    • cosine: {dist:.3f}")
@@ -52,14 +60,16 @@ def main() -> None:
         parser.error("Sorgu cümlesi boş olamaz.")
 
     # 1) OpenAI istemcisi
-    client = OpenAI(api_key=load_api_key())
+    client = openai_client()
 
-    # 2) Sorgu embedding’i
-    query_vec = embed_texts(client, [query])[0]
+    # 2) Koleksiyon; sorgu vektörü ingest edildiği boyutta üretilir
+    col = collection(PERSIST_DIR, COLLECTION_NAME, create=False)
 
-    # 3) ChromaDB araması
-    chroma = chromadb.PersistentClient(path=str(PERSIST_DIR))
-    col     = chroma.get_collection(COLLECTION_NAME)
+    # 3) Sorgu embedding’i + ChromaDB araması
+    query_vec = embed_texts(client, [query], collection_dims(col))[0]
+    stats = get_embedding_cache().stats()
+    print(f"[dim]embedding önbelleği: {stats['hits_mem'] + stats['hits_disk']} isabet, "
+          f"{stats['misses']} ıskalama[/dim]")
 
     res = col.query(
         query_embeddings=[query_vec],
@@ -84,17 +94,27 @@ def main() -> None:
             "Kullanıcı sorusuna sadece bu bilgilerden yararlanarak Türkçe cevap ver. "
             "Kesin bilgi yoksa 'Bu konuda elimde bilgi yok.' de."
         )
-        completion = client.chat.completions.create(
-            model=ANSWER_MODEL,
-            messages=[
+        sources = [
+            {"n": i + 1, "source_document": m.get("source_document", "?")}
+            for i, m in enumerate(res["metadatas"][0])
+        ]
+        stream = stream_answer(
+            client,
+            [
                 {"role": "system", "content": system_msg},
                 {"role": "user",
                  "content": f"Bilgiler:\n{context}\n\nSoru: {query}"},
             ],
+            sources,
+            model=ANSWER_MODEL,
             temperature=0.2,
         )
-        answer = completion.choices[0].message.content.strip()
-        print(f"[bold green]\n💬 Yanıt:[/bold green] {answer}")
+        print("[bold green]\n💬 Yanıt:[/bold green] ", end="")
+        for token in stream:
+            sys.stdout.write(token)
+            sys.stdout.flush()
+        print(f"\n[dim]ilk token: {stream.ttft_ms or 0:.0f} ms · "
+              f"toplam: {stream.total_ms:.0f} ms[/dim]")
 
 
 if __name__ == "__main__":
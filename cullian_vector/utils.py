@@ -1,18 +1,10 @@
-import json, openai
-from config import load_api_key
+from model_registry import get_registry
 
 
-def resolve_finetuned_model(ft_job_id: str) -> str:
+def resolve_finetuned_model(ft_job_id: str, refresh: bool = False) -> str:
     """
     Fine-tune işi tamamlandıysa, nihai model adını döndürür.
-    openai>=1.0.0+ sürümleriyle uyumlu.
+    Eşleme model_registry'de yerel olarak saklanır; API yalnız ilk
+    çözümlemede (ya da refresh=True ile) sorgulanır.
     """
-    openai.api_key = load_api_key()
-
-    # Yeni API: fine_tuning.jobs.retrieve
-    job = openai.fine_tuning.jobs.retrieve(ft_job_id)
-
-    if job.status != "succeeded":
-        raise RuntimeError(f"Fine-tune işi henüz tamamlanmamış: {job.status}")
-
-    return job.fine_tuned_model
+    return get_registry().resolve(ft_job_id, refresh)
@@ -0,0 +1,252 @@
+# dataset_io.py  – ingest girdileri için akışlı okuyucu + JSON→JSONL dönüştürücü
+"""
+`data.json` / `data1.json` gibi JSON dizileri ve JSONL dosyaları aynı okuyucu
+ile, kayıt kayıt ve sabit bellekle okunur:
+
+• JSON dizisi  : `[ {...}, {...} ]`  → `raw_decode` ile nesne nesne
+• JSONL        : satır başına bir nesne
+• Bozuk dökümler: virgülsüz art arda nesneler de kabul edilir.
+
+`repair=True` iken JSON'da geçersiz kaçışlar (`doc\\_type` gibi) ters bölü
+atılarak düzeltilir; çözülemeyen nesneler raporlanıp sonraki nesneye atlanır.
+Tüm hatalar `dosya:satır:sütun` biçiminde bildirilir.
+
+Dönüştürme / doğrulama:
+    python dataset_io.py convert cullian_vector/data1.json cullian_vector/data1.jsonl
+    python dataset_io.py convert cullian_vector/data.json data.jsonl --repair --require id,text
+    python dataset_io.py check cullian_intent/intent_dataset.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+READ_CHUNK       = 64 * 1024            # dosyadan tek seferde okunan karakter
+MAX_RECORD_CHARS = 1024 * 1024          # tek kaydın üst sınırı (bozuk dosyada sınırsız okumayı önler)
+REQUIRED_KEYS    = ("chunk_id", "text_for_embedding", "metadata")
+# ────────────────────────────────────────────────────────────────────────
+
+_DECODER = json.JSONDecoder()
+_WS_SEP = re.compile(r"[\s,]*")
+_NEXT_OBJECT = re.compile(r"\n\s*\{")
+
+
+class DatasetError(ValueError):
+    """Satır/sütun bilgisini taşıyan veri seti hatası."""
+
+    def __init__(self, path: Path | str, line: int, col: int, msg: str):
+        super().__init__(f"{path}:{line}:{col}: {msg}")
+        self.path, self.line, self.col, self.msg = str(path), line, col, msg
+
+
+class _Cursor:
+    """Kayan tampon; tamponun başına kadar atılan satır sayısını tutar."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.line_base = 0
+        self.eof = False
+        self._mark = (0, 1)                         # (konum, satır) önbelleği
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos > READ_CHUNK:                   # tüketilen kısmı at
+            self.line_base += self.buf.count("\n", 0, self.pos)
+            self.buf, self.pos = self.buf[self.pos:], 0
+            self._mark = (0, 1)
+        self.buf += chunk
+        return True
+
+    def where(self, pos: int) -> Tuple[int, int]:
+        start, line = self._mark if pos >= self._mark[0] else (0, 1)
+        line += self.buf.count("\n", start, pos)
+        self._mark = (pos, line)
+        return self.line_base + line, pos - self.buf.rfind("\n", 0, pos)
+
+    def skip_separators(self) -> None:
+        while True:
+            self.pos = _WS_SEP.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.fill():
+                return
+
+
+def iter_records_with_lines(path: Path | str, repair: bool = False,
+                            on_error: Optional[Callable[[DatasetError], None]] = None,
+                            ) -> Iterator[Tuple[int, Any]]:
+    """
+    (başlangıç_satırı, kayıt) çiftleri üretir.
+
+    `repair=False` iken ilk hatada `DatasetError` fırlatılır. `repair=True`
+    iken geçersiz kaçışlar düzeltilir, çözülemeyen nesneler `on_error`'a
+    bildirilip atlanır.
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8-sig") as f:
+        cur = _Cursor(f)
+        cur.fill()
+        cur.skip_separators()
+        in_array = cur.buf.startswith("[", cur.pos)
+        if in_array:
+            cur.pos += 1
+
+        while True:
+            cur.skip_separators()
+            if cur.pos >= len(cur.buf):
+                if in_array:
+                    raise DatasetError(path, *cur.where(cur.pos), "dizi ']' ile kapanmıyor")
+                return
+            if in_array and cur.buf[cur.pos] == "]":
+                cur.pos += 1
+                cur.skip_separators()
+                if cur.pos < len(cur.buf):
+                    raise DatasetError(path, *cur.where(cur.pos), "']' sonrasında fazladan veri")
+                return
+
+            try:
+                obj, end = _DECODER.raw_decode(cur.buf, cur.pos)
+            except json.JSONDecodeError as exc:
+                # Kayıt tamponda yarım kalmış olabilir → daha fazla oku
+                if not cur.eof and len(cur.buf) - cur.pos < MAX_RECORD_CHARS and cur.fill():
+                    continue
+                err = DatasetError(path, *cur.where(exc.pos), exc.msg)
+                if not repair:
+                    raise err from None
+                if exc.msg.startswith("Invalid \\escape"):
+                    if on_error:
+                        on_error(DatasetError(path, err.line, err.col, "geçersiz kaçış düzeltildi"))
+                    cur.buf = cur.buf[:exc.pos] + cur.buf[exc.pos + 1:]
+                    continue
+                if on_error:
+                    on_error(err)
+                skip = max(exc.pos - cur.pos, 1)    # fill() tamponu kaydırabilir
+                nxt = _NEXT_OBJECT.search(cur.buf, cur.pos + skip)
+                while nxt is None and cur.fill():
+                    nxt = _NEXT_OBJECT.search(cur.buf, cur.pos + skip)
+                if nxt is None:
+                    return
+                cur.pos = nxt.end() - 1
+                continue
+
+            yield cur.where(cur.pos)[0], obj
+            cur.pos = end
+
+
+def iter_records(path: Path | str, repair: bool = False) -> Iterator[Any]:
+    """JSON dizisi veya JSONL dosyasındaki kayıtları tek tek üretir."""
+    for _, obj in iter_records_with_lines(path, repair=repair):
+        yield obj
+
+
+def validate(obj: Any, required: Sequence[str]) -> Optional[str]:
+    if not isinstance(obj, dict):
+        return f"nesne bekleniyordu, {type(obj).__name__} bulundu"
+    missing = [k for k in required if k not in obj]
+    if missing:
+        return "eksik alan: " + ", ".join(missing)
+    return None
+
+
+def convert(src: Path | str, dst: Optional[Path | str], repair: bool = False,
+            required: Sequence[str] = REQUIRED_KEYS,
+            id_key: Optional[str] = None) -> Tuple[int, List[DatasetError], List[DatasetError]]:
+    """
+    `src`'yi tek geçişte doğrulanmış JSONL'e (`dst`) yazar. `dst=None` ise
+    yalnızca doğrular. (yazılan kayıt sayısı, hatalar, atılan tekrarlar)
+    döndürür; `repair=False` iken ilk hatada durur ve `dst` oluşturulmaz.
+
+    `id_key` tekrarlanırsa ingest'teki gibi SONUNCU kayıt tutulur; öncekiler
+    hata sayılmaz, atılan tekrar olarak satırlarıyla raporlanır. Tekrar varsa
+    ara dosya bir kez daha (düz JSONL olarak) süzülür.
+    """
+    errors: List[DatasetError] = []
+    dropped: List[DatasetError] = []
+    last: Dict[Any, Tuple[int, int]] = {}           # id → (çıktı sırası, kaynak satırı)
+    id_key = id_key or (required[0] if required else None)
+    tmp = Path(f"{dst}.tmp") if dst else None
+    out = tmp.open("w", encoding="utf-8") if tmp else None
+    written = 0
+    try:
+        for line, obj in iter_records_with_lines(src, repair=repair, on_error=errors.append):
+            problem = validate(obj, required)
+            if problem:
+                err = DatasetError(src, line, 1, problem)
+                if not repair:
+                    raise err
+                errors.append(err)
+                continue
+            if id_key:
+                if (prev := last.get(obj[id_key])) is not None:
+                    dropped.append(DatasetError(src, prev[1], 1,
+                                                f"tekrarlanan {id_key} {obj[id_key]!r} atıldı; "
+                                                f"{line}. satırdaki sonraki kayıt tutuldu"))
+                last[obj[id_key]] = (written, line)
+            if out:
+                out.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            written += 1
+    except DatasetError as exc:
+        errors.append(exc)
+        if out:
+            out.close()
+            tmp.unlink()
+        return written - len(dropped), errors, dropped
+    if out:
+        out.close()
+        if dropped:
+            _keep_rows(tmp, {n for n, _ in last.values()})
+        os.replace(tmp, dst)
+    return written - len(dropped), errors, dropped
+
+
+def _keep_rows(path: Path, keep: set) -> None:
+    """JSONL `path`'te yalnız `keep` sıra numaralı satırları bırakır."""
+    filtered = Path(f"{path}.dedup")
+    with path.open("r", encoding="utf-8") as src, filtered.open("w", encoding="utf-8") as dst:
+        for n, row in enumerate(src):
+            if n in keep:
+                dst.write(row)
+    os.replace(filtered, path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Veri seti dönüştürme / doğrulama")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("convert", "check"):
+        p = sub.add_parser(name)
+        p.add_argument("src", type=Path)
+        if name == "convert":
+            p.add_argument("dst", type=Path)
+        p.add_argument("--repair", action="store_true",
+                       help="Geçersiz kaçışları düzelt, bozuk nesneleri atla")
+        p.add_argument("--require", default=",".join(REQUIRED_KEYS),
+                       help="Zorunlu alanlar (virgülle); ilki tekillik anahtarıdır")
+    args = ap.parse_args()
+
+    required = [k for k in args.require.split(",") if k]
+    written, errors, dropped = convert(args.src, getattr(args, "dst", None),
+                                       repair=args.repair, required=required)
+    for err in errors:
+        print(f"⚠️  {err}", file=sys.stderr)
+    for dup in dropped:
+        print(f"ℹ️  {dup}", file=sys.stderr)
+    target = f" → {args.dst}" if args.cmd == "convert" else ""
+    print(f"{'✅' if not errors or args.repair else '❌'} {written} kayıt{target}"
+          + (f" ({len(dropped)} tekrar atıldı, sonuncular tutuldu)" if dropped else ""))
+    sys.exit(1 if errors and not args.repair else 0)
+
+
+if __name__ == "__main__":
+    main()
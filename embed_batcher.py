@@ -0,0 +1,113 @@
+# embed_batcher.py  – eşzamanlı konuşmalar için mikro-batch embedding dağıtıcısı
+"""
+Aynı anda gelen tek elemanlı `embed([query])` çağrılarını kısa bir pencere
+(`window_ms`) ya da `max_batch` metin dolana kadar biriktirir, tek bir
+`embeddings.create` isteği gönderir ve vektörleri bekleyen çağıranlara dağıtır.
+
+• Thread'lerden : batcher.embed(texts)            (bloklar)
+• asyncio'dan   : await batcher.aembed(texts)     (event loop'u bloklamaz)
+
+`stats()` batch boyutu ve kuyrukta bekleme (ms) histogramlarını döndürür;
+pencereyi ayarlarken bunlara bakın.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+from metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+QUEUE_WAIT_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)     # ms
+
+Fetcher = Callable[[List[str]], List[List[float]]]
+
+
+@dataclass
+class _Pending:
+    texts: List[str]
+    future: Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+
+class EmbeddingBatcher:
+    def __init__(self, fetch: Fetcher, window_ms: float = 10.0,
+                 max_batch: int = 256, max_inflight: int = 4):
+        self._fetch = fetch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[_Pending]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max_inflight,
+                                        thread_name_prefix="embed-batch")
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS)
+
+    # ── Genel API ───────────────────────────────────────────────────────
+    def submit(self, texts: List[str]) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put(_Pending(list(texts), fut))
+        return fut
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "batch_size":    self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+    # ── Toplayıcı thread ────────────────────────────────────────────────
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._collect, daemon=True,
+                                                    name="embed-batcher")
+                    self._thread.start()
+
+    def _collect(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch, n = [first], len(first.texts)
+            deadline = first.enqueued + self.window
+            while n < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                n += len(item.texts)
+            self._pool.submit(self._flush, batch)
+
+    def _flush(self, batch: List[_Pending]) -> None:
+        now = time.perf_counter()
+        unique = list(dict.fromkeys(t for p in batch for t in p.texts))
+        for p in batch:
+            self.queue_wait_ms.observe((now - p.enqueued) * 1000.0)
+        self.batch_sizes.observe(len(unique))
+
+        try:
+            vecs = dict(zip(unique, self._fetch(unique)))
+        except BaseException as exc:            # hatayı bekleyen herkese ilet
+            for p in batch:
+                p.future.set_exception(exc)
+            return
+        for p in batch:
+            p.future.set_result([vecs[t] for t in p.texts])
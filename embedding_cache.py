@@ -0,0 +1,144 @@
+# embedding_cache.py  – router, RAG ve query CLI'larının ortak embedding önbelleği
+"""
+Aynı kısa sorular ("merhaba", "havuz saat kaçta?") günde binlerce kez gelir;
+her biri için OpenAI'a gitmek yerine vektörü önbellekten döndürürüz.
+
+• Anahtar  : sha256(model + Türkçe-normalize edilmiş metin)
+• Katmanlar: bellek LRU → SQLite (bkz. tiered_cache.py), boyut tabanlı tahliye
+• Değer    : float32 vektör (array('f') baytları)
+
+Kullanım:
+    from embedding_cache import cached_embed
+    vecs = cached_embed(texts, EMBED_MODEL, fetch=_embed_remote)
+
+İstatistik / temizlik:
+    python embedding_cache.py --stats
+    python embedding_cache.py --clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from tiered_cache import TieredCache
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+EMBED_CACHE_PATH      = Path(os.getenv(
+    "EMBED_CACHE_PATH",
+    Path(__file__).resolve().parent / ".cache" / "embeddings.sqlite3"))
+EMBED_CACHE_MAX_ITEMS = int(os.getenv("EMBED_CACHE_MAX_ITEMS", 20_000))
+EMBED_CACHE_MAX_BYTES = int(os.getenv("EMBED_CACHE_MAX_BYTES", 1024 * 1024 * 1024))
+# ────────────────────────────────────────────────────────────────────────
+
+Fetcher      = Callable[[List[str]], List[List[float]]]
+AsyncFetcher = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def normalize_tr(text: str) -> str:
+    """Türkçe büyük/küçük harf (İ/ı) ve boşluk farklarını yok sayar."""
+    text = text.replace("I", "ı").replace("İ", "i").lower()
+    return " ".join(text.split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_tr(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """(model, metin) → vektör önbelleği; eksikleri tek istekte tamamlar."""
+
+    def __init__(self, store: TieredCache):
+        self.store = store
+
+    def embed(self, texts: List[str], model: str, fetch: Fetcher) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts, model)
+        if missing:
+            self._store(found, missing, fetch(list(missing.values())))
+        return self._assemble(keys, found)
+
+    async def aembed(self, texts: List[str], model: str, afetch: AsyncFetcher) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts, model)
+        if missing:
+            self._store(found, missing, await afetch(list(missing.values())))
+        return self._assemble(keys, found)
+
+    def _lookup(self, texts: List[str], model: str):
+        keys = [cache_key(model, t) for t in texts]
+        found = self.store.get_many(keys)
+
+        # Eksik metinler (tekrarsız) tek seferde embed edilir
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in found and k not in missing:
+                missing[k] = t
+        return keys, found, missing
+
+    def _store(self, found: Dict[str, bytes], missing: Dict[str, str],
+               vecs: List[List[float]]) -> None:
+        fresh = {k: array("f", v).tobytes() for k, v in zip(missing, vecs)}
+        self.store.set_many(fresh.items())
+        found.update(fresh)
+
+    @staticmethod
+    def _assemble(keys: List[str], found: Dict[str, bytes]) -> List[List[float]]:
+        out = []
+        for k in keys:
+            buf = array("f")
+            buf.frombytes(found[k])
+            out.append(buf.tolist())
+        return out
+
+    def stats(self) -> Dict[str, float]:
+        return self.store.stats()
+
+
+# ── Süreç genelinde paylaşılan örnek ─────────────────────────────────────
+_default: Optional[EmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = EmbeddingCache(TieredCache(
+                    EMBED_CACHE_PATH,
+                    max_items=EMBED_CACHE_MAX_ITEMS,
+                    max_bytes=EMBED_CACHE_MAX_BYTES,
+                ))
+    return _default
+
+
+def cached_embed(texts: List[str], model: str, fetch: Fetcher) -> List[List[float]]:
+    """`fetch` yalnızca önbellekte olmayan metinler için çağrılır."""
+    return get_embedding_cache().embed(texts, model, fetch)
+
+
+async def acached_embed(texts: List[str], model: str, afetch: AsyncFetcher) -> List[List[float]]:
+    """`cached_embed`'in asyncio sürümü; önbellek araması senkron ve µs mertebesindedir."""
+    return await get_embedding_cache().aembed(texts, model, afetch)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Embedding önbelleği yönetimi")
+    ap.add_argument("--stats", action="store_true", help="Önbellek istatistiklerini yazdır")
+    ap.add_argument("--clear", action="store_true", help="Önbelleği tamamen boşalt")
+    args = ap.parse_args()
+
+    cache = get_embedding_cache()
+    if args.clear:
+        cache.store.clear()
+        print(f"🧹 {EMBED_CACHE_PATH} temizlendi.")
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# embedding_dims.py  – azaltılmış boyutlu embedding'ler (Matryoshka kesme)
+"""
+`text-embedding-3-*` vektörlerinin ilk N bileşeni kesilip yeniden
+L2-normalize edildiğinde hâlâ anlamlı bir N boyutlu embedding elde edilir
+(API'nin `dimensions` parametresi de sunucuda aynısını yapar). 256–1024
+boyut intent sınıflandırma ve otel araması için çoğu zaman yeterlidir;
+HNSW belleği, disk ve sorgu süresi boyutla orantılı küçülür.
+
+İki yöntem:
+• api      : `embeddings.create(..., dimensions=N)`; yanıt küçük, önbellek
+             anahtarı boyutu içerir (`cache_model`)
+• truncate : tam vektör alınır, istemcide kesilip normalize edilir; aynı
+             önbellek kaydı tüm boyutlara hizmet eder (router intent ve otel
+             koleksiyonu için tek embedding kullanır)
+
+Koleksiyonun boyutu ingest sırasında metadata'ya yazılır (`embedding_dims`);
+sorgu tarafı `collection_dims(col)` ile aynı boyutu kullanır:
+
+    vec = reduce(embed([q]), collection_dims(col))[0]
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+EMBED_DIMS_METHOD = os.getenv("EMBED_DIMS_METHOD", "truncate")   # sorgu tarafı: api | truncate
+METHODS           = ("api", "truncate")
+DIMS_META_KEY     = "embedding_dims"                            # koleksiyon metadata anahtarı
+# ────────────────────────────────────────────────────────────────────────
+
+
+def reduce(vecs: Sequence[Sequence[float]], dims: Optional[int]) -> List[List[float]]:
+    """İlk `dims` bileşen + L2 normalizasyon; dims None ya da vektör zaten kısaysa aynen döner."""
+    if not dims or not len(vecs) or len(vecs[0]) <= dims:
+        return list(vecs)
+    m = np.asarray(vecs, dtype=np.float32)[:, :dims]
+    m /= np.maximum(np.linalg.norm(m, axis=1, keepdims=True), 1e-12)
+    return m.tolist()
+
+
+def embed_kwargs(dims: Optional[int], method: str = EMBED_DIMS_METHOD) -> Dict[str, Any]:
+    """`embeddings.create`'e eklenecek parametreler (truncate: tam vektör istenir)."""
+    if method not in METHODS:
+        raise ValueError(f"Bilinmeyen boyut yöntemi: {method} (seçenekler: {', '.join(METHODS)})")
+    return {"dimensions": dims} if dims and method == "api" else {}
+
+
+def cache_model(model: str, dims: Optional[int], method: str = EMBED_DIMS_METHOD) -> str:
+    """Embedding önbelleğinde model adı yerine kullanılır; API'den kısa gelen vektör ayrı tutulur."""
+    return f"{model}@{dims}" if embed_kwargs(dims, method) else model
+
+
+# ───── Koleksiyon metadata'sı ────────────────────────────────────────────
+def collection_dims(col) -> Optional[int]:
+    """Koleksiyonun ingest edildiği boyut; kayıt yoksa None (modelin tam boyutu)."""
+    return int((col.metadata or {}).get(DIMS_META_KEY, 0)) or None
+
+
+def dims_metadata(dims: Optional[int]) -> Optional[Dict[str, int]]:
+    """Yeni koleksiyon için `metadata=` değeri."""
+    return {DIMS_META_KEY: dims} if dims else None
+
+
+def resolve_dims(col, requested: Optional[int]) -> Optional[int]:
+    """
+    Var olan koleksiyona eklerken kullanılacak boyut: istenmediyse kayıtlı
+    boyut; kayıtlıdan farklıysa ValueError (tam yeniden ingest gerekir).
+    """
+    stored = collection_dims(col)
+    if requested is None or requested == stored:
+        return stored
+    raise ValueError(f"'{col.name}' koleksiyonu {stored or 'tam'} boyutlu; "
+                     f"{requested} boyut için tam yeniden ingest gerekir.")
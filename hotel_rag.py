@@ -0,0 +1,279 @@
+# hotel_rag.py  – otel RAG'inin ortak retrieval + bağlam + prompt adımı
+"""
+`cullian_rag/rag_pipeline.py` CLI'ı ve `router` otel sorularını aynı yoldan
+LLM mesajlarına çevirir:
+
+• Filtre     : sorudan çıkarılan kısıtlar (`room_catalog.parse_constraints`)
+               yerel metadata bitset indeksinde; değerlendirilemiyorsa Chroma'dan
+• Retrieval  : BM25 kesinse yalnız BM25 (embedding yok), değilse tek Chroma
+               sorgusu + BM25, Reciprocal Rank Fusion ile
+• Önbellek   : (isteğe bağlı) anlamsal yanıt önbelleği, aynı filtre kapsamında
+• Bağlam     : token bütçeli, tekrarları ayıklanmış (context_packer)
+• Prompt     : SYSTEM_PROMPT + "Soru / KAYNAKLAR" şablonu, bağlamla aynı
+               numaralandırmada kaynak listesi
+
+    req = rag_request(col, persist_dir, soru, embed)
+    if req.hit: ...                         # önbellekten yanıt
+    stream = stream_answer(ai, req.messages, req.sources, ...)
+    req.remember(stream)                    # akış bittikten sonra
+
+Hızlı yol (oda kataloğu) ve LLM çağrısı çağıranda kalır.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from context_packer import CONTEXT_TOKENS, PackedContext, pack_context
+from lexical_index import is_decisive, rrf
+from lexical_index import load_or_build as load_bm25
+from metadata_index import MetadataIndex, UnsupportedFilter
+from metadata_index import load_or_build as load_metadata_index
+from metrics import span
+from room_catalog import parse_constraints
+from semantic_cache import SemanticAnswerCache, collection_version, scope_key
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+LLM_MODEL        = "gpt-4o-mini"        # bağlam token sayımı bu modele göre
+MAX_TOKENS_OUT   = 500
+TOP_K            = 4
+FUSION_FETCH     = 20                   # RRF öncesi her sıralamadan alınan aday
+FIELD_CAP_ADULT  = "maks_kapasite_yetiskin"
+FIELD_CAP_CHILD  = "maks_kapasite_cocuk"
+# ────────────────────────────────────────────────────────────────────────
+
+logger = logging.getLogger(__name__)
+
+# metinler → vektörler (koleksiyon boyutuna indirgenmiş)
+Embed = Callable[[List[str]], List[List[float]]]
+
+SYSTEM_PROMPT = (
+    "Sen Cullinan Belek oteli hakkında bir uzmansın. Sana SAĞLANAN NUMARALANDIRILMIŞ KAYNAKLARI kullanarak kullanıcının sorusunu yanıtla. "
+    "Kaynaklarda hem doğal dil metinleri hem de yapısal veriler (kapasite, metrekare, yatak tipleri vb.) bulunabilir. "
+    "Özellikle sayısal veya kesin bilgi istenen sorularda metinden ziyade YAPISAL VERİLERİ temel al. "
+    "Cevabında ilgili kaynak numaralarını köşeli parantezle belirt (örn. [1]). "
+    "Eğer kaynaklarda cevap yoksa 'Bu konuda bilgim yok.' de."
+)
+
+
+# ───── Filtre ────────────────────────────────────────────────────────────
+def extract_filters(question: str) -> Dict[str, Any]:
+    """
+    Soru -> Chroma 'where' filtresi. Kısıtlar oda kataloğu hızlı yoluyla
+    ortak (`room_catalog.parse_constraints`).
+    """
+    return parse_constraints(question).to_where()
+
+
+def allowed_ids(index: MetadataIndex, where: Dict[str, Any], col) -> set | None:
+    """
+    Filtreye uyan id kümesi; sorgudan önce yerelde hesaplanır. Filtre yerel
+    indeksle değerlendirilemiyorsa (ör. MAX_DISTINCT'i aşan `topic`) küme
+    tek bir `col.get(where=...)` ile Chroma'dan alınır; filtre düşürülmez.
+    None: filtre yok ya da hiçbir kayıt uymuyor (filtresiz aranır).
+    """
+    if not where:
+        return None
+    try:
+        ids = index.matching_ids(where)
+    except UnsupportedFilter as e:
+        logger.info("Filtre yerelde değerlendirilemedi (%s), Chroma'dan alınıyor", e)
+        with span("chroma_get", collection=col.name):
+            ids = set(col.get(where=where, include=[])["ids"])
+    if not ids:
+        logger.warning("Filtreye uyan kayıt yok, filtresiz aranıyor")
+        return None
+    logger.info("Filtreye uyan kayıt: %d / %d", len(ids), len(index.ids))
+    return ids
+
+
+# ───── Yerel indeksler ───────────────────────────────────────────────────
+_indexes: Dict[tuple, Any] = {}
+_indexes_lock = threading.Lock()
+
+
+def _index(loader, col, persist_dir: Path | str):
+    """Koleksiyon sürümü başına bir kez yüklenir; yeniden ingest yeni sürüm demek."""
+    key = (loader.__module__, str(persist_dir), col.name, collection_version(col))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = loader(col, persist_dir, key[-1])
+        return _indexes[key]
+
+
+def metadata_index(col, persist_dir: Path | str) -> MetadataIndex:
+    return _index(load_metadata_index, col, persist_dir)
+
+
+def bm25_index(col, persist_dir: Path | str):
+    return _index(load_bm25, col, persist_dir)
+
+
+# ───── Retrieval ─────────────────────────────────────────────────────────
+def fetch_by_ids(index: MetadataIndex, ids: List[str], known: Dict[str, tuple] | None = None):
+    """id sırasını koruyarak (docs, metas) döndürür; elde olmayanlar yerel indeksten gelir."""
+    known = dict(known or {})
+    if missing := [i for i in ids if i not in known]:
+        known.update(zip(missing, zip(*index.get(missing))))
+    pairs = [known[i] for i in ids if i in known]
+    return [d for d, _ in pairs], [m for _, m in pairs]
+
+
+def retrieve(col, meta_index: MetadataIndex, q_vec: List[float], allowed: set | None,
+             lex_hits: List[tuple], top_k: int) -> tuple[List[str], List[dict]]:
+    """
+    Tek Chroma sorgusu (filtresiz, seçicilik oranında fazla aday; filtre
+    yerelde) + varsa BM25 sonuçlarıyla RRF. Sonuç yoksa boş listeler döner.
+    """
+    want = FUSION_FETCH if lex_hits else top_k
+    n_fetch = want if allowed is None else meta_index.overfetch(len(allowed), want)
+    with span("chroma_query", collection=col.name, n_results=n_fetch):
+        res = col.query(query_embeddings=[q_vec], n_results=n_fetch,
+                        include=["documents", "metadatas"])
+    if not res["documents"][0]:
+        return [], []
+
+    vec_ids = res["ids"][0]
+    if allowed is not None:
+        kept = [i for i in vec_ids if i in allowed]
+        logger.info("Yerel filtre: %d adaydan %d kaldı", len(vec_ids), len(kept))
+        # Uyan aday yoksa filtreli BM25 sonuçları yeter; o da yoksa eski
+        # davranıştaki gibi filtresiz sonuçlar kullanılır
+        vec_ids = kept if kept or lex_hits else vec_ids
+    vec_ids = vec_ids[:want]
+    known = dict(zip(res["ids"][0], zip(res["documents"][0], res["metadatas"][0])))
+    if lex_hits:
+        fused = rrf([vec_ids, [i for i, _ in lex_hits]])[:top_k]
+        logger.info("RRF: %s", ", ".join(f"{i} ({sc:.3f})" for i, sc in fused))
+        return fetch_by_ids(meta_index, [i for i, _ in fused], known)
+    return fetch_by_ids(meta_index, vec_ids[:top_k], known)
+
+
+# ───── Bağlam + prompt ───────────────────────────────────────────────────
+def render_block(idx: int, doc: str, meta: dict) -> str:
+    oda = meta.get("oda_tipi", "Genel Bilgi")
+    cap_a = meta.get(FIELD_CAP_ADULT)
+    cap_c = meta.get(FIELD_CAP_CHILD, 0)
+    cap_txt = f"{cap_a} yetişkin" if cap_a is not None else "Kapasite belirsiz"
+    if cap_c:
+        cap_txt += f" + {cap_c} çocuk"
+
+    yatak_txt = ""
+    if (raw := meta.get("yatak_opsiyonlari_json")):
+        try:
+            j = json.loads(raw)
+            yatak_txt = " / ".join(
+                f"{opt['opsiyon_adi']}: " +
+                ", ".join(f"{y['adet']}×{y['boyut']}" for y in opt["yataklar"])
+                for opt in j
+            )
+        except Exception:
+            yatak_txt = "Yatak detayı okunamadı"
+
+    return (
+        f"[{idx}] Oda Tipi: {oda} | Kapasite: {cap_txt}\n"
+        f"    Metin: {doc}\n"
+        f"    Yataklar: {yatak_txt}\n"
+        f"    (Kaynak: {meta.get('source_document', '?')})"
+    )
+
+
+def build_context(docs: List[str], metas: List[dict]) -> str:
+    """Bütçesiz, tüm belgelerle bağlam (karşılaştırma için; istekler pack_context kullanır)."""
+    return "\n\n".join(render_block(i, d, m) for i, (d, m) in enumerate(zip(docs, metas), 1))
+
+
+def build_sources(metas: List[dict]) -> List[Dict[str, Any]]:
+    """Bağlamla aynı numaralandırmada kaynak listesi (atıflar için)."""
+    return [
+        {"n": idx,
+         "oda_tipi": meta.get("oda_tipi", "Bilinmeyen"),
+         "source_document": meta.get("source_document", "?")}
+        for idx, meta in enumerate(metas, 1)
+    ]
+
+
+def build_messages(question: str, context: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user",
+         "content": f"Soru: {question}\n\n--- KAYNAKLAR ---\n{context}\n\nCevabın:"},
+    ]
+
+
+# ───── İstek ─────────────────────────────────────────────────────────────
+@dataclass
+class RagRequest:
+    question: str
+    where: Dict[str, Any]
+    q_vec: Optional[List[float]] = None        # None: yalnız BM25 yolu (embedding yok)
+    hit: Any = None                            # anlamsal önbellek isabeti (semantic_cache.Hit)
+    messages: List[Dict[str, str]] = field(default_factory=list)   # boş: sonuç yok
+    sources: List[Dict[str, Any]] = field(default_factory=list)
+    packed: Optional[PackedContext] = None
+    cache: Optional[SemanticAnswerCache] = None
+    scope: Tuple[str, ...] = ()
+
+    def remember(self, stream) -> bool:
+        """Akış bittikten sonra yanıtı anlamsal önbelleğe yazar; yazıldıysa True."""
+        if self.cache is None or self.q_vec is None or self.hit is not None:
+            return False
+        self.cache.store(self.q_vec, self.question, stream.text, stream.sources,
+                         stream.total_ms, *self.scope)
+        return True
+
+
+def rag_request(col, persist_dir: Path | str, question: str, embed: Embed, *,
+                top_k: int = TOP_K, budget: int = CONTEXT_TOKENS,
+                retrieval: str = "hybrid", model: str = LLM_MODEL,
+                sem_cache: SemanticAnswerCache | None = None) -> RagRequest:
+    """
+    Soru → filtre → BM25 / vektör / RRF → (önbellek) → paketlenmiş bağlam → mesajlar.
+    retrieval: "hybrid" (BM25 kesinse yalnız BM25), "vector" ya da "lexical".
+    """
+    where = extract_filters(question)
+    logger.info("Filtre: %s", where or "Yok")
+    req = RagRequest(question, where)
+
+    # ── Filtre yerel bitset indeksinde: uyan kayıtlar sorgudan önce bilinir
+    meta_index = metadata_index(col, persist_dir)
+    allowed = allowed_ids(meta_index, where, col)
+
+    # ── Sözcüksel arama (BM25): filtre varsa yalnız uyan kayıtlar arasında
+    lex_hits = []
+    if retrieval != "vector":
+        bm25 = bm25_index(col, persist_dir)
+        with span("bm25"):
+            lex_hits = bm25.search(question, FUSION_FETCH, allowed)
+
+    if retrieval == "lexical" or (retrieval == "hybrid" and is_decisive(lex_hits)):
+        logger.info("Sözcüksel yol: %s (skor %.1f)", *(lex_hits[0] if lex_hits else ("-", 0.0)))
+        docs, metas = fetch_by_ids(meta_index, [i for i, _ in lex_hits[:top_k]])
+    else:
+        req.q_vec = embed([question])[0]
+        # ── Anlamsal önbellek: benzer soru aynı filtre kapsamında yanıtlandı mı?
+        if sem_cache is not None:
+            req.cache = sem_cache
+            req.scope = (col.name, collection_version(col), scope_key(where))
+            if (hit := sem_cache.lookup(req.q_vec, *req.scope)):
+                logger.info("Anlamsal önbellek isabeti (benzerlik %.3f, ~%.0f ms LLM tasarrufu): %s",
+                            hit.similarity, hit.llm_ms, hit.question)
+                req.hit, req.sources = hit, hit.sources
+                return req
+        docs, metas = retrieve(col, meta_index, req.q_vec, allowed, lex_hits, top_k)
+    if not docs:
+        return req
+
+    with span("build_context", docs=len(docs)) as sp:
+        req.packed = packed = pack_context(docs, metas, render_block, budget=budget, model=model)
+        sp.set(tokens=packed.tokens)
+    logger.info("Bağlam: %d/%d belge, %d token (tekrar %d, bütçe dışı %d)",
+                len(packed.docs), len(docs), packed.tokens, packed.duplicates, packed.over_budget)
+    req.messages = build_messages(question, packed.text)
+    req.sources = build_sources(packed.metas)
+    return req
@@ -0,0 +1,166 @@
+# ingest_checkpoint.py  – kaldığı yerden devam edebilen ingest için checkpoint
+"""
+Her başarıyla yazılan batch'ten sonra yerel bir SQLite dosyasına:
+
+• son chunk id'si,
+• her chunk'ın içerik özeti (`content_hash`),
+• isteğe bağlı olarak embedding vektörünün kendisi (float32)
+
+kaydedilir. `--resume` ile yeniden çalışan ingest, checkpoint'te olup
+koleksiyonda da bulunan kayıtları atlar; koleksiyonda kaybolmuş ama vektörü
+saklanmış kayıtları embed etmeden geri yükler.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Doc = Dict[str, Any]
+
+HASH_FIELD = "content_hash"             # koleksiyon metadata'sında saklanan içerik özeti
+
+
+def content_hash(doc: Doc) -> str:
+    """`text_for_embedding` + `metadata` özeti; değişiklik tespiti için."""
+    payload = json.dumps(
+        {"text": doc["text_for_embedding"], "metadata": doc["metadata"]},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IngestCheckpoint:
+    def __init__(self, path: Path | str, save_vectors: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.save_vectors = save_vectors
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL,
+                vector BLOB, committed_at REAL NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+
+    # ── Yazma ───────────────────────────────────────────────────────────
+    def reset(self) -> None:
+        """Tam yeniden oluşturmada eski checkpoint'i temizler."""
+        with self._lock:
+            self._db.execute("DELETE FROM chunks")
+            self._db.execute("DELETE FROM meta")
+
+    def commit(self, batch: List[Doc], vectors: Optional[Sequence[Sequence[float]]] = None) -> None:
+        """Koleksiyona yazılmış bir batch'i kalıcı olarak işaretler."""
+        now = time.time()
+        rows = []
+        for i, d in enumerate(batch):
+            blob = (array("f", vectors[i]).tobytes()
+                    if self.save_vectors and vectors is not None else None)
+            rows.append((d["chunk_id"], content_hash(d), blob, now))
+        with self._lock:
+            self._db.execute("BEGIN")
+            # Vektörsüz commit (save_vectors=False) saklı vektörü silmez; içerik
+            # değiştiyse eski vektör artık geçersiz olduğundan atılır.
+            self._db.executemany(
+                "INSERT INTO chunks(chunk_id, content_hash, vector, committed_at)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(chunk_id) DO UPDATE SET"
+                "  vector=CASE WHEN excluded.vector IS NOT NULL THEN excluded.vector"
+                "              WHEN excluded.content_hash = chunks.content_hash THEN chunks.vector"
+                "         END,"
+                "  content_hash=excluded.content_hash, committed_at=excluded.committed_at", rows)
+            self._db.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('last_chunk_id', ?)",
+                             (batch[-1]["chunk_id"],))
+            self._db.execute("COMMIT")
+
+    # ── Okuma ───────────────────────────────────────────────────────────
+    def last_chunk_id(self) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key='last_chunk_id'").fetchone()
+        return row[0] if row else None
+
+    def committed(self) -> Dict[str, str]:
+        return dict(self._db.execute("SELECT chunk_id, content_hash FROM chunks"))
+
+    def vector(self, chunk_id: str) -> Optional[List[float]]:
+        row = self._db.execute("SELECT vector FROM chunks WHERE chunk_id=?",
+                               (chunk_id,)).fetchone()
+        if not row or row[0] is None:
+            return None
+        buf = array("f")
+        buf.frombytes(row[0])
+        return buf.tolist()
+
+    def pending(self, docs: Iterable[Doc], collection,
+                restore_fn: Callable[[List[Doc], List[List[float]]], None],
+                window: int = 500) -> Iterator[Doc]:
+        """
+        Embed edilmesi gereken kayıtları akış halinde üretir. Checkpoint'te
+        aynı özetle bulunan ve koleksiyonda duran kayıtlar atlanır; koleksiyondan
+        kaybolmuş ama vektörü saklanmış olanlar `restore_fn` ile embed edilmeden
+        geri yazılır. Sayaçlar: `skipped`, `restored`.
+        """
+        done = self.committed()
+        self.skipped = self.restored = 0
+        chunk: List[Doc] = []
+        for d in docs:
+            chunk.append(d)
+            if len(chunk) >= window:
+                yield from self._resolve(chunk, done, collection, restore_fn)
+                chunk = []
+        if chunk:
+            yield from self._resolve(chunk, done, collection, restore_fn)
+
+    def _resolve(self, chunk: List[Doc], done: Dict[str, str], collection,
+                 restore_fn) -> Iterator[Doc]:
+        finished = {d["chunk_id"] for d in chunk if done.get(d["chunk_id"]) == content_hash(d)}
+        present = set(collection.get(ids=list(finished), include=[])["ids"]) if finished else set()
+        restore, restore_vecs = [], []
+        for d in chunk:
+            cid = d["chunk_id"]
+            if cid in present:
+                self.skipped += 1
+                continue
+            vec = self.vector(cid) if cid in finished else None
+            if vec is None:
+                yield d
+            else:
+                restore.append(d)
+                restore_vecs.append(vec)
+        if restore:
+            restore_fn(restore, restore_vecs)
+            self.restored += len(restore)
+
+
+# ───── Artımlı plan ──────────────────────────────────────────────────────
+def plan_incremental(docs: Iterable[Doc], collection) -> Tuple[list, list, list, int]:
+    """
+    (yeni, değişen, silinecek_id, değişmeyen_sayısı) döndürür. Aynı chunk_id'li
+    kayıtlardan sonuncusu karşılaştırılır (EmbeddingPipeline ve tam yükleme
+    de sonuncuyu yazar); yoksa her çalıştırmada diğer kopya "değişen" çıkar.
+    """
+    latest = {d["chunk_id"]: d for d in docs}
+    stored = collection.get(include=["metadatas"])
+    stored_hash = {
+        id_: (meta or {}).get(HASH_FIELD)
+        for id_, meta in zip(stored["ids"], stored["metadatas"])
+    }
+    new, changed, unchanged = [], [], 0
+    for cid, d in latest.items():
+        if cid not in stored_hash:
+            new.append(d)
+        elif stored_hash[cid] != content_hash(d):
+            changed.append(d)
+        else:
+            unchanged += 1
+    removed = [id_ for id_ in stored_hash if id_ not in latest]
+    return new, changed, removed, unchanged
@@ -0,0 +1,202 @@
+# ingest_pipeline.py  – token bütçeli, hız sınırlı paralel embedding hattı
+"""
+Ingest betiklerinin (cullian_vector/ingest.py, cullian_intent/ingest_intent.py)
+ortak embedding + yazma hattı.
+
+• Batch'ler kayıt sayısına göre değil, token sayısına göre kesilir
+  (`max_batch_tokens`, `max_batch_items`).
+• Aynı anda `max_inflight` embedding isteği uçuşta olabilir; istekler
+  dakikalık istek (RPM) ve token (TPM) kovalarıyla sınırlanır.
+• Chroma yazmaları tek bir yazıcı thread'inde yapılır; böylece bir batch
+  yazılırken sonraki batch'lerin embedding'i sürer.
+• Aynı `chunk_id` bir batch'te iki kez bulunamaz (Chroma DuplicateIDError);
+  tekrar eden id yeni batch'e kaydırılır, batch'ler sırayla yazıldığından
+  son kayıt kazanır (`{id: kayıt}` sözlüğüyle aynı sonuç). Tekrarlar
+  `stats.duplicates`'te sayılır.
+
+Kullanım:
+    pipe = EmbeddingPipeline(embed_fn=embed, write_fn=write, max_inflight=4)
+    stats = pipe.run(docs)            # docs: "text_for_embedding" içeren dict'ler
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:                                    # isteğe bağlı: kesin token sayımı
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:                       # tiktoken yoksa kaba tahmin
+    _ENCODING = None
+
+MAX_BATCH_TOKENS = 4_000                # istek başına token bütçesi; küçük veri setleri
+                                        # (data1.json ≈ 18k token) de max_inflight slota yayılır
+MAX_BATCH_ITEMS  = 2048                 # OpenAI embeddings girdi sınırı
+DEFAULT_RPM      = 3_000
+DEFAULT_TPM      = 1_000_000
+
+Doc = Dict[str, Any]
+EmbedFn = Callable[[List[str]], List[List[float]]]
+WriteFn = Callable[[List[Doc], List[List[float]]], None]
+
+
+def count_tokens(text: str) -> int:
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 3 + 1          # Türkçe metinde ~3 karakter/token
+
+
+def token_batches(docs: Iterable[Doc], max_tokens: int = MAX_BATCH_TOKENS,
+                  max_items: int = MAX_BATCH_ITEMS,
+                  text_key: str = "text_for_embedding",
+                  id_key: Optional[str] = "chunk_id") -> Iterator[Tuple[List[Doc], int]]:
+    """
+    Kayıtları token bütçesini aşmayacak (batch, token_sayısı) çiftlerine böler;
+    `id_key` verilmişse batch içinde tekrar eden id batch'i keser.
+    """
+    batch: List[Doc] = []
+    ids: set = set()
+    tokens = 0
+    for d in docs:
+        n = count_tokens(d[text_key])
+        dup = id_key is not None and d[id_key] in ids
+        if batch and (dup or tokens + n > max_tokens or len(batch) >= max_items):
+            yield batch, tokens
+            batch, ids, tokens = [], set(), 0
+        batch.append(d)
+        if id_key is not None:
+            ids.add(d[id_key])
+        tokens += n
+    if batch:
+        yield batch, tokens
+
+
+class TokenBucket:
+    """Dakikalık `rate` kapasiteli, sürekli dolan kova."""
+
+    def __init__(self, rate_per_min: float):
+        self.capacity = float(rate_per_min)
+        self.tokens = self.capacity
+        self.rate = rate_per_min / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Gerekirse bekler; beklenen süreyi (sn) döndürür."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class RateLimiter:
+    """İstek/dk ve token/dk sınırlarını birlikte uygular."""
+
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    def acquire(self, n_tokens: int) -> float:
+        return self.requests.acquire(1) + self.tokens.acquire(n_tokens)
+
+
+@dataclass
+class PipelineStats:
+    batches: int = 0
+    texts: int = 0
+    tokens: int = 0
+    duplicates: int = 0
+    throttled_s: float = 0.0
+    elapsed_s: float = 0.0
+
+
+class EmbeddingPipeline:
+    def __init__(self, embed_fn: EmbedFn, write_fn: WriteFn,
+                 max_inflight: int = 4,
+                 limiter: Optional[RateLimiter] = None,
+                 max_batch_tokens: int = MAX_BATCH_TOKENS,
+                 max_batch_items: int = MAX_BATCH_ITEMS,
+                 text_key: str = "text_for_embedding",
+                 id_key: Optional[str] = "chunk_id",
+                 on_batch: Optional[Callable[[List[Doc]], None]] = None):
+        self.embed_fn = embed_fn
+        self.write_fn = write_fn
+        self.max_inflight = max_inflight
+        self.limiter = limiter or RateLimiter()
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_items = max_batch_items
+        self.text_key = text_key
+        self.id_key = id_key
+        self.on_batch = on_batch
+
+    def run(self, docs: Iterable[Doc]) -> PipelineStats:
+        stats = PipelineStats()
+        t0 = time.perf_counter()
+        slots = threading.BoundedSemaphore(self.max_inflight)
+        written: "queue.Queue[Optional[Future]]" = queue.Queue(maxsize=2 * self.max_inflight)
+        errors: List[BaseException] = []
+        seen: set = set()
+
+        def count_duplicates(items: Iterable[Doc]) -> Iterator[Doc]:
+            for d in items:
+                if d[self.id_key] in seen:
+                    stats.duplicates += 1
+                else:
+                    seen.add(d[self.id_key])
+                yield d
+
+        def writer() -> None:
+            while (fut := written.get()) is not None:
+                try:
+                    if not errors:
+                        batch, vecs = fut.result()
+                        self.write_fn(batch, vecs)
+                        if self.on_batch:
+                            self.on_batch(batch)
+                except BaseException as exc:        # ilk hatayı ana thread'e taşı
+                    errors.append(exc)
+
+        def embed_batch(batch: List[Doc]):
+            try:
+                return batch, self.embed_fn([d[self.text_key] for d in batch])
+            finally:
+                slots.release()
+
+        writer_thread = threading.Thread(target=writer, name="ingest-writer", daemon=True)
+        writer_thread.start()
+        with ThreadPoolExecutor(max_workers=self.max_inflight,
+                                thread_name_prefix="ingest-embed") as pool:
+            if self.id_key is not None:
+                docs = count_duplicates(docs)
+            for batch, n_tokens in token_batches(docs, self.max_batch_tokens,
+                                                 self.max_batch_items, self.text_key,
+                                                 self.id_key):
+                if errors:
+                    break
+                slots.acquire()
+                stats.throttled_s += self.limiter.acquire(n_tokens)
+                written.put(pool.submit(embed_batch, batch))
+                stats.batches += 1
+                stats.texts += len(batch)
+                stats.tokens += n_tokens
+        written.put(None)
+        writer_thread.join()
+
+        stats.elapsed_s = time.perf_counter() - t0
+        if errors:
+            raise errors[0]
+        return stats
@@ -0,0 +1,164 @@
+# intent_classifier.py  – süreç içi NumPy intent sınıflandırıcı
+"""
+`user_intents` koleksiyonundaki tüm vektörleri bir kez belleğe alır ve her
+mesajı Chroma sorgusu yerine tek bir matris çarpımıyla sınıflandırır.
+
+Modlar:
+• majority  : k en yakın komşuda çoğunluk oyu (Chroma + Counter ile birebir aynı;
+              eşitlikte en yakın komşunun etiketi kazanır)
+• weighted  : mesafeye göre ağırlıklı oy (1 / (d + ε))
+• centroid  : her intent'in normalize ortalama vektörüne kosinüs benzerliği
+
+Mesafe metriği koleksiyonun `hnsw:space` ayarını izler (varsayılan l2).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any, List, Sequence, Tuple
+
+import numpy as np
+
+MODES = ("majority", "weighted", "centroid")
+WEIGHT_EPS = 1e-6
+
+
+class IntentIndex:
+    """Intent vektörleri + etiketleri için bitişik float32 matris."""
+
+    def __init__(self, vectors: Any, labels: Sequence[str], space: str = "l2"):
+        if len(vectors) != len(labels):
+            raise ValueError("Vektör ve etiket sayısı eşleşmiyor.")
+        if space not in ("l2", "cosine", "ip"):
+            raise ValueError(f"Desteklenmeyen mesafe metriği: {space}")
+        self.space = space
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.sq_norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.unit = self.vectors / np.sqrt(np.maximum(self.sq_norms, 1e-12))[:, None]
+
+        self.labels = list(labels)
+        names, ids = np.unique(np.asarray(self.labels, dtype=object), return_inverse=True)
+        self.intents: List[str] = [str(n) for n in names]
+        self.label_ids = ids.astype(np.int32)
+
+        centroids = np.zeros((len(self.intents), self.vectors.shape[1]), dtype=np.float32)
+        np.add.at(centroids, self.label_ids, self.unit)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = np.ascontiguousarray(centroids)
+
+    @classmethod
+    def from_collection(cls, col, label_field: str = "intent") -> "IntentIndex":
+        """Chroma koleksiyonundaki tüm kayıtları tek `get` ile yükler."""
+        data = col.get(include=["embeddings", "metadatas"])
+        labels = [m[label_field] for m in data["metadatas"]]
+        space = (col.metadata or {}).get("hnsw:space", "l2")
+        return cls(np.asarray(data["embeddings"], dtype=np.float32), labels, space=space)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    # ── Komşu arama ─────────────────────────────────────────────────────
+    def distances(self, queries: Any) -> np.ndarray:
+        """(n, N) mesafe matrisi; Chroma ile aynı metrik."""
+        q = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        if self.space == "cosine":
+            qn = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+            return 1.0 - qn @ self.unit.T
+        dots = q @ self.vectors.T
+        if self.space == "ip":
+            return 1.0 - dots
+        q_sq = np.einsum("ij,ij->i", q, q)[:, None]
+        return np.maximum(q_sq - 2.0 * dots + self.sq_norms[None, :], 0.0)
+
+    def topk(self, queries: Any, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Her sorgu için yakından uzağa sıralı (indeks, mesafe) döndürür."""
+        return _nearest(self.distances(queries), k)
+
+    # ── Toplu değerlendirme (leave-one-out) ─────────────────────────────
+    def loo_neighbors(self, k: int, chunk: int = 1024) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Her kaydın kendisi hariç en yakın k komşusu. Mesafe matrisi `chunk`
+        satırlık dilimlerle hesaplanır; bellek O(chunk × N) kalır.
+        """
+        n = len(self)
+        k = min(k, n - 1)
+        idx = np.empty((n, k), dtype=np.int64)
+        dist = np.empty((n, k), dtype=np.float32)
+        for s in range(0, n, chunk):
+            e = min(s + chunk, n)
+            d = self.distances(self.vectors[s:e])
+            d[np.arange(e - s), np.arange(s, e)] = np.inf          # kendisi komşu sayılmaz
+            idx[s:e], dist[s:e] = _nearest(d, k)
+        return idx, dist
+
+    def loo_centroid_scores(self, chunk: int = 1024) -> np.ndarray:
+        """`centroid` puanları; her kaydın kendi intent merkezinden kendisi çıkarılır."""
+        sums = np.zeros_like(self.centroids)
+        np.add.at(sums, self.label_ids, self.unit)
+        sq = np.einsum("ij,ij->i", sums, sums)
+        inv = 1.0 / np.sqrt(np.maximum(sq, 1e-12))
+        out = np.empty((len(self), len(self.intents)), dtype=np.float32)
+        for s in range(0, len(self), chunk):
+            e = min(s + chunk, len(self))
+            rows, own = np.arange(e - s), self.label_ids[s:e]
+            dots = self.unit[s:e] @ sums.T
+            own_dot = dots[rows, own]
+            # |S - u|² = |S|² - 2 u·S + 1  (u birim vektör)
+            own_norm = np.sqrt(np.maximum(sq[own] - 2.0 * own_dot + 1.0, 1e-12))
+            out[s:e] = dots * inv[None, :]
+            out[s:e][rows, own] = (own_dot - 1.0) / own_norm
+        return out
+
+    # ── Sınıflandırma ───────────────────────────────────────────────────
+    def predict(self, vec: Sequence[float], k: int = 5, mode: str = "majority") -> str:
+        return self.predict_batch([vec], k=k, mode=mode)[0]
+
+    def predict_batch(self, vecs: Any, k: int = 5, mode: str = "majority") -> List[str]:
+        return [self.intents[i] for i in self.scores(vecs, k=k, mode=mode).argmax(axis=1)]
+
+    def scores(self, vecs: Any, k: int = 5, mode: str = "majority") -> np.ndarray:
+        """(n, intent sayısı) puan matrisi; en yüksek puan tahmindir."""
+        if mode == "centroid":
+            q = np.ascontiguousarray(np.atleast_2d(vecs), dtype=np.float32)
+            q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-12)
+            return q @ self.centroids.T
+        if mode not in MODES:
+            raise ValueError(f"Bilinmeyen mod: {mode} (seçenekler: {', '.join(MODES)})")
+
+        idx, dist = self.topk(vecs, k)
+        return vote(self.label_ids[idx], dist, len(self.intents), mode)
+
+
+def _nearest(d: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Mesafe matrisinin her satırı için yakından uzağa sıralı ilk k sütun."""
+    k = min(k, d.shape[1])
+    part = np.argpartition(d, k - 1, axis=1)[:, :k]
+    part_d = np.take_along_axis(d, part, axis=1)
+    order = np.argsort(part_d, axis=1, kind="stable")
+    return (np.take_along_axis(part, order, axis=1),
+            np.take_along_axis(part_d, order, axis=1))
+
+
+def vote(neigh_labels: np.ndarray, neigh_dist: np.ndarray,
+         n_labels: int, mode: str = "majority") -> np.ndarray:
+    """
+    Sıralı komşu etiketlerinden (n, k) intent puanları üretir.
+
+    `majority` modunda eşitlik, `Counter.most_common` gibi ilk görülen
+    (yani en yakın) etiket lehine bozulur.
+    """
+    n, k = neigh_labels.shape
+    onehot = neigh_labels[:, :, None] == np.arange(n_labels)[None, None, :]
+    if mode == "weighted":
+        w = 1.0 / (np.maximum(neigh_dist, 0.0) + WEIGHT_EPS)
+        return (onehot * w[:, :, None]).sum(axis=1)
+
+    counts = onehot.sum(axis=1).astype(np.float64)
+    first = np.where(onehot.any(axis=1), onehot.argmax(axis=1), k)
+    return counts * (k + 1) - first
+
+
+def majority_reference(labels: Sequence[str]) -> str:
+    """router.predict_intent'in eski Counter oyu; karşılaştırma için."""
+    return Counter(labels).most_common(1)[0][0]
+
@@ -0,0 +1,213 @@
+# lexical_index.py  – otel bilgileri için Türkçe BM25 indeksi + RRF füzyonu
+"""
+Embedding araması "swim-up", "Lagoon", "a'la carte", saatler ve sayılar gibi
+birebir geçen kelimelerde zayıf kalabiliyor. Bu modül:
+
+• Türkçe tokenizer : İ/ı katlama, kesme işaretli ekler ("Lagoon'da" → lagoon),
+                     hafif ek budama ("manzaralı" → manzara, "odaların" → oda)
+• BM25Index        : `text_for_embedding` + `original_context` üzerinde; ingest
+                     sırasında JSON olarak kaydedilir, sorguda belleğe yüklenir
+• rrf              : Chroma ve BM25 sıralamalarını Reciprocal Rank Fusion ile birleştirir
+• is_decisive      : BM25 ilk sonucu açık ara öndeyse embedding'e hiç gidilmez
+
+    python lexical_index.py "swim-up havuzlu oda" --persist cullian_vector/chroma_db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+BM25_K1         = 1.2
+BM25_B          = 0.75
+RRF_K           = 60                    # Cormack vd. (2009) önerisi
+DECISIVE_RATIO  = 1.75                  # ilk skor ≥ ikinci × oran ...
+DECISIVE_MIN    = 12.0                  # ... ve mutlak skor ≥ bu değer
+MIN_STEM        = 3                     # ek budamada kalacak en kısa kök
+CONTEXT_FIELD   = "original_context"
+TOKENIZER_REV   = 3                     # tokenizer değişince kayıtlı indeksler yeniden kurulur
+# ────────────────────────────────────────────────────────────────────────
+
+_WORD = re.compile(r"[0-9a-zçğıöşüâîû]+(?:['’][0-9a-zçğıöşüâîû]+)?(?:-[0-9a-zçğıöşüâîû]+)*")
+
+# İki aşama: önce hal/iyelik/yapım eki, sonra çoğul eki ("odaların" → odalar → oda).
+# Uzun ekler önce denenir; kök MIN_STEM'in altına inmez. "ta/te" gibi
+# kelime sonlarında sık görülen ekler bilinçli olarak listede yok.
+_CASE_SUFFIXES = sorted({
+    "dan", "den", "ndan", "nden", "da", "de", "nda", "nde",
+    "ya", "ye", "na", "ne",
+    "nın", "nin", "nun", "nün", "ın", "in", "un", "ün",
+    "yla", "yle", "la", "le",
+    "lı", "li", "lu", "lü", "sız", "siz", "suz", "süz",
+    "sı", "si", "su", "sü", "yı", "yi", "yu", "yü",
+    "ı", "i", "u", "ü",
+}, key=len, reverse=True)
+_PLURAL_SUFFIXES = ("ları", "leri", "lar", "ler")
+
+_STOPWORDS = {
+    "ve", "ile", "veya", "bir", "bu", "şu", "o", "mi", "mı", "mu", "mü",
+    "ne", "nedir", "nasıl", "hangi", "var", "yok", "için", "da", "de",
+    "ki", "çok", "daha", "en", "gibi", "kadar", "olan", "olarak", "otel",
+    "oteli", "otelde", "cullinan", "belek", "the", "a", "an", "of",
+}
+
+
+def casefold_tr(text: str) -> str:
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def stem_tr(word: str) -> str:
+    """Hafif, sözlüksüz ek budama; aynı kurallar belge ve soruya uygulanır."""
+    for suffixes in (_CASE_SUFFIXES, _PLURAL_SUFFIXES):
+        for suf in suffixes:
+            if word.endswith(suf) and len(word) - len(suf) >= MIN_STEM:
+                word = word[: -len(suf)]
+                break
+    return word
+
+
+def tokenize_tr(text: str) -> List[str]:
+    tokens: List[str] = []
+    for w in _WORD.findall(casefold_tr(text)):
+        if "'" in w or "’" in w:                    # lagoon'da → lagoon, a'la → ala, 9'da → 9
+            head, tail = re.split(r"['’]", w, maxsplit=1)
+            w = head if len(head) > 2 or head.isdigit() else head + tail
+        if "-" in w:                                # swim-up → swim, up, swimup
+            parts = w.split("-")
+            tokens.extend(stem_tr(p) for p in parts if p and p not in _STOPWORDS)
+            w = "".join(parts)
+        if w in _STOPWORDS:
+            continue
+        tokens.append(w if w.isdigit() else stem_tr(w))
+    return tokens
+
+
+def index_text(doc: str, meta: Optional[dict]) -> str:
+    ctx = (meta or {}).get(CONTEXT_FIELD) or ""
+    return f"{doc}\n{ctx}" if ctx else doc
+
+
+class BM25Index:
+    def __init__(self, ids: List[str], postings: Dict[str, List[Tuple[int, int]]],
+                 doc_len: List[int], k1: float = BM25_K1, b: float = BM25_B):
+        self.ids = ids
+        self.postings = postings
+        self.doc_len = doc_len
+        self.k1, self.b = k1, b
+        self.avgdl = sum(doc_len) / max(len(doc_len), 1)
+        n = len(ids)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+                    for t, p in postings.items()}
+
+    # ── Oluşturma ───────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, ids: Sequence[str], texts: Iterable[str], **kw) -> "BM25Index":
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_len: List[int] = []
+        for i, text in enumerate(texts):
+            toks = tokenize_tr(text)
+            doc_len.append(len(toks))
+            for term, tf in Counter(toks).items():
+                postings[term].append((i, tf))
+        return cls(list(ids), dict(postings), doc_len, **kw)
+
+    @classmethod
+    def from_collection(cls, col, **kw) -> "BM25Index":
+        data = col.get(include=["documents", "metadatas"])
+        texts = (index_text(d or "", m) for d, m in zip(data["documents"], data["metadatas"]))
+        return cls.build(data["ids"], texts, **kw)
+
+    # ── Kalıcılık ───────────────────────────────────────────────────────
+    def save(self, path: Path | str, version: str = "") -> None:
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({
+            "version": version, "tokenizer": TOKENIZER_REV, "ids": self.ids, "doc_len": self.doc_len,
+            "postings": self.postings, "k1": self.k1, "b": self.b,
+        }, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> Tuple["BM25Index", Optional[str]]:
+        """(indeks, sürüm); farklı tokenizer ile kurulmuşsa sürüm None döner."""
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        postings = {t: [tuple(p) for p in ps] for t, ps in data["postings"].items()}
+        version = data["version"] if data.get("tokenizer") == TOKENIZER_REV else None
+        return cls(data["ids"], postings, data["doc_len"], data["k1"], data["b"]), version
+
+    # ── Arama ───────────────────────────────────────────────────────────
+    def search(self, query: str, k: int = 10,
+               allowed: Optional[set] = None) -> List[Tuple[str, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize_tr(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[i] / self.avgdl)
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        hits = ((self.ids[i], s) for i, s in scores.items())
+        if allowed is not None:
+            hits = ((id_, s) for id_, s in hits if id_ in allowed)
+        return sorted(hits, key=lambda h: -h[1])[:k]
+
+
+def index_path(persist_dir: Path | str, collection_name: str) -> Path:
+    return Path(persist_dir) / f"{collection_name}.bm25.json"
+
+
+def load_or_build(col, persist_dir: Path | str, version: str = "") -> BM25Index:
+    """Kayıtlı indeks koleksiyon sürümüyle uyuşmuyorsa koleksiyondan yeniden kurar."""
+    path = index_path(persist_dir, col.name)
+    if path.exists():
+        index, saved = BM25Index.load(path)
+        if saved == version:
+            return index
+    index = BM25Index.from_collection(col)
+    index.save(path, version)
+    return index
+
+
+def rrf(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Reciprocal Rank Fusion: Σ 1/(k + sıra)."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, id_ in enumerate(ranking, 1):
+            scores[id_] += 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda x: -x[1])
+
+
+def is_decisive(hits: Sequence[Tuple[str, float]], ratio: float = DECISIVE_RATIO,
+                min_score: float = DECISIVE_MIN) -> bool:
+    if not hits or hits[0][1] < min_score:
+        return False
+    return len(hits) == 1 or hits[0][1] >= ratio * hits[1][1]
+
+
+def main() -> None:
+    import chromadb
+
+    ap = argparse.ArgumentParser(description="BM25 indeksini sorgula")
+    ap.add_argument("query", nargs="+")
+    ap.add_argument("--persist", default="./chroma_db")
+    ap.add_argument("--collection", default="cullinan_hotel_facts")
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    q = " ".join(args.query)
+    col = chromadb.PersistentClient(path=args.persist).get_collection(args.collection)
+    from semantic_cache import collection_version
+    hits = load_or_build(col, args.persist, collection_version(col)).search(q, args.k)
+    print("tokenlar:", tokenize_tr(q), "| kesin:" , is_decisive(hits))
+    for id_, s in hits:
+        print(f"{s:7.2f}  {id_}")
+
+
+if __name__ == "__main__":
+    main()
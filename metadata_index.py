@@ -0,0 +1,183 @@
+# metadata_index.py  – Chroma 'where' filtrelerinin yerel (bitset) değerlendirmesi
+"""
+Filtreli `col.query(where=...)` boş dönünce filtresiz ikinci sorgu atmak, zor
+sorularda retrieval süresini ikiye katlıyordu; `$or` içeren sayısal/metin
+karşılaştırmaları da Chroma'da yavaş metadata taramasına yol açıyordu.
+
+Bu indeks koleksiyonun metadata'sını alan başına bitset'lere çevirir:
+    alan → {değer → bitset (int; i. bit = i. kayıt)}
+Böylece `where` filtresi sorgudan *önce* yerelde değerlendirilir:
+
+• Hiçbir kayıt uymuyorsa bu baştan bilinir → tek bir filtresiz sorgu.
+• Uyan varsa tek bir filtresiz sorgu, seçicilik oranında fazla (`overfetch`)
+  adayla atılır ve sonuçlar yerelde süzülür.
+
+Belgeler ve metadata da saklanır; BM25'ten gelen ve vektör sonuçlarında
+olmayan kayıtlar için ek `col.get` gerekmez. Soru başına tek Chroma çağrısı.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+MAX_DISTINCT     = 256                  # daha fazla farklı değeri olan alan indekslenmez
+OVERFETCH_SAFETY = 2.0                  # seçiciliğe göre hesaplanan aday sayısı çarpanı
+OVERFETCH_MAX    = 1000                 # tek sorguda istenecek en fazla aday
+# ────────────────────────────────────────────────────────────────────────
+
+Scalar = Any
+_NUMERIC_OPS = {"$gt", "$gte", "$lt", "$lte"}
+
+
+class UnsupportedFilter(ValueError):
+    """Filtre yerel indeksle değerlendirilemiyor (indekslenmemiş alan/operatör)."""
+
+
+def _key(value: Scalar) -> Tuple[str, Scalar]:
+    # Chroma'da True ile 1 farklıdır; Python'da eşit oldukları için tür etiketi
+    if isinstance(value, bool):
+        return ("b", value)
+    if isinstance(value, (int, float)):
+        return ("n", value)
+    return ("s", value)
+
+
+def _compare(op: str, a: float, b: float) -> bool:
+    return {"$gt": a > b, "$gte": a >= b, "$lt": a < b, "$lte": a <= b}[op]
+
+
+class MetadataIndex:
+    def __init__(self, ids: List[str], documents: List[str], metadatas: List[dict],
+                 fields: Dict[str, Dict[Tuple[str, Scalar], int]]):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.fields = fields
+        self.pos = {id_: i for i, id_ in enumerate(ids)}
+        self.all = (1 << len(ids)) - 1
+
+    # ── Oluşturma ───────────────────────────────────────────────────────
+    @classmethod
+    def build(cls, ids: Sequence[str], documents: Sequence[str],
+              metadatas: Sequence[Optional[dict]]) -> "MetadataIndex":
+        fields: Dict[str, Dict[Tuple[str, Scalar], int]] = defaultdict(lambda: defaultdict(int))
+        for i, meta in enumerate(metadatas):
+            for name, value in (meta or {}).items():
+                if isinstance(value, (str, int, float, bool)):
+                    fields[name][_key(value)] |= 1 << i
+        kept = {name: dict(vals) for name, vals in fields.items() if len(vals) <= MAX_DISTINCT}
+        return cls(list(ids), list(documents), [m or {} for m in metadatas], kept)
+
+    @classmethod
+    def from_collection(cls, col) -> "MetadataIndex":
+        data = col.get(include=["documents", "metadatas"])
+        return cls.build(data["ids"], data["documents"], data["metadatas"])
+
+    # ── Kalıcılık ───────────────────────────────────────────────────────
+    def save(self, path: Path | str, version: str = "") -> None:
+        fields = {name: [[t, v, format(bits, "x")] for (t, v), bits in vals.items()]
+                  for name, vals in self.fields.items()}
+        path = Path(path)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({
+            "version": version, "ids": self.ids, "documents": self.documents,
+            "metadatas": self.metadatas, "fields": fields,
+        }, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> Tuple["MetadataIndex", str]:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        fields = {name: {(t, v): int(bits, 16) for t, v, bits in vals}
+                  for name, vals in data["fields"].items()}
+        return cls(data["ids"], data["documents"], data["metadatas"], fields), data["version"]
+
+    # ── Filtre değerlendirme ────────────────────────────────────────────
+    def bits(self, where: Dict[str, Any]) -> int:
+        """Chroma 'where' sözlüğünü bitset'e çevirir."""
+        if not where:
+            return self.all
+        out = self.all
+        for name, cond in where.items():
+            if name == "$and":
+                for sub in cond:
+                    out &= self.bits(sub)
+            elif name == "$or":
+                acc = 0
+                for sub in cond:
+                    acc |= self.bits(sub)
+                out &= acc
+            else:
+                out &= self._field_bits(name, cond)
+        return out
+
+    def _field_bits(self, name: str, cond: Any) -> int:
+        if name not in self.fields:
+            raise UnsupportedFilter(f"indekslenmemiş alan: {name}")
+        values = self.fields[name]
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        out = self.all
+        for op, arg in cond.items():
+            if op == "$eq":
+                out &= values.get(_key(arg), 0)
+            elif op == "$ne":
+                out &= self.all & ~values.get(_key(arg), 0)
+            elif op == "$in":
+                out &= self._any(values, arg)
+            elif op == "$nin":
+                out &= self.all & ~self._any(values, arg)
+            elif op in _NUMERIC_OPS:
+                acc = 0
+                for (t, v), bits in values.items():
+                    if t == "n" and _compare(op, v, arg):
+                        acc |= bits
+                out &= acc
+            else:
+                raise UnsupportedFilter(f"desteklenmeyen operatör: {op}")
+        return out
+
+    @staticmethod
+    def _any(values, args) -> int:
+        acc = 0
+        for a in args:
+            acc |= values.get(_key(a), 0)
+        return acc
+
+    def matching_ids(self, where: Dict[str, Any]) -> set:
+        bits = self.bits(where)
+        return {self.ids[i] for i in range(bits.bit_length()) if bits >> i & 1}
+
+    # ── Sorgu planlama / yerel kayıtlar ─────────────────────────────────
+    def overfetch(self, n_allowed: int, want: int) -> int:
+        """`want` uyan aday için filtresiz sorguda istenecek sonuç sayısı."""
+        total = len(self.ids)
+        if n_allowed >= total:
+            return min(want, total)
+        n = math.ceil(want * total / max(n_allowed, 1) * OVERFETCH_SAFETY)
+        return max(want, min(n, total, OVERFETCH_MAX))
+
+    def get(self, ids: Sequence[str]) -> Tuple[List[str], List[dict]]:
+        idx = [self.pos[i] for i in ids if i in self.pos]
+        return [self.documents[i] for i in idx], [self.metadatas[i] for i in idx]
+
+
+def index_path(persist_dir: Path | str, collection_name: str) -> Path:
+    return Path(persist_dir) / f"{collection_name}.meta.json"
+
+
+def load_or_build(col, persist_dir: Path | str, version: str = "") -> MetadataIndex:
+    """Kayıtlı indeks koleksiyon sürümüyle uyuşmuyorsa koleksiyondan yeniden kurar."""
+    path = index_path(persist_dir, col.name)
+    if path.exists():
+        index, saved = MetadataIndex.load(path)
+        if saved == version:
+            return index
+    index = MetadataIndex.from_collection(col)
+    index.save(path, version)
+    return index
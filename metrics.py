@@ -0,0 +1,303 @@
+# metrics.py  – hafif, bağımlılıksız metrik yardımcıları
+"""
+Sabit kova (bucket) sınırlı histogramlar; batch boyutu, kuyruk bekleme süresi
+gibi dağılımları düşük maliyetle izlemek için.
+
+Sıcak yol enstrümantasyonu:
+
+    with span("chroma_query", collection=col.name):
+        res = col.query(...)
+    record_usage(model, resp.usage)                     # token sayaçları
+    @retry(..., before_sleep=count_retries("embed"))    # tenacity denemeleri
+
+• Süreler `span_duration_ms{span, status}` histogramına gider; span başına
+  maliyet birkaç µs'dir (perf_counter + kilitli sayaç artışı).
+• METRICS_JSON_LOG ayarlıysa ("-": stderr, aksi dosya yolu) her span/olay
+  tek satır JSON olarak loglanır.
+• `render_prometheus()` Prometheus metin biçimini üretir;
+  METRICS_PORT ayarlıysa `maybe_start_http_server()` /metrics sunar.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+METRICS_PORT     = int(os.getenv("METRICS_PORT", 0))            # 0: HTTP uç noktası kapalı
+METRICS_JSON_LOG = os.getenv("METRICS_JSON_LOG", "")            # "": kapalı, "-": stderr
+SPAN_BUCKETS_MS  = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250,
+                    500, 1000, 2500, 5000, 10000, 30000)
+# ────────────────────────────────────────────────────────────────────────
+
+LabelValues = Tuple[str, ...]
+
+
+class Histogram:
+    """Thread-safe, kümülatif kovalı histogram (Prometheus `le` semantiği)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)   # son kova: +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        cumulative, running = {}, 0
+        for le, c in zip([*map(str, self.buckets), "+Inf"], counts):
+            running += c
+            cumulative[le] = running
+        return {"count": n, "sum": total, "mean": total / n if n else 0.0,
+                "buckets": cumulative}
+
+
+class Counter:
+    """Thread-safe, etiketli sayaç; `inc("gpt-4o-mini", "prompt", amount=120)`."""
+
+    def __init__(self, labels: Sequence[str] = ()):
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class HistogramFamily:
+    """Etiket değerleri başına bir `Histogram`."""
+
+    def __init__(self, buckets: Sequence[float], labels: Sequence[str]):
+        self.buckets = tuple(buckets)
+        self.labels_ = tuple(labels)
+        self._children: Dict[LabelValues, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        h = self._children.get(values)
+        if h is None:
+            with self._lock:
+                h = self._children.setdefault(values, Histogram(self.buckets))
+        return h
+
+    def children(self) -> Dict[LabelValues, Histogram]:
+        with self._lock:
+            return dict(self._children)
+
+
+# ───── Kayıt defteri + Prometheus metin biçimi ───────────────────────────
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Registry:
+    """İsim → metrik; `render()` tüm metrikleri Prometheus metin biçiminde verir."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, help_: str, metric: Any) -> Any:
+        with self._lock:
+            self._metrics[name] = (help_, metric)
+        return metric
+
+    def counter(self, name: str, help_: str, labels: Sequence[str] = ()) -> Counter:
+        with self._lock:
+            if name in self._metrics:
+                return self._metrics[name][1]
+        return self.register(name, help_, Counter(labels))
+
+    def histogram(self, name: str, help_: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = SPAN_BUCKETS_MS) -> HistogramFamily:
+        with self._lock:
+            if name in self._metrics:
+                return self._metrics[name][1]
+        return self.register(name, help_, HistogramFamily(buckets, labels))
+
+    def render(self) -> str:
+        with self._lock:
+            items = sorted(self._metrics.items())
+        out = []
+        for name, (help_, metric) in items:
+            out.append(f"# HELP {name} {help_}")
+            if isinstance(metric, Counter):
+                out.append(f"# TYPE {name} counter")
+                for values, v in sorted(metric.snapshot().items()):
+                    out.append(f"{name}{_labels(metric.labels, values)} {v:g}")
+                continue
+            out.append(f"# TYPE {name} histogram")
+            if isinstance(metric, Histogram):
+                children = {(): metric}
+                names: Sequence[str] = ()
+            else:
+                children, names = metric.children(), metric.labels_
+            for values, h in sorted(children.items()):
+                snap = h.snapshot()
+                for le, n in snap["buckets"].items():
+                    bucket = _labels(names, values, 'le="%s"' % le)
+                    out.append(f"{name}_bucket{bucket} {n}")
+                out.append(f"{name}_sum{_labels(names, values)} {snap['sum']:.6g}")
+                out.append(f"{name}_count{_labels(names, values)} {snap['count']}")
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+
+SPAN_MS = REGISTRY.histogram("span_duration_ms", "Aşama süresi (ms)", ("span", "status"))
+TOKENS  = REGISTRY.counter("llm_tokens_total", "OpenAI kullanımına göre token sayısı",
+                           ("model", "kind"))
+RETRIES = REGISTRY.counter("retry_attempts_total", "tenacity yeniden deneme sayısı", ("call",))
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# ───── JSON loglar ───────────────────────────────────────────────────────
+json_logger = logging.getLogger("metrics")
+json_logger.propagate = False           # uygulama loglarına karışmaz
+_json_enabled = False
+
+
+def configure_json_log(target: str) -> None:
+    """`target`: "-" → stderr, aksi dosya yolu (satır başına bir JSON)."""
+    global _json_enabled
+    handler = (logging.StreamHandler(sys.stderr) if target == "-"
+               else logging.FileHandler(target, encoding="utf-8"))
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    json_logger.addHandler(handler)
+    json_logger.setLevel(logging.INFO)
+    _json_enabled = True
+
+
+def log_event(event: str, **fields: Any) -> None:
+    if _json_enabled:
+        json_logger.info(json.dumps({"ts": round(time.time(), 3), "event": event, **fields},
+                                    ensure_ascii=False, default=str))
+
+
+# ───── Span'lar ──────────────────────────────────────────────────────────
+def observe_span(name: str, ms: float, status: str = "ok", **attrs: Any) -> None:
+    """Süresi başka yerde ölçülmüş bir span'ı kaydeder (ör. akışın sonu)."""
+    SPAN_MS.labels(name, status).observe(ms)
+    if _json_enabled:
+        log_event("span", span=name, ms=round(ms, 3), status=status, **attrs)
+
+
+class span:
+    """`with span("embed", n=3) as s: ...; s.set(hits=2)` – süre + JSON log."""
+
+    __slots__ = ("name", "attrs", "_t0")
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self) -> "span":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ms = (time.perf_counter() - self._t0) * 1000.0
+        status = "ok" if exc_type is None else "error"
+        SPAN_MS.labels(self.name, status).observe(ms)
+        if _json_enabled:
+            if exc_type is not None:
+                self.attrs["error"] = exc_type.__name__
+            log_event("span", span=self.name, ms=round(ms, 3), status=status, **self.attrs)
+        return False
+
+
+# ───── Token ve yeniden deneme sayaçları ─────────────────────────────────
+def record_usage(model: str, usage: Any, embedding: bool = False) -> None:
+    """OpenAI `usage` nesnesi (ya da sözlüğü) → llm_tokens_total."""
+    if usage is None:
+        return
+    get = usage.get if isinstance(usage, dict) else lambda k: getattr(usage, k, None)
+    if embedding:
+        if n := get("prompt_tokens"):
+            TOKENS.inc(model, "embedding", amount=n)
+        return
+    for field, kind in (("prompt_tokens", "prompt"), ("completion_tokens", "completion")):
+        if n := get(field):
+            TOKENS.inc(model, kind, amount=n)
+
+
+def count_retries(call: str):
+    """tenacity `before_sleep` geri çağrısı: her yeniden denemede sayaç + JSON olay."""
+    def before_sleep(state) -> None:
+        RETRIES.inc(call)
+        exc = state.outcome.exception() if state.outcome else None
+        log_event("retry", call=call, attempt=state.attempt_number,
+                  error=type(exc).__name__ if exc else None)
+    return before_sleep
+
+
+# ───── HTTP uç noktası ───────────────────────────────────────────────────
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:      # sessiz
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """/metrics'i arka plan thread'inde sunar (süreç başına bir kez)."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics-http").start()
+    return _server
+
+
+def maybe_start_http_server() -> Optional[ThreadingHTTPServer]:
+    return start_http_server(METRICS_PORT) if METRICS_PORT else None
+
+
+if METRICS_JSON_LOG:
+    configure_json_log(METRICS_JSON_LOG)
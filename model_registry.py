@@ -0,0 +1,176 @@
+# model_registry.py  – fine-tune işi → model adı eşlemesi + açılışta model ısıtma
+"""
+`resolve_finetuned_model(FT_JOB_ID)` her çalıştırmada
+`fine_tuning.jobs.retrieve` ile tam bir API turu yapıyordu. Kayıt defteri
+eşlemeyi bir kez çözer ve yerelde (JSON) saklar:
+
+• Tamamlanmış (succeeded) iş : model adı değişmez; kayıt süresiz geçerli
+                               (MODEL_REGISTRY_TTL_S > 0 ise o kadar saniye)
+• Henüz bitmemiş iş           : durum kaydedilir, PENDING_RECHECK_S sonra
+                               yeniden sorulur; o zamana kadar hata aynen döner
+• `refresh=True` / --refresh  : kaydı yok sayıp API'den yeniden çözer
+
+`warmup()` embedding ve sohbet modellerine birer küçük istek atar; TLS
+bağlantısı ve model yüklemesi ilk misafir isteğinden önce ödenir.
+
+    python model_registry.py ftjob-…            # çöz ve kaydet
+    python model_registry.py --list
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+MODEL_REGISTRY_PATH  = Path(os.getenv(
+    "MODEL_REGISTRY_PATH",
+    Path(__file__).resolve().parent / ".cache" / "models.json"))
+MODEL_REGISTRY_TTL_S = float(os.getenv("MODEL_REGISTRY_TTL_S", 0))   # 0: süresiz
+PENDING_RECHECK_S    = 60.0              # bitmemiş işin durumu en sık bu aralıkla sorulur
+WARMUP_TEXT          = "merhaba"
+# ────────────────────────────────────────────────────────────────────────
+
+logger = logging.getLogger("ModelRegistry")
+
+
+def _default_client():
+    import openai
+    from config import load_api_key
+    openai.api_key = load_api_key()
+    return openai
+
+
+class ModelRegistry:
+    """Thread-safe; birden çok süreç aynı dosyayı paylaşabilir (atomik yazım)."""
+
+    def __init__(self, path: Path | str = MODEL_REGISTRY_PATH,
+                 client_factory: Callable[[], Any] = _default_client,
+                 ttl_s: float = MODEL_REGISTRY_TTL_S,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self._client_factory = client_factory
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self.lookups = 0                 # API'ye gidilen çözümleme sayısı
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self._entries, ensure_ascii=False, indent=2), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def _fresh(self, entry: Dict[str, Any], now: float) -> bool:
+        age = now - entry["checked_at"]
+        if entry["status"] != "succeeded":
+            return age < PENDING_RECHECK_S
+        return self.ttl_s <= 0 or age < self.ttl_s
+
+    def resolve(self, ft_job_id: str, refresh: bool = False) -> str:
+        """Fine-tune işinin model adı; iş tamamlanmamışsa RuntimeError."""
+        with self._lock:
+            now = self._clock()
+            entry = self._entries.get(ft_job_id)
+            if refresh or entry is None or not self._fresh(entry, now):
+                job = self._client_factory().fine_tuning.jobs.retrieve(ft_job_id)
+                self.lookups += 1
+                entry = {"status": job.status, "model": job.fine_tuned_model,
+                         "checked_at": now}
+                self._entries[ft_job_id] = entry
+                self._save()
+                logger.info("Fine-tune işi çözüldü: %s → %s (%s)",
+                            ft_job_id, entry["model"], entry["status"])
+        if entry["status"] != "succeeded":
+            raise RuntimeError(f"Fine-tune işi henüz tamamlanmamış: {entry['status']}")
+        return entry["model"]
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._entries.items()}
+
+
+# ── Süreç genelinde paylaşılan örnek ─────────────────────────────────────
+_default: Optional[ModelRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = ModelRegistry()
+    return _default
+
+
+def resolve_finetuned_model(ft_job_id: str, refresh: bool = False) -> str:
+    return get_registry().resolve(ft_job_id, refresh)
+
+
+# ── Isıtma ──────────────────────────────────────────────────────────────
+def warmup(ai, embed_models: Iterable[str] = (), chat_models: Iterable[str] = (),
+           background: bool = False) -> Dict[str, float] | threading.Thread:
+    """
+    Her modele paralel birer küçük istek (embedding: tek kelime, sohbet:
+    max_tokens=1) atar ve model başına süreyi (ms) döndürür. Hatalar yalnız
+    loglanır; ısıtma başarısız olsa da ilk istek normal yoldan çalışır.
+    `background=True` ise beklemeden başlatılan thread döner.
+    """
+    if background:
+        t = threading.Thread(target=warmup, args=(ai, list(embed_models), list(chat_models)),
+                             name="model-warmup", daemon=True)
+        t.start()
+        return t
+
+    def one(kind: str, model: str) -> float:
+        t0 = time.perf_counter()
+        try:
+            if kind == "embed":
+                ai.embeddings.create(model=model, input=[WARMUP_TEXT])
+            else:
+                ai.chat.completions.create(model=model, max_tokens=1, temperature=0,
+                                           messages=[{"role": "user", "content": WARMUP_TEXT}])
+        except Exception as e:
+            logger.warning("Isıtma başarısız (%s): %s", model, e)
+        return (time.perf_counter() - t0) * 1000
+
+    jobs = [("embed", m) for m in embed_models] + [("chat", m) for m in chat_models]
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        times = dict(zip((m for _, m in jobs), pool.map(lambda j: one(*j), jobs)))
+    logger.info("Model ısıtma: %s", ", ".join(f"{m} {ms:.0f} ms" for m, ms in times.items()))
+    return times
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Fine-tune model kayıt defteri")
+    ap.add_argument("job_ids", nargs="*", help="Çözülecek fine-tune iş kimlikleri")
+    ap.add_argument("--refresh", action="store_true", help="Kayıtlı eşlemeyi yok say")
+    ap.add_argument("--list", action="store_true", help="Kayıtlı eşlemeleri yazdır")
+    args = ap.parse_args()
+
+    reg = get_registry()
+    for job_id in args.job_ids:
+        print(f"{job_id} → {reg.resolve(job_id, args.refresh)}")
+    if args.list or not args.job_ids:
+        print(json.dumps(reg.entries(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
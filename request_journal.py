@@ -0,0 +1,245 @@
+# request_journal.py  – istek günlüğü (JSONL, dönen dosyalar, bloklamayan yazıcı)
+"""
+Router'dan geçen her mesaj tek satır JSON olarak günlüğe eklenir:
+
+    {"ts": 1739786400.123, "user_id": "u1", "query": "otopark var mı?",
+     "mode": "sync", "intent": "otopark_bilgisi", "handler": "hotel_rag",
+     "latency_ms": 412.8, "cache": {"embedding": true}}
+
+    with journal_request(user_id, query) as rec:     # router.py
+        rec["intent"] = predict_intent(query)
+        ...
+    note(handler="hotel_fast_path")                  # alt çağrılardan alan ekleme
+    note_cache("embedding", hit=True)
+
+• `record()` yalnız sınırlı bir kuyruğa ekler; dosyaya arka plan thread'i
+  toplu yazar. Kuyruk doluysa kayıt atılır ve `dropped` sayacı artar,
+  yanıt hiçbir zaman disk G/Ç'si beklemez.
+• Dosya REQUEST_JOURNAL_MAX_BYTES'ı aşınca `requests.jsonl.1 … .N` olarak
+  döndürülür (RotatingFileHandler düzeni); `iter_journal()` eskiden yeniye okur.
+• Süreç kapanırken kuyrukta kalanlar `atexit` ile diske yazılır.
+• Tekrar oynatma için bkz. benchmarks/replay_journal.py.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+REQUEST_JOURNAL           = os.getenv("REQUEST_JOURNAL", "1") != "0"     # 0: kapalı
+REQUEST_JOURNAL_PATH      = os.getenv("REQUEST_JOURNAL_PATH", "logs/requests.jsonl")
+REQUEST_JOURNAL_MAX_BYTES = int(os.getenv("REQUEST_JOURNAL_MAX_BYTES", 50 * 1024 * 1024))
+REQUEST_JOURNAL_BACKUPS   = int(os.getenv("REQUEST_JOURNAL_BACKUPS", 5))
+REQUEST_JOURNAL_QUEUE     = int(os.getenv("REQUEST_JOURNAL_QUEUE", 10_000))   # bekleyen kayıt sınırı
+REQUEST_JOURNAL_FLUSH_S   = float(os.getenv("REQUEST_JOURNAL_FLUSH_S", 0.5))  # toplu yazma aralığı
+# ────────────────────────────────────────────────────────────────────────
+
+logger = logging.getLogger("RequestJournal")
+
+Record = Dict[str, Any]
+_STOP = object()
+
+
+class RequestJournal:
+    """Bloklamayan JSONL günlüğü; yazma tek bir daemon thread'de yapılır."""
+
+    def __init__(self, path: Path | str = REQUEST_JOURNAL_PATH,
+                 max_bytes: int = REQUEST_JOURNAL_MAX_BYTES,
+                 backups: int = REQUEST_JOURNAL_BACKUPS,
+                 queue_size: int = REQUEST_JOURNAL_QUEUE,
+                 flush_interval: float = REQUEST_JOURNAL_FLUSH_S):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.rotations = 0
+        self._q: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._fh = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True, name="request-journal")
+        self._thread.start()
+
+    # ---- üretici tarafı (istek thread'leri) ----
+    def record(self, rec: Record) -> bool:
+        """Kaydı kuyruğa ekler; kuyruk doluysa/kapalıysa atar ve False döner."""
+        if self._closed:
+            return False
+        try:
+            self._q.put_nowait(rec)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Kuyruktaki kayıtlar diske yazılana kadar bekler (testler, kapanış)."""
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._q.unfinished_tasks
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._q.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("İstek günlüğü kapatılamadı: kuyruk dolu")
+            return
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        return {"written": self.written, "dropped": self.dropped,
+                "rotations": self.rotations, "pending": self._q.qsize()}
+
+    # ---- yazıcı thread ----
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < 1024:                 # birikenleri tek write ile yaz
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(r is _STOP for r in batch)
+            try:
+                self._write([r for r in batch if r is not _STOP])
+            except Exception as e:                   # disk hatası yanıtları etkilemez
+                logger.warning("İstek günlüğü yazılamadı (%d kayıt): %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self._q.task_done()
+            if stop:
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                return
+
+    def _write(self, batch: List[Record]) -> None:
+        if not batch:
+            return
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch)
+        fh = self._open()
+        if self.max_bytes and fh.tell() and fh.tell() + len(data.encode("utf-8")) > self.max_bytes:
+            fh = self._rotate()
+        fh.write(data)
+        fh.flush()
+        self.written += len(batch)
+
+    def _open(self):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fh = open(self.path, "a", encoding="utf-8")
+        return self._fh
+
+    def _rotate(self):
+        self._fh.close()
+        self._fh = None
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = self.path.with_name(f"{self.path.name}.{i}")
+                if src.exists():
+                    os.replace(src, self.path.with_name(f"{self.path.name}.{i + 1}"))
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self.rotations += 1
+        return self._open()
+
+
+# ───── Okuma ─────────────────────────────────────────────────────────────
+def journal_files(path: Path | str = REQUEST_JOURNAL_PATH) -> List[Path]:
+    """Günlük ve döndürülmüş kopyaları, eskiden yeniye."""
+    path = Path(path)
+    rotated = sorted(path.parent.glob(f"{path.name}.*"),
+                     key=lambda p: int(p.suffix[1:]) if p.suffix[1:].isdigit() else -1,
+                     reverse=True)
+    files = [p for p in rotated if p.suffix[1:].isdigit()]
+    return files + [path] if path.exists() else files
+
+
+def iter_journal(path: Path | str = REQUEST_JOURNAL_PATH) -> Iterator[Record]:
+    for f in journal_files(path):
+        with open(f, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:        # yarım kalmış son satır
+                    logger.warning("Bozuk günlük satırı atlandı: %s", f)
+
+
+# ───── Süreç genelinde paylaşılan örnek ─────────────────────────────────
+_default: Optional[RequestJournal] = None
+_default_lock = threading.Lock()
+
+
+def get_journal() -> Optional[RequestJournal]:
+    """REQUEST_JOURNAL=0 ise None."""
+    global _default
+    if _default is None and REQUEST_JOURNAL:
+        with _default_lock:
+            if _default is None:
+                _default = RequestJournal()
+                atexit.register(_default.close)
+    return _default
+
+
+# ───── İstek bağlamı ─────────────────────────────────────────────────────
+_current: contextvars.ContextVar[Optional[Record]] = contextvars.ContextVar(
+    "request_journal_record", default=None)
+
+
+@contextmanager
+def journal_request(user_id: str, query: str, **fields: Any) -> Iterator[Record]:
+    """
+    Blok boyunca alt çağrıların `note()` ile doldurduğu kaydı tutar; çıkışta
+    süreyi (ms) ve varsa hata türünü ekleyip günlüğe bırakır.
+    """
+    rec: Record = {"ts": round(time.time(), 3), "user_id": user_id, "query": query,
+                   **fields, "cache": {}}
+    token = _current.set(rec)
+    t0 = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec["error"] = type(e).__name__
+        raise
+    finally:
+        rec["latency_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+        _current.reset(token)
+        journal = get_journal()
+        if journal is not None:
+            journal.record(rec)
+
+
+def note(**fields: Any) -> None:
+    """Aktif istek kaydına alan ekler; günlüklenen bir istek yoksa etkisizdir."""
+    rec = _current.get()
+    if rec is not None:
+        rec.update(fields)
+
+
+def note_cache(name: str, hit: bool) -> None:
+    rec = _current.get()
+    if rec is not None:
+        rec["cache"][name] = hit
@@ -0,0 +1,147 @@
+# resources.py  – süreç genelinde paylaşılan, tembel açılan istemciler
+"""
+OpenAI (senkron + asyncio) istemcileri, Chroma `PersistentClient`'ları ve
+koleksiyonlar ilk kullanımda BİR KEZ açılır ve tüm modüllerce paylaşılır:
+
+• İçe aktarma ucuzdur: `openai` / `chromadb` paketleri bile ilk istemci
+  istendiğinde yüklenir (router.py'yi gerçek veritabanı olmadan import
+  etmek mümkün olur)
+• Aynı dizin için tek `PersistentClient`; router, rag_pipeline ve query
+  aynı SQLite/HNSW dosyalarını ikinci kez belleğe almaz
+• OpenAI istemcileri bağlantı havuzlu tek bir httpx istemcisi kullanır
+• Thread-safe; eşzamanlı ilk çağrılar aynı nesneyi alır
+
+Açılış maliyetini ilk misafir isteğinden önce ödemek için:
+
+    from resources import warmup
+    warmup(collections=[("db/hotel_db", "hotel_facts")])
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+OPENAI_TIMEOUT_S       = float(os.getenv("OPENAI_TIMEOUT_S", 60))
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 64))
+OPENAI_KEEPALIVE       = int(os.getenv("OPENAI_KEEPALIVE", 32))   # havuzda açık tutulan bağlantı
+# ────────────────────────────────────────────────────────────────────────
+
+logger = logging.getLogger("Resources")
+
+_lock = threading.RLock()
+_openai: Optional[Any] = None
+_aopenai: Optional[Any] = None
+_chroma: Dict[str, Any] = {}
+_collections: Dict[Tuple[str, str], Any] = {}
+
+
+def _api_key() -> str:
+    import openai
+    key = os.getenv("OPENAI_API_KEY")
+    if not key:
+        from config import load_api_key
+        key = load_api_key()
+    openai.api_key = key                 # modül düzeyi `openai.*` çağrıları da aynı anahtarı görsün
+    return key
+
+
+def _limits():
+    import httpx
+    return httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=OPENAI_KEEPALIVE)
+
+
+# ───── OpenAI ────────────────────────────────────────────────────────────
+def openai_client():
+    """Paylaşılan `OpenAI` istemcisi."""
+    global _openai
+    if _openai is None:
+        with _lock:
+            if _openai is None:
+                from openai import DefaultHttpxClient, OpenAI
+                _openai = OpenAI(api_key=_api_key(), timeout=OPENAI_TIMEOUT_S,
+                                 http_client=DefaultHttpxClient(limits=_limits()))
+    return _openai
+
+
+def async_openai_client():
+    """Paylaşılan `AsyncOpenAI` istemcisi (httpx havuzu event loop'a bağlıdır)."""
+    global _aopenai
+    if _aopenai is None:
+        with _lock:
+            if _aopenai is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                _aopenai = AsyncOpenAI(api_key=_api_key(), timeout=OPENAI_TIMEOUT_S,
+                                       http_client=DefaultAsyncHttpxClient(limits=_limits()))
+    return _aopenai
+
+
+# ───── Chroma ────────────────────────────────────────────────────────────
+def chroma_client(path: Path | str):
+    """Dizin başına tek `PersistentClient` (göreli yollar çözülerek eşlenir)."""
+    key = str(Path(path).resolve())
+    client = _chroma.get(key)
+    if client is None:
+        with _lock:
+            client = _chroma.get(key)
+            if client is None:
+                import chromadb
+                client = _chroma[key] = chromadb.PersistentClient(path=str(path))
+    return client
+
+
+def collection(path: Path | str, name: str, create: bool = True, **kwargs):
+    """
+    Paylaşılan koleksiyon nesnesi. `create=False` → yoksa hata (get_collection).
+    `kwargs` (ör. embedding_function) yalnız ilk açılışta kullanılır.
+    """
+    key = (str(Path(path).resolve()), name)
+    col = _collections.get(key)
+    if col is None:
+        with _lock:
+            col = _collections.get(key)
+            if col is None:
+                client = chroma_client(path)
+                opener = client.get_or_create_collection if create else client.get_collection
+                col = _collections[key] = opener(name=name, **kwargs)
+    return col
+
+
+# ───── Yaşam döngüsü ─────────────────────────────────────────────────────
+def warmup(collections: Iterable[Tuple[Path | str, str]] = (), openai: bool = True,
+           asyncio: bool = False) -> Dict[str, float]:
+    """
+    İstenen kaynakları şimdi açar (ağ isteği atmaz; modeller için bkz.
+    model_registry.warmup) ve adım başına süreyi (ms) döndürür.
+    """
+    steps = []
+    if openai:
+        steps.append(("openai", openai_client))
+    if asyncio:
+        steps.append(("openai_async", async_openai_client))
+    steps += [(f"{Path(p).name}/{n}", lambda p=p, n=n: collection(p, n)) for p, n in collections]
+
+    times: Dict[str, float] = {}
+    for label, open_ in steps:
+        t0 = time.perf_counter()
+        open_()
+        times[label] = (time.perf_counter() - t0) * 1000
+    logger.info("Kaynaklar hazır: %s", ", ".join(f"{k} {v:.0f} ms" for k, v in times.items()))
+    return times
+
+
+def reset() -> None:
+    """Tüm önbellekli istemcileri bırakır; sonraki çağrı yenisini açar."""
+    global _openai, _aopenai
+    with _lock:
+        if _openai is not None:
+            _openai.close()
+        _openai = _aopenai = None
+        _chroma.clear()
+        _collections.clear()
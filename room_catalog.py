@@ -0,0 +1,274 @@
+# room_catalog.py  – kapasite/manzara/banyo sorularına LLM'siz hızlı yol
+"""
+Oda tipleri koleksiyon metadata'sından (maks_kapasite_yetiskin, swim_up,
+manzara, banyo_sayisi, yatak_opsiyonlari_json) bir kez katalog olarak
+çıkarılır. Soru yalnızca bu alanlarla ifade edilebiliyorsa ("4 kişilik deniz
+manzaralı oda var mı?", "swim-up odaların kapasitesi") yanıt şablondan,
+`source_document` atıflarıyla milisaniyenin altında üretilir; soruda katalogun
+bilmediği bir şey kalıyorsa (fiyat, konum, …) ya da sorulan alan (ör. yatak
+seçenekleri) eşleşen odalardan birinde yoksa `answer()` None döner ve RAG
+devam eder.
+
+Hızlı yol payı (rag_pipeline CLI + router trafiği) SQLite sayaçlarında tutulur:
+    python room_catalog.py --stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from lexical_index import tokenize_tr
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+FIELD_CAP_ADULT  = "maks_kapasite_yetiskin"
+FIELD_CAP_CHILD  = "maks_kapasite_cocuk"
+FIELD_SWIM_UP    = "swim_up"
+FIELD_VIEW       = "manzara"
+FIELD_BATHROOMS  = "banyo_sayisi"
+FIELD_BEDS       = "yatak_opsiyonlari_json"
+SEA_VIEWS        = ["Deniz", "Bahçe + Deniz"]
+GOLF_VIEWS       = ["Golf"]
+FAST_PATH_STATS  = Path(os.getenv(
+    "FAST_PATH_STATS",
+    Path(__file__).resolve().parent / ".cache" / "fast_path.sqlite3"))
+# ────────────────────────────────────────────────────────────────────────
+
+# Katalogla yanıtlanabilen sorularda geçebilecek kelimeler (kökleri alınır)
+_STRUCTURED_VOCAB = set(tokenize_tr(
+    "oda odalar odanız odalarınız süit suite villa tip tipi tipleri hangi hangileri "
+    "kaç kişi kişilik kişiye yetişkin en az minimum min banyo banyolu deniz golf "
+    "manzara manzaralı swim-up swim up kapasite kapasitesi yatak yatakları uygun "
+    "olan listele göster misafir bulunan mevcut sahip istiyorum arıyorum lütfen"
+))
+_ASKED = {                              # kısıt ifadeleri çıkarıldıktan sonra aranır
+    "capacity": set(tokenize_tr("kapasite kaç kişi kişilik yetişkin")),
+    "view":     set(tokenize_tr("manzara manzarası")),
+    "bath":     set(tokenize_tr("banyo")),
+    "beds":     set(tokenize_tr("yatak yatakları")),
+}
+
+
+# ───── Kısıtlar (rag_pipeline.extract_filters ile ortak) ──────────────────
+@dataclass
+class Constraints:
+    min_adults: Optional[int] = None
+    swim_up: bool = False
+    views: List[List[str]] = field(default_factory=list)   # her biri ayrı koşul (VE)
+    min_bathrooms: Optional[int] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.min_adults or self.swim_up or self.views or self.min_bathrooms)
+
+    def to_where(self) -> Dict[str, Any]:
+        """Chroma 'where' filtresi (OR/AND yapıları dahil)."""
+        clauses: List[Dict[str, Any]] = []
+        if self.min_adults is not None:
+            clauses.append({
+                "$or": [
+                    {FIELD_CAP_ADULT: {"$gte": self.min_adults}},   # numerik ise
+                    {FIELD_CAP_ADULT: str(self.min_adults)}         # metin ise (eşit)
+                ]
+            })
+        if self.swim_up:
+            clauses.append({FIELD_SWIM_UP: True})
+        for views in self.views:
+            clauses.append({FIELD_VIEW: {"$in": views}} if len(views) > 1
+                           else {FIELD_VIEW: views[0]})
+        if self.min_bathrooms is not None:
+            clauses.append({FIELD_BATHROOMS: {"$gte": self.min_bathrooms}})
+        if not clauses:
+            return {}
+        return {"$and": clauses} if len(clauses) > 1 else clauses[0]
+
+    def matches(self, meta: Dict[str, Any]) -> bool:
+        if self.min_adults is not None:
+            cap = meta.get(FIELD_CAP_ADULT)
+            if not ((isinstance(cap, (int, float)) and not isinstance(cap, bool)
+                     and cap >= self.min_adults) or cap == str(self.min_adults)):
+                return False
+        if self.swim_up and meta.get(FIELD_SWIM_UP) is not True:
+            return False
+        if any(meta.get(FIELD_VIEW) not in views for views in self.views):
+            return False
+        if self.min_bathrooms is not None:
+            baths = meta.get(FIELD_BATHROOMS)
+            if not isinstance(baths, (int, float)) or baths < self.min_bathrooms:
+                return False
+        return True
+
+
+_CONSTRAINT_PHRASES = re.compile(
+    r"\d+\s*(?:kişilik|yetişkin)|swim[- ]up|(?:deniz|golf) manzaralı"
+    r"|(?:en az|min(?:imum)?)\s*\d+\s*banyo")
+
+
+def parse_constraints(question: str) -> Constraints:
+    q = question.lower()
+    c = Constraints()
+    if m := re.search(r'(\d+)\s*(kişilik|yetişkin)', q):
+        c.min_adults = int(m.group(1))
+    if "swim-up" in q or "swim up" in q:
+        c.swim_up = True
+    if "deniz manzaralı" in q:
+        c.views.append(SEA_VIEWS)
+    if "golf manzaralı" in q:
+        c.views.append(GOLF_VIEWS)
+    if m := re.search(r'(en az|min(?:imum)?)\s*(\d+)\s*banyo', q):
+        c.min_bathrooms = int(m.group(2))
+    return c
+
+
+# ───── Katalog ───────────────────────────────────────────────────────────
+@dataclass(slots=True)
+class Room:
+    oda_tipi: str
+    meta: Dict[str, Any]
+    source_document: str
+
+    def describe(self, asked: set) -> Optional[str]:
+        """Sorulan alanlardan biri bu odada yoksa None (yanıt RAG'a bırakılır)."""
+        m = self.meta
+        parts = []
+        if not asked or "capacity" in asked:
+            cap = f"{m.get(FIELD_CAP_ADULT, '?')} yetişkin"
+            if m.get(FIELD_CAP_CHILD):
+                cap += f" + {m[FIELD_CAP_CHILD]} çocuk"
+            parts.append(cap)
+        if not asked or "view" in asked:
+            if m.get(FIELD_VIEW):
+                parts.append(f"{m[FIELD_VIEW]} manzaralı")
+            elif asked:
+                return None
+        if not asked or "bath" in asked:
+            if m.get(FIELD_BATHROOMS) is not None:
+                parts.append(f"{m[FIELD_BATHROOMS]} banyo")
+            elif asked:
+                return None
+        if not asked and m.get(FIELD_SWIM_UP):
+            parts.append("swim-up")
+        if "beds" in asked:
+            if not (beds := _beds_text(m.get(FIELD_BEDS))):
+                return None
+            parts.append(beds)
+        return ", ".join(parts)
+
+
+def _beds_text(raw: Optional[str]) -> str:
+    try:
+        return " / ".join(
+            f"{opt['opsiyon_adi']}: " +
+            ", ".join(f"{y['adet']}×{y['boyut']}" for y in opt["yataklar"])
+            for opt in json.loads(raw))
+    except Exception:
+        return ""
+
+
+class RoomCatalog:
+    def __init__(self, rooms: List[Room]):
+        self.rooms = rooms
+
+    @classmethod
+    def from_metadatas(cls, metas: List[Dict[str, Any]]) -> "RoomCatalog":
+        seen: Dict[str, Room] = {}
+        for m in metas:
+            if m and m.get("oda_tipi") and m.get(FIELD_CAP_ADULT) is not None:
+                seen.setdefault(m["oda_tipi"], Room(m["oda_tipi"], dict(m),
+                                                    m.get("source_document", "?")))
+        return cls(list(seen.values()))
+
+    @classmethod
+    def from_collection(cls, col) -> "RoomCatalog":
+        return cls.from_metadatas(col.get(include=["metadatas"])["metadatas"])
+
+    def save(self, path: Path | str, version: str = "") -> None:
+        rows = [r.meta for r in self.rooms]
+        Path(path).write_text(json.dumps({"version": version, "rooms": rows},
+                                         ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path | str) -> Tuple["RoomCatalog", str]:
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls.from_metadatas(data["rooms"]), data["version"]
+
+    # ── Hızlı yol ───────────────────────────────────────────────────────
+    def answer(self, question: str) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+        """(yanıt, kaynaklar) ya da soru tamamen yapısal değilse None."""
+        if not self.rooms:
+            return None
+        c = parse_constraints(question)
+        tokens = tokenize_tr(question)
+        if not c or any(t not in _STRUCTURED_VOCAB and not t.isdigit() for t in tokens):
+            return None
+        rest = set(tokenize_tr(_CONSTRAINT_PHRASES.sub(" ", question.lower())))
+        asked = {k for k, vocab in _ASKED.items() if vocab & rest}
+        matches = [r for r in self.rooms if c.matches(r.meta)]
+        if not matches:
+            return ("Bu kriterlere uyan bir oda tipimiz bulunmuyor.", [])
+
+        descriptions = [r.describe(asked) for r in matches]
+        if any(d is None for d in descriptions):     # ör. yatak bilgisi katalogda yok
+            return None
+        sources, lines, by_doc = [], [], {}
+        for r, desc in zip(matches, descriptions):
+            if r.source_document not in by_doc:
+                by_doc[r.source_document] = len(sources) + 1
+                sources.append({"n": by_doc[r.source_document], "oda_tipi": "Oda tablosu",
+                                "source_document": r.source_document})
+            lines.append(f"• {r.oda_tipi}: {desc} [{by_doc[r.source_document]}]")
+        head = f"Kriterlere uyan {len(matches)} oda tipimiz var:"
+        return head + "\n" + "\n".join(lines), sources
+
+
+def catalog_path(persist_dir: Path | str, collection_name: str) -> Path:
+    return Path(persist_dir) / f"{collection_name}.rooms.json"
+
+
+def load_or_build(col, persist_dir: Path | str, version: str = "") -> RoomCatalog:
+    """Kayıtlı katalog koleksiyon sürümüyle uyuşmuyorsa metadata'dan yeniden kurar."""
+    path = catalog_path(persist_dir, col.name)
+    if path.exists():
+        catalog, saved = RoomCatalog.load(path)
+        if saved == version:
+            return catalog
+    catalog = RoomCatalog.from_collection(col)
+    catalog.save(path, version)
+    return catalog
+
+
+# ───── Hızlı yol payı ────────────────────────────────────────────────────
+def record_path(path: str, stats_path: Path | str = FAST_PATH_STATS) -> None:
+    """`path`: "fast" (katalog) veya "rag"."""
+    Path(stats_path).parent.mkdir(parents=True, exist_ok=True)
+    with sqlite3.connect(str(stats_path), timeout=30) as db:
+        db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        db.execute("INSERT INTO counters(name, value) VALUES (?, 1)"
+                   " ON CONFLICT(name) DO UPDATE SET value = value + 1", (path,))
+
+
+def fast_path_stats(stats_path: Path | str = FAST_PATH_STATS) -> Dict[str, float]:
+    c: Dict[str, int] = {}
+    if Path(stats_path).exists():
+        with sqlite3.connect(str(stats_path), timeout=30) as db:
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            c = dict(db.execute("SELECT name, value FROM counters").fetchall())
+    fast, rag = c.get("fast", 0), c.get("rag", 0)
+    return {"fast": fast, "rag": rag, "share": fast / (fast + rag) if fast + rag else 0.0}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Oda kataloğu hızlı yolu")
+    ap.add_argument("--stats", action="store_true", help="Hızlı yol payı")
+    args = ap.parse_args()
+    if args.stats:
+        print(json.dumps(fast_path_stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,433 @@
 from chains.booking_dialog import handle_booking_intent
 
+import asyncio
+import contextvars
+import re
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-import chromadb, openai, json
+import json
 from tenacity import retry, wait_random_exponential, stop_after_attempt
 
-from config import load_api_key
-from chains.rag_hotel import answer_hotel
+from embedding_cache import cached_embed, acached_embed, normalize_tr
+from embed_batcher import EmbeddingBatcher
+from embedding_dims import collection_dims, reduce
+from hotel_rag import MAX_TOKENS_OUT, RagRequest, rag_request
+from intent_classifier import IntentIndex
+from answer_stream import AnswerStream, stream_answer
+from metrics import REGISTRY, count_retries, maybe_start_http_server, record_usage, span
+from model_registry import warmup as model_warmup
+from request_journal import journal_request, note, note_cache
+from resources import async_openai_client, collection, openai_client
+from resources import warmup as resource_warmup
+from room_catalog import RoomCatalog, load_or_build as load_room_catalog, record_path
+from semantic_cache import SEMANTIC_CACHE_ENABLED, SemanticAnswerCache, collection_version
+from session_manager import peek_state, clear_state
 from chains.booking_api import handle_booking
 from chains.small_talk import respond_small_talk
 from chains.ticket_system import create_ticket
-import openai
-from openai import OpenAI
 
-openai.api_key = load_api_key()
-client = OpenAI()
 EMBED_MODEL = "text-embedding-3-large"
+LLM_MODEL   = "gpt-4o-mini"
+INTENT_MODE = "majority"     # "chroma" | "majority" | "weighted" | "centroid"
+EMBED_BATCH_WINDOW_MS = 10   # eşzamanlı embed çağrılarını biriktirme penceresi
+EMBED_BATCH_MAX       = 256  # bir istekte en fazla metin
+CHROMA_WORKERS  = 8          # arouter: eşzamanlı Chroma çağrısı sınırı
+HANDLER_WORKERS = 32         # arouter: eşzamanlı (senkron) handler sınırı
 
-# -- Chroma istemcileri -------------------------------------------------
-intent_db  = chromadb.PersistentClient(path="db/intent_db")
-hotel_db   = chromadb.PersistentClient(path="db/hotel_db")
-booking_db = chromadb.PersistentClient(path="db/booking_db")
+# -- Paylaşılan kaynaklar -------------------------------------------------
+# OpenAI ve Chroma istemcileri import sırasında değil ilk kullanımda açılır
+# (bkz. resources.py); sunucu açılışında `warmup()` çağrılmalı.
+COLLECTIONS = {
+    "intent_col":  ("db/intent_db", "user_intents"),
+    "hotel_col":   ("db/hotel_db", "hotel_facts"),
+    "booking_col": ("db/booking_db", "booking_logs"),
+}
 
-intent_col  = intent_db.get_or_create_collection("user_intents")
-hotel_col   = hotel_db.get_or_create_collection("hotel_facts")
-booking_col = booking_db.get_or_create_collection("booking_logs")
+def intent_collection():
+    return collection(*COLLECTIONS["intent_col"])
 
-@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6))
-def embed(texts: list[str]) -> list[list[float]]:
+def hotel_collection():
+    return collection(*COLLECTIONS["hotel_col"])
+
+def booking_collection():
+    return collection(*COLLECTIONS["booking_col"])
+
+def __getattr__(name: str):
+    """Eski modül düzeyi adlar (`router.client`, `router.hotel_col` …) tembel çözülür."""
+    if name == "client":
+        return openai_client()
+    if name == "aclient":
+        return async_openai_client()
+    if name in COLLECTIONS:
+        return collection(*COLLECTIONS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6),
+       before_sleep=count_retries("embed"))
+def _embed_remote(texts: list[str]) -> list[list[float]]:
     """OpenAI 1.x uyumlu embedding üretir."""
-    resp = client.embeddings.create(model=EMBED_MODEL, input=texts)
+    with span("embed_remote", n=len(texts)):
+        resp = openai_client().embeddings.create(model=EMBED_MODEL, input=texts)
+    record_usage(EMBED_MODEL, resp.usage, embedding=True)
     return [obj.embedding for obj in resp.data]
 
-def predict_intent(query: str, k=5) -> str:
-    vec = embed([query])[0]
-    res = intent_col.query(query_embeddings=[vec], n_results=k, include=["metadatas"])
+embed_batcher = EmbeddingBatcher(_embed_remote, window_ms=EMBED_BATCH_WINDOW_MS,
+                                 max_batch=EMBED_BATCH_MAX)
+REGISTRY.register("embed_batch_size", "Mikro-batch başına metin sayısı", embed_batcher.batch_sizes)
+REGISTRY.register("embed_queue_wait_ms", "Mikro-batch kuyruğunda bekleme (ms)",
+                  embed_batcher.queue_wait_ms)
+
+def embed(texts: list[str], dims: int | None = None) -> list[list[float]]:
+    """
+    Önbellekte olmayan metinler mikro-batch ile tek istekte embed edilir.
+    `dims`: tam vektör kesilip normalize edilir (bkz. embedding_dims.py);
+    intent ve otel koleksiyonu farklı boyutta olsa da tek istek/önbellek kaydı yeter.
+    """
+    missed = []
+    def fetch(miss):
+        missed.append(len(miss))
+        return embed_batcher.embed(miss)
+    with span("embed", n=len(texts)):
+        vecs = cached_embed(texts, EMBED_MODEL, fetch)
+    note_cache("embedding", not missed)
+    return reduce(vecs, dims)
+
+_intent_index: IntentIndex | None = None
+
+def get_intent_index() -> IntentIndex:
+    """Intent vektörlerini ilk çağrıda bir kez belleğe alır."""
+    global _intent_index
+    if _intent_index is None:
+        _intent_index = IntentIndex.from_collection(intent_collection())
+    return _intent_index
+
+_UNRESOLVED = object()
+_intent_dims: int | None | object = _UNRESOLVED
+
+def intent_dims() -> int | None:
+    """`user_intents`'in ingest boyutu (None: modelin tam boyutu); ilk çağrıda bir kez okunur."""
+    global _intent_dims
+    if _intent_dims is _UNRESOLVED:
+        _intent_dims = collection_dims(intent_collection())
+    return _intent_dims
+
+def reload_intent_index() -> None:
+    """`user_intents` yeniden ingest edildiğinde çağrılmalı."""
+    global _intent_index, _intent_dims
+    _intent_index = None
+    _intent_dims = _UNRESOLVED
+
+def warmup() -> dict:
+    """
+    Süreç açılışında, ilk mesajdan önce bir kez çağrılmalı (`python router.py`
+    döngüsü ve benchmarks/ araçları çağırır; router'ı barındıran sunucu da
+    açılışta çağırmalı): istemcileri ve koleksiyonları açar, modelleri ısıtır,
+    intent vektörlerini ve oda kataloğunu belleğe alır; ilk misafir bu
+    gecikmeyi ödemez. Adım başına süre (ms) döner.
+    """
+    maybe_start_http_server()                      # METRICS_PORT ayarlıysa /metrics
+    times = resource_warmup(COLLECTIONS.values(), asyncio=True)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        # Chroma okumaları model ısıtmanın ağ beklemesiyle örtüşür
+        local = [pool.submit(get_intent_index), pool.submit(intent_dims),
+                 pool.submit(get_room_catalog)]
+        times.update(model_warmup(openai_client(), [EMBED_MODEL], [LLM_MODEL]))
+        for f in local:
+            f.result()
+    return times
+
+def predict_intent(query: str, k=5, mode: str = INTENT_MODE) -> str:
+    with span("predict_intent", mode=mode) as sp:
+        vec = embed([query], intent_dims())[0]
+        if mode != "chroma":
+            intent = get_intent_index().predict(vec, k=k, mode=mode)
+        else:
+            intent = _chroma_vote(vec, k)
+        sp.set(intent=intent)
+    return intent
+
+def _chroma_vote(vec: list[float], k: int) -> str:
+    with span("chroma_query", collection="user_intents", n_results=k):
+        res = intent_collection().query(query_embeddings=[vec], n_results=k,
+                                        include=["metadatas"])
     intents = [m["intent"] for m in res["metadatas"][0]]
     return Counter(intents).most_common(1)[0][0]
 
+HOTEL_INTENTS = frozenset({
+    "fiyat_sorgulama", "oda_bilgisi", "yemek_bilgisi", "havalimanı_transferi",
+    "otopark_bilgisi", "yol_tarifi", "adres_bilgisi",
+})
+HOTEL_TOP_K = 4
+NO_RESULT_REPLY = "Bu konuda bilgim yok."
+
+# -- Yapışkan diyalog yönlendirmesi ----------------------------------------
+# Rezervasyon diyaloğu sürerken gelen "2", "2025-07-14" gibi cevaplar
+# sınıflandırıcıya gitmeden doğrudan diyaloğun sıradaki adımına iletilir.
+BOOKING_DIALOG_INTENTS = frozenset({"fiyat_sorgulama", "rezervasyon_oluşturma"})
+# Kaçış ifadesi mesajın tamamı ya da noktalama ile ayrılmış ilk cümleciği
+# olmalı: "iptal politikası nedir?" diyaloğu bitirmez, "vazgeç, havuz kaçta
+# açılıyor?" bitirip soruyu yeniden sınıflandırır. ("çıkış" check-out demek
+# olduğundan kaçış sayılmaz.)
+ESCAPE_PHRASES = ("iptal", "vazgeç", "vazgectim", "vazgeçtim", "ana menü", "baştan başla")
+_ESCAPE = re.compile(r"(?:%s)(?P<rest>\s*[.!,;:]+.*|\s*)" % "|".join(map(re.escape, ESCAPE_PHRASES)))
+CANCELLED_REPLY = "Rezervasyon işlemini iptal ettim. Başka nasıl yardımcı olabilirim?"
+# Adım cevabı mesajın tamamıyla eşleşmeli; `a` grubu diyaloğa iletilir
+# ("çıkış 2025-07-20" → "2025-07-20").
+_DATE = r"(?P<a>\d{4}-\d{2}-\d{2}|\d{1,2}[./]\d{1,2}[./]\d{2,4})"
+_STEP_ANSWER = {
+    "date_in":  re.compile(r"(?:giriş(?: tarihi)?:?\s*)?" + _DATE + r"[.!]?"),
+    "date_out": re.compile(r"(?:çıkış(?: tarihi)?:?\s*)?" + _DATE + r"[.!]?"),
+    "rooms":    re.compile(r"(?P<a>\d+)(?: oda)?[.!]?"),
+    "adults":   re.compile(r"(?P<a>\d+)(?: (?:kişi|yetişkin))?[.!]?"),
+    "child":    re.compile(r"(?P<a>[\d\s,]+|yok|hayır)[.!]?"),
+}
+ROUTING_STATS = Counter()   # classifier_calls / classifier_skipped / dialog_escapes
+                            # hotel_fast_path / hotel_rag
+                            # semantic_hits / semantic_misses / semantic_saved_ms
+
+def sticky_reply(user_id: str, query: str) -> str | None:
+    """
+    Aktif `BookingState` varsa mesajı diyaloğa iletir ve yanıtı döndürür.
+    None → mesaj normal intent sınıflandırmasından geçmeli.
+    """
+    st = peek_state(user_id)
+    if st is None:
+        ROUTING_STATS["classifier_calls"] += 1
+        return None
+
+    msg = normalize_tr(query)
+    if (esc := _ESCAPE.fullmatch(msg)) is not None:
+        clear_state(user_id)
+        ROUTING_STATS["dialog_escapes"] += 1
+        if not esc["rest"].strip(" .!,;:"):
+            note(handler="dialog_escape", sticky=True)
+            return CANCELLED_REPLY
+        ROUTING_STATS["classifier_calls"] += 1
+        return None              # "vazgeç, havuz kaçta açılıyor?" → yeniden sınıflandır
+
+    pattern = _STEP_ANSWER.get(st.step)
+    if pattern is not None and (ans := pattern.fullmatch(msg)) is not None:
+        ROUTING_STATS["classifier_skipped"] += 1
+        note(handler="booking_dialog", sticky=True)
+        reply, done = handle_booking_intent(user_id, ans["a"].strip())
+        return reply
+
+    ROUTING_STATS["classifier_calls"] += 1     # diyalog dışı bir soru olabilir
+    return None
+
+def routing_stats() -> dict:
+    """Sınıflandırıcıya giden / diyalog sayesinde atlanan mesaj sayıları."""
+    stats = dict(ROUTING_STATS)
+    total = stats.get("classifier_calls", 0) + stats.get("classifier_skipped", 0)
+    stats["skip_rate"] = stats.get("classifier_skipped", 0) / total if total else 0.0
+    hotel = stats.get("hotel_fast_path", 0) + stats.get("hotel_rag", 0)
+    stats["fast_path_share"] = stats.get("hotel_fast_path", 0) / hotel if hotel else 0.0
+    looked = stats.get("semantic_hits", 0) + stats.get("semantic_misses", 0)
+    stats["semantic_hit_rate"] = stats.get("semantic_hits", 0) / looked if looked else 0.0
+    return stats
+
+_room_catalog: RoomCatalog | None = None
+
+def get_room_catalog() -> RoomCatalog:
+    """
+    Oda kataloğunu ilk çağrıda bir kez yükler: ingest'in yazdığı
+    `<koleksiyon>.rooms.json` koleksiyon sürümüyle uyuşuyorsa o, değilse
+    `hotel_col` metadata'sından yeniden kurulur.
+    """
+    global _room_catalog
+    if _room_catalog is None:
+        col = hotel_collection()
+        _room_catalog = load_room_catalog(col, Path(COLLECTIONS["hotel_col"][0]),
+                                          collection_version(col))
+    return _room_catalog
+
+def reload_room_catalog() -> None:
+    """`hotel_facts` yeniden ingest edildiğinde çağrılmalı."""
+    global _room_catalog
+    _room_catalog = None
+
+_semantic_cache: SemanticAnswerCache | None = None
+SEMANTIC_LOOKUPS  = REGISTRY.counter("router_semantic_cache_total",
+                                     "Otel RAG anlamsal önbellek bakışları", ("result",))
+SEMANTIC_SAVED_MS = REGISTRY.counter("router_semantic_cache_saved_ms_total",
+                                     "İsabetlerde atlanan LLM süresi (ms, kayıt anındaki ölçüm)")
+
+def get_semantic_cache() -> SemanticAnswerCache | None:
+    """Otel RAG'inin anlamsal yanıt önbelleği (CLI ile aynı SQLite); SEMANTIC_CACHE=0 kapatır."""
+    global _semantic_cache
+    if _semantic_cache is None and SEMANTIC_CACHE_ENABLED:
+        _semantic_cache = SemanticAnswerCache()
+    return _semantic_cache
+
+# Kalıcı hızlı yol sayaçları (`python room_catalog.py --stats`, CLI ile ortak
+# SQLite) tek bir arka plan thread'inde yazılır; istek yolu diske beklemez.
+_stats_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fast-path-stats")
+
+def hotel_fast_path(query: str):
+    """Kapasite/manzara/banyo soruları → (şablon yanıt, kaynaklar); değilse None."""
+    fast = get_room_catalog().answer(query)
+    path = "hotel_fast_path" if fast else "hotel_rag"
+    ROUTING_STATS[path] += 1
+    note(handler=path)
+    _stats_pool.submit(record_path, "fast" if fast else "rag")
+    return fast
+
+# -- asyncio yolu ---------------------------------------------------------
+_chroma_pool  = ThreadPoolExecutor(max_workers=CHROMA_WORKERS, thread_name_prefix="chroma")
+_handler_pool = ThreadPoolExecutor(max_workers=HANDLER_WORKERS, thread_name_prefix="handler")
+
+@retry(wait=wait_random_exponential(min=1, max=60), stop=stop_after_attempt(6),
+       before_sleep=count_retries("aembed"))
+async def _aembed_remote(texts: list[str]) -> list[list[float]]:
+    with span("embed_remote", n=len(texts)):
+        resp = await async_openai_client().embeddings.create(model=EMBED_MODEL, input=texts)
+    record_usage(EMBED_MODEL, resp.usage, embedding=True)
+    return [obj.embedding for obj in resp.data]
+
+async def aembed(texts: list[str], dims: int | None = None) -> list[list[float]]:
+    """
+    `embed`'in asyncio sürümü. Mikro-batch açıksa ıskalamalar senkron
+    çağıranlarla aynı batch'lere katılır; kapalıysa AsyncOpenAI ile gider.
+    """
+    remote = embed_batcher.aembed if EMBED_BATCH_WINDOW_MS > 0 else _aembed_remote
+    missed = []
+    async def afetch(miss):
+        missed.append(len(miss))
+        return await remote(miss)
+    with span("embed", n=len(texts)):
+        vecs = await acached_embed(texts, EMBED_MODEL, afetch)
+    note_cache("embedding", not missed)
+    return reduce(vecs, dims)
+
+async def apredict_intent(query: str, k=5, mode: str = INTENT_MODE) -> str:
+    with span("predict_intent", mode=mode) as sp:
+        loop = asyncio.get_running_loop()
+        dims = (_intent_dims if _intent_dims is not _UNRESOLVED     # koleksiyon açılışı loop dışında
+                else await loop.run_in_executor(_chroma_pool, intent_dims))
+        vec = (await aembed([query], dims))[0]
+        if mode != "chroma":
+            index = _intent_index or await loop.run_in_executor(_chroma_pool, get_intent_index)
+            intent = index.predict(vec, k=k, mode=mode)
+        else:
+            intent = await loop.run_in_executor(_chroma_pool, partial(_chroma_vote, vec, k))
+        sp.set(intent=intent)
+    return intent
+
 def router(user_id: str, query: str) -> str:
-    intent = predict_intent(query)
+    with journal_request(user_id, query, mode="sync") as rec:
+        if (reply := sticky_reply(user_id, query)) is not None:
+            return reply
+        rec["intent"] = intent = predict_intent(query)
+        return route_intent(user_id, intent, query)
 
-    if intent in {"fiyat_sorgulama", "rezervasyon_oluşturma"}:
+def route_intent(user_id: str, intent: str, query: str) -> str:
+    if intent in BOOKING_DIALOG_INTENTS:
+        note(handler="booking_dialog")
         reply, done = handle_booking_intent(user_id, query)
         return reply
+    return dispatch(intent, query)
+
+def router_stream(user_id: str, query: str) -> AnswerStream:
+    """
+    `router`'ın akışlı sürümü: otel bilgisi soruları token token gelir,
+    diğer intent'lerin hazır yanıtı tek parça akış olarak döner. Günlükteki
+    süre akış nesnesi hazır olana kadardır (token'lar hariç).
+    """
+    with journal_request(user_id, query, mode="stream") as rec:
+        if (reply := sticky_reply(user_id, query)) is not None:
+            return AnswerStream.from_text(reply)
+        rec["intent"] = intent = predict_intent(query)
+        if intent in HOTEL_INTENTS and intent not in BOOKING_DIALOG_INTENTS:
+            return stream_hotel_answer(query)
+        return AnswerStream.from_text(route_intent(user_id, intent, query))
+
+def hotel_rag_request(query: str, k: int = HOTEL_TOP_K,
+                      sem_cache: SemanticAnswerCache | None = None) -> RagRequest:
+    """
+    Otel RAG'inin retrieval + prompt kurucusu. CLI ile aynı yol
+    (`hotel_rag.rag_request`): yerel filtre, BM25 + vektör RRF, anlamsal
+    önbellek (filtre kapsamında), token bütçeli bağlam; sonuç yoksa
+    `messages` boş döner.
+    """
+    col = hotel_collection()
+    dims = collection_dims(col)
+    return rag_request(col, Path(COLLECTIONS["hotel_col"][0]), query,
+                       lambda texts: embed(texts, dims), top_k=k, sem_cache=sem_cache)
+
+def stream_hotel_answer(query: str, k: int = HOTEL_TOP_K) -> AnswerStream:
+    """Katalog hızlı yolu, anlamsal önbellek ya da RAG; yalnız son LLM yanıtı akıtılır."""
+    if fast := hotel_fast_path(query):
+        return AnswerStream.from_text(*fast)
+    req = hotel_rag_request(query, k, get_semantic_cache())
+    if req.cache is not None:                       # önbelleğe bakıldı (BM25 yolunda bakılmaz)
+        ROUTING_STATS["semantic_hits" if req.hit else "semantic_misses"] += 1
+        SEMANTIC_LOOKUPS.inc("hit" if req.hit else "miss")
+        note_cache("semantic", req.hit is not None)
+    if req.hit:
+        ROUTING_STATS["semantic_saved_ms"] += req.hit.llm_ms
+        SEMANTIC_SAVED_MS.inc(amount=req.hit.llm_ms)
+        return AnswerStream.from_text(req.hit.answer, req.hit.sources)
+    if not req.messages:
+        return AnswerStream.from_text(NO_RESULT_REPLY)
+    stream = stream_answer(openai_client(), req.messages, req.sources, model=LLM_MODEL,
+                           temperature=0.1, max_tokens=MAX_TOKENS_OUT)
+    note_cache("completion", stream.cached)
+    stream.add_done_callback(req.remember)          # yanıt tamamlanınca önbelleğe
+    return stream
 
+def answer_hotel_question(query: str, k: int = HOTEL_TOP_K) -> str:
+    """`stream_hotel_answer`'ın tamamı; senkron yollar aynı yanıtı verir."""
+    return "".join(stream_hotel_answer(query, k))
 
+async def arouter(user_id: str, query: str) -> str:
+    """
+    `router`'ın asyncio sürümü: embedding ve Chroma çağrıları event loop'u
+    bloklamaz; handler'lar sınırlı bir thread havuzunda çalışır.
+    """
+    with journal_request(user_id, query, mode="async") as rec:
+        loop = asyncio.get_running_loop()
+        # Bağlam kopyası: handler thread'indeki note() çağrıları aynı kayda yazar.
+        # Diyalog kontrolü de (Redis peek + adım yazımı) loop dışında çalışır.
+        reply = await loop.run_in_executor(_handler_pool, contextvars.copy_context().run,
+                                           sticky_reply, user_id, query)
+        if reply is not None:
+            return reply
+        rec["intent"] = intent = await apredict_intent(query)
+        return await loop.run_in_executor(_handler_pool, contextvars.copy_context().run,
+                                          route_intent, user_id, intent, query)
 
-def router(query: str) -> str:
-    intent = predict_intent(query)
+def dispatch(intent: str, query: str) -> str:
+    """Intent → handler tablosu; `router` ve `arouter` ortak kullanır."""
     match intent:
         case "selamla" | "veda" | "teşekkür":
+            note(handler="small_talk")
             return respond_small_talk(intent)
         case "yardım":
+            note(handler="small_talk")
             return respond_small_talk(intent, query)
         case "rezervasyon_oluşturma" | "rezervasyon_değiştirme" | "rezervasyon_iptali":
+            note(handler="booking_api")
             return handle_booking(intent, query)
         case "rezervasyon_durumu":
+            note(handler="booking_api")
             return handle_booking(intent, query, check_only=True)
-        case ("fiyat_sorgulama" | "oda_bilgisi" | "yemek_bilgisi" |
-              "havalimanı_transferi" | "otopark_bilgisi" |
-              "yol_tarifi" | "adres_bilgisi"):
-            return answer_hotel(query, hotel_col)
+        case _ if intent in HOTEL_INTENTS:
+            return answer_hotel_question(query)
         case "şikayet" | "geri_bildirim":
+            note(handler="ticket")
             return create_ticket(query)
         case _:
+            note(handler="fallback")
             return "Üzgünüm, sorununuzu anlayamadım. Biraz daha ayrıntı verebilir misiniz?"
 
 # CLI test
 if __name__ == "__main__":
+    warmup()
     while True:
         q = input("👤> ")
-        print("🤖", router(q))
+        print("🤖", end=" ", flush=True)
+        for token in router_stream("cli", q):
+            print(token, end="", flush=True)
+        print()
@@ -0,0 +1,196 @@
+# semantic_cache.py  – otel SSS'leri için anlamsal yanıt önbelleği
+"""
+Yeni bir sorunun embedding'i, daha önce yanıtlanmış bir soruya kosinüs
+benzerliği `threshold` üzerindeyse kayıtlı yanıt doğrudan döner; retrieval
+ve LLM çağrısı yapılmaz.
+
+• Kapsam   : `extract_filters` sonucu (JSON) – "deniz manzaralı" ile
+             "golf manzaralı" soruları asla çakışmaz.
+• Geçerlilik: koleksiyon sürümü (`collection_version`) değişince – yani
+             `cullinan_hotel_facts` yeniden ingest edilince – eski kayıtlar silinir.
+• Depolama : SQLite (süreçler arası kalıcı), arama: kapsam başına NumPy matris.
+
+İstatistik:
+    python semantic_cache.py --stats
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# ─────────── Ayarlar ────────────────────────────────────────────────────
+SEMANTIC_CACHE_PATH = Path(os.getenv(
+    "SEMANTIC_CACHE_PATH",
+    Path(__file__).resolve().parent / ".cache" / "semantic_answers.sqlite3"))
+SEMANTIC_THRESHOLD  = float(os.getenv("SEMANTIC_THRESHOLD", 0.95))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "1") != "0"     # router; CLI'da --no-cache
+MAX_PER_SCOPE       = 5000              # kapsam başına en fazla kayıt (eskiler silinir)
+# ────────────────────────────────────────────────────────────────────────
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: List[Dict[str, Any]]
+    similarity: float
+    llm_ms: float
+
+
+def scope_key(filters: Dict[str, Any]) -> str:
+    """Filtre sözlüğünün kanonik JSON'u; aynı filtre → aynı kapsam."""
+    return json.dumps(filters or {}, sort_keys=True, ensure_ascii=False)
+
+
+def collection_version(col) -> str:
+    """
+    Koleksiyon kimliği + içerik sürümü. Tam yeniden ingest yeni bir koleksiyon
+    kimliği üretir; artımlı ingest `content_version` metadata'sını artırır.
+    """
+    return f"{col.id}:{(col.metadata or {}).get('content_version', 0)}"
+
+
+class SemanticAnswerCache:
+    def __init__(self, path: Path | str = SEMANTIC_CACHE_PATH,
+                 threshold: float = SEMANTIC_THRESHOLD):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                collection TEXT NOT NULL, version TEXT NOT NULL, scope TEXT NOT NULL,
+                question TEXT NOT NULL, vector BLOB NOT NULL,
+                answer TEXT NOT NULL, sources TEXT NOT NULL,
+                llm_ms REAL NOT NULL, created REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS answers_scope ON answers(collection, version, scope);
+            CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value REAL NOT NULL);
+        """)
+        # (collection, version, scope) → (birim vektör matrisi, satır id'leri)
+        self._scopes: Dict[Tuple[str, str, str], Tuple[np.ndarray, List[int]]] = {}
+        self._checked_versions: Dict[str, str] = {}
+
+    # ── Arama ───────────────────────────────────────────────────────────
+    def lookup(self, vec: Sequence[float], collection: str, version: str,
+               scope: str) -> Optional[CachedAnswer]:
+        q = _unit(vec)
+        with self._lock:
+            self._invalidate_stale(collection, version)
+            mat, ids = self._load_scope(collection, version, scope)
+            if not ids:
+                self._count(misses=1)
+                return None
+            sims = mat @ q
+            best = int(sims.argmax())
+            if sims[best] < self.threshold:
+                self._count(misses=1)
+                return None
+            row = self._db.execute(
+                "SELECT question, answer, sources, llm_ms FROM answers WHERE id=?",
+                (ids[best],)).fetchone()
+            if row is None:                     # başka süreç sildiyse
+                self._scopes.pop((collection, version, scope), None)
+                self._count(misses=1)
+                return None
+            self._count(hits=1, saved_llm_ms=row[3])
+        return CachedAnswer(row[0], row[1], json.loads(row[2]), float(sims[best]), row[3])
+
+    def store(self, vec: Sequence[float], question: str, answer: str,
+              sources: List[Dict[str, Any]], llm_ms: float,
+              collection: str, version: str, scope: str) -> None:
+        q = _unit(vec)
+        with self._lock:
+            cur = self._db.execute(
+                "INSERT INTO answers(collection, version, scope, question, vector,"
+                " answer, sources, llm_ms, created) VALUES (?,?,?,?,?,?,?,?,?)",
+                (collection, version, scope, question, q.tobytes(), answer,
+                 json.dumps(sources, ensure_ascii=False), llm_ms, time.time()))
+            self._db.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers"
+                " WHERE collection=? AND version=? AND scope=?"
+                " ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (collection, version, scope, MAX_PER_SCOPE))
+            key = (collection, version, scope)
+            if key in self._scopes:
+                mat, ids = self._scopes[key]
+                mat = np.vstack([mat, q[None, :]]) if ids else q[None, :]
+                self._scopes[key] = (mat, ids + [cur.lastrowid])
+
+    # ── İç yardımcılar ──────────────────────────────────────────────────
+    def _invalidate_stale(self, collection: str, version: str) -> None:
+        if self._checked_versions.get(collection) == version:
+            return
+        self._db.execute("DELETE FROM answers WHERE collection=? AND version!=?",
+                         (collection, version))
+        self._scopes = {k: v for k, v in self._scopes.items()
+                        if k[0] != collection or k[1] == version}
+        self._checked_versions[collection] = version
+
+    def _load_scope(self, collection: str, version: str, scope: str):
+        key = (collection, version, scope)
+        if key not in self._scopes:
+            rows = self._db.execute(
+                "SELECT id, vector FROM answers WHERE collection=? AND version=? AND scope=?"
+                " ORDER BY id", key).fetchall()
+            ids = [r[0] for r in rows]
+            mat = (np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+                   if rows else np.zeros((0, 0), dtype=np.float32))
+            self._scopes[key] = (mat, ids)
+        return self._scopes[key]
+
+    def _count(self, **deltas: float) -> None:
+        self._db.executemany(
+            "INSERT INTO counters(name, value) VALUES (?, ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            deltas.items())
+
+    # ── Raporlama ───────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            c = dict(self._db.execute("SELECT name, value FROM counters").fetchall())
+            entries = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        hits, misses = c.get("hits", 0), c.get("misses", 0)
+        return {
+            "entries":      entries,
+            "hits":         int(hits),
+            "misses":       int(misses),
+            "hit_rate":     hits / (hits + misses) if hits + misses else 0.0,
+            "saved_llm_ms": round(c.get("saved_llm_ms", 0.0), 1),
+        }
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    return v / max(float(np.linalg.norm(v)), 1e-12)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Anlamsal yanıt önbelleği")
+    ap.add_argument("--stats", action="store_true", help="İsabet oranı ve kazanılan süre")
+    ap.add_argument("--clear", action="store_true", help="Tüm kayıtları sil")
+    args = ap.parse_args()
+
+    cache = SemanticAnswerCache()
+    if args.clear:
+        cache._db.execute("DELETE FROM answers")
+        cache._db.execute("DELETE FROM counters")
+        print(f"🧹 {cache.path} temizlendi.")
+    print(json.dumps(cache.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
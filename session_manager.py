@@ -1,9 +1,40 @@
-# session_manager.py  – mini in-memory state; prod’da Redis önerilir
+# session_manager.py  – rezervasyon diyaloğu state'i; bellek içi veya Redis
+"""
+`get_state` / `peek_state` / `clear_state` / `update_state` çağrıları
+değiştirilebilir bir `SessionStore` arkasında çalışır:
+
+• MemorySessionStore : tek süreç (varsayılan); kilit-şeritli shard'lar,
+                       boşta kalma TTL'i ve en fazla kayıt sınırı (LRU)
+• RedisSessionStore  : birden çok worker; anahtar başına TTL, WATCH/MULTI ile
+                       tek round-trip'lik oku-değiştir-yaz
+
+Seçim ortam değişkeniyle:
+    SESSION_STORE_URL=redis://localhost:6379/0   SESSION_TTL_S=1800
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+SESSION_STORE_URL = os.getenv("SESSION_STORE_URL", "")
+SESSION_TTL_S     = int(os.getenv("SESSION_TTL_S", 30 * 60))   # son mesajdan itibaren
+SESSION_PREFIX    = "booking:"
+SESSION_SHARDS    = 64                                          # 2'nin kuvveti
+SESSION_MAX       = int(os.getenv("SESSION_MAX", 200_000))      # süreç başına oturum
+
+R = TypeVar("R")
+# (mevcut state | None) → (yeni state | None=sil, sonuç)
+Updater = Callable[[Optional["BookingState"]], Tuple[Optional["BookingState"], R]]
+
 
-@dataclass
+@dataclass(slots=True)            # oturum başına ~50 bayt daha az (__dict__ yok)
 class BookingState:
     step: str = "date_in"          # sıradaki alan
     date_in: Optional[str] = None
@@ -12,11 +43,212 @@ class BookingState:
     adults: int = 2
     child_ages: List[int] = field(default_factory=list)
 
-# {user_id: BookingState}
-_SESSIONS: Dict[str, BookingState] = {}
+    # Kompakt biçim: alan adları olmadan sürüm etiketli JSON dizisi
+    # → [1,"rooms","2025-07-01","2025-07-05",1,2,[]]  (~40 bayt)
+    def to_bytes(self) -> bytes:
+        return json.dumps(
+            [1, self.step, self.date_in, self.date_out, self.rooms, self.adults,
+             self.child_ages], separators=(",", ":")).encode()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> Optional["BookingState"]:
+        data = json.loads(raw)
+        if not data or data[0] != 1:   # bilinmeyen sürüm → diyalog yeniden başlar
+            return None
+        return cls(*data[1:])
+
+
+class SessionStore(ABC):
+    """Depo arayüzü; `update` tek kullanıcı için atomik oku-değiştir-yaz yapar."""
+
+    @abstractmethod
+    def get(self, user_id: str) -> Optional[BookingState]: ...
+
+    @abstractmethod
+    def put(self, user_id: str, st: BookingState) -> None: ...
+
+    @abstractmethod
+    def delete(self, user_id: str) -> None: ...
+
+    @abstractmethod
+    def update(self, user_id: str, fn: Updater) -> R: ...
+
+
+class _Shard:
+    __slots__ = ("lock", "items")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # user_id → (son erişim, state); sıra = erişim sırası (baş: en eski)
+        self.items: "OrderedDict[str, Tuple[float, BookingState]]" = OrderedDict()
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Kullanıcı kimliğinin hash'ine göre `shards` parçaya bölünmüş depo; her
+    parçanın kendi kilidi vardır. Erişim sırası tutulduğu için süresi dolmuş
+    kayıtlar hep baştadır: yazma sırasında baştan süpürülür, okumada tek tek
+    kontrol edilir. Parça başına `max_entries / shards` aşılırsa en eski atılır.
+    """
+
+    def __init__(self, shards: int = SESSION_SHARDS, max_entries: int = SESSION_MAX,
+                 idle_ttl_s: float = SESSION_TTL_S, clock: Callable[[], float] = time.monotonic):
+        if shards & (shards - 1):
+            raise ValueError("shards 2'nin kuvveti olmalı")
+        self._shards = [_Shard() for _ in range(shards)]
+        self._mask = shards - 1
+        self._cap = max(1, -(-max_entries // shards))
+        self.idle_ttl_s = idle_ttl_s
+        self._clock = clock
+        self.evicted = 0                # LRU sınırı nedeniyle atılan
+        self.expired = 0                # boşta kalma süresi dolan
+
+    def _shard(self, user_id: str) -> _Shard:
+        return self._shards[hash(user_id) & self._mask]
+
+    def _live(self, sh: _Shard, user_id: str, now: float) -> Optional[BookingState]:
+        item = sh.items.get(user_id)
+        if item is None:
+            return None
+        if now - item[0] > self.idle_ttl_s:
+            del sh.items[user_id]
+            self.expired += 1
+            return None
+        return item[1]
+
+    def _store(self, sh: _Shard, user_id: str, st: BookingState, now: float) -> None:
+        items = sh.items
+        items[user_id] = (now, st)
+        items.move_to_end(user_id)
+        while items:                                    # baştaki süresi dolmuşlar
+            first = next(iter(items.values()))
+            if now - first[0] <= self.idle_ttl_s:
+                break
+            items.popitem(last=False)
+            self.expired += 1
+        while len(items) > self._cap:
+            items.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, user_id: str) -> Optional[BookingState]:
+        sh = self._shard(user_id)
+        with sh.lock:
+            return self._live(sh, user_id, self._clock())
+
+    def put(self, user_id: str, st: BookingState) -> None:
+        sh = self._shard(user_id)
+        with sh.lock:
+            self._store(sh, user_id, st, self._clock())
+
+    def delete(self, user_id: str) -> None:
+        sh = self._shard(user_id)
+        with sh.lock:
+            sh.items.pop(user_id, None)
+
+    def update(self, user_id: str, fn: Updater) -> R:
+        sh = self._shard(user_id)
+        with sh.lock:
+            now = self._clock()
+            new, result = fn(self._live(sh, user_id, now))
+            if new is None:
+                sh.items.pop(user_id, None)
+            else:
+                self._store(sh, user_id, new, now)
+        return result
+
+    def __len__(self) -> int:
+        return sum(len(sh.items) for sh in self._shards)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self), "evicted": self.evicted, "expired": self.expired}
+
+
+class RedisSessionStore(SessionStore):
+    def __init__(self, client, ttl_s: int = SESSION_TTL_S, prefix: str = SESSION_PREFIX,
+                 max_retries: int = 10):
+        self.r = client
+        self.ttl_s = ttl_s
+        self.prefix = prefix
+        self.max_retries = max_retries
+
+    @classmethod
+    def from_url(cls, url: str, **kw) -> "RedisSessionStore":
+        import redis                    # isteğe bağlı bağımlılık: pip install redis
+        return cls(redis.Redis.from_url(url), **kw)
+
+    def _key(self, user_id: str) -> str:
+        return self.prefix + user_id
+
+    def get(self, user_id: str) -> Optional[BookingState]:
+        raw = self.r.get(self._key(user_id))
+        return BookingState.from_bytes(raw) if raw else None
+
+    def put(self, user_id: str, st: BookingState) -> None:
+        self.r.set(self._key(user_id), st.to_bytes(), ex=self.ttl_s)
+
+    def delete(self, user_id: str) -> None:
+        self.r.delete(self._key(user_id))
+
+    def update(self, user_id: str, fn: Updater) -> R:
+        from redis.exceptions import WatchError
+        key = self._key(user_id)
+        with self.r.pipeline() as pipe:
+            for _ in range(self.max_retries):
+                try:
+                    pipe.watch(key)
+                    raw = pipe.get(key)
+                    new, result = fn(BookingState.from_bytes(raw) if raw else None)
+                    pipe.multi()
+                    if new is None:
+                        pipe.delete(key)
+                    else:
+                        pipe.set(key, new.to_bytes(), ex=self.ttl_s)
+                    pipe.execute()
+                    return result
+                except WatchError:      # aynı kullanıcıdan eşzamanlı mesaj → yeniden dene
+                    continue
+        raise RuntimeError(f"Oturum güncellenemedi (yarış): {user_id}")
+
+
+def _default_store() -> SessionStore:
+    if SESSION_STORE_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisSessionStore.from_url(SESSION_STORE_URL)
+    return MemorySessionStore()
+
+
+_STORE: SessionStore = _default_store()
+
+
+def configure_store(store: SessionStore) -> None:
+    """Depoyu çalışma anında değiştirir (benchmark, çoklu worker kurulumu)."""
+    global _STORE
+    _STORE = store
+
+
+def get_store() -> SessionStore:
+    return _STORE
+
 
 def get_state(user_id: str) -> BookingState:
-    return _SESSIONS.setdefault(user_id, BookingState())
+    """
+    State'i döndürür, yoksa oluşturup kaydeder. Redis'te dönen nesne bir
+    kopyadır; kalıcı değişiklik için `save_state` veya `update_state` kullanın.
+    """
+    st = _STORE.get(user_id)
+    if st is None:
+        st = BookingState()
+        _STORE.put(user_id, st)
+    return st
+
+def peek_state(user_id: str) -> Optional[BookingState]:
+    """Aktif diyalog yoksa None döner; yeni state oluşturmaz."""
+    return _STORE.get(user_id)
+
+def save_state(user_id: str, st: BookingState) -> None:
+    _STORE.put(user_id, st)
+
+def update_state(user_id: str, fn: Updater) -> R:
+    return _STORE.update(user_id, fn)
 
 def clear_state(user_id: str):
-    _SESSIONS.pop(user_id, None)
+    _STORE.delete(user_id)
@@ -0,0 +1,35 @@
+# tests/test_context_packer.py  – tekrar bastırma farklı bilgiyi atmamalı
+import pytest
+
+from context_packer import pack_context
+
+
+def render(idx, doc, meta):
+    return f"[{idx}] {doc}"
+
+
+def pack(*docs):
+    return pack_context(list(docs), [{}] * len(docs), render, budget=10_000)
+
+
+@pytest.mark.parametrize("kept, extra", [
+    ("Plaj barında şezlong ve havlu bulunur", "Plaj barında şezlong ve havlu bulunur, ücretli"),
+    ("Açık havuz kış aylarında ısıtmalı hizmet verir",
+     "Açık havuz kış aylarında ısıtmalı hizmet verir, kapalı"),
+])
+def test_one_extra_stem_is_not_a_duplicate(kept, extra):
+    packed = pack(kept, extra)
+    assert packed.docs == [kept, extra] and packed.duplicates == 0
+
+
+def test_swapped_numbers_are_not_a_duplicate():
+    a = "Çocuk politikası: 0-6 yaş ücretsiz, 7-12 yaş %50 indirimli"
+    b = "Çocuk politikası: 0-6 yaş %50 indirimli, 7-12 yaş ücretsiz"
+    assert pack(a, b).docs == [a, b]
+
+
+def test_filler_only_copy_is_a_duplicate():
+    short = "Genel Müdür: Onur Ataç"
+    long = "Cullinan Belek otelinin Genel Müdürü Onur Ataç'tır."
+    assert pack(short, long).docs == [short]
+    assert pack(long, short).docs == [long]
@@ -0,0 +1,20 @@
+# tests/test_dataset_io.py  – JSON→JSONL dönüştürücü
+import json
+
+from dataset_io import convert
+
+
+def test_convert_keeps_last_record_for_repeated_id(tmp_path):
+    src, dst = tmp_path / "data.json", tmp_path / "data.jsonl"
+    src.write_text(json.dumps([
+        {"chunk_id": "a", "text_for_embedding": "eski", "metadata": {}},
+        {"chunk_id": "b", "text_for_embedding": "b", "metadata": {}},
+        {"chunk_id": "a", "text_for_embedding": "yeni", "metadata": {}},
+    ], ensure_ascii=False, indent=1), encoding="utf-8")
+
+    written, errors, dropped = convert(src, dst)
+
+    rows = [json.loads(r) for r in dst.read_text(encoding="utf-8").splitlines()]
+    assert written == 2 and not errors
+    assert {r["chunk_id"]: r["text_for_embedding"] for r in rows} == {"a": "yeni", "b": "b"}
+    assert len(dropped) == 1 and dropped[0].line == 2 and "'a'" in dropped[0].msg
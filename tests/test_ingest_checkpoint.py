@@ -0,0 +1,51 @@
+# tests/test_ingest_checkpoint.py  – checkpoint vektörlerinin korunması
+import pytest
+
+from ingest_checkpoint import HASH_FIELD, IngestCheckpoint, content_hash, plan_incremental
+
+DOC = {"chunk_id": "x", "text_for_embedding": "havuz 08:00'de açılır", "metadata": {}}
+
+
+def test_commit_without_vectors_keeps_saved_vector(tmp_path):
+    path = tmp_path / "ckpt.sqlite3"
+    IngestCheckpoint(path, save_vectors=True).commit([DOC], [[1.0, 2.0]])
+    plain = IngestCheckpoint(path, save_vectors=False)
+    plain.commit([DOC], [[9.0, 9.0]])
+    assert plain.vector("x") == [1.0, 2.0]
+    assert plain.last_chunk_id() == "x"
+
+
+def test_commit_with_changed_content_drops_stale_vector(tmp_path):
+    path = tmp_path / "ckpt.sqlite3"
+    IngestCheckpoint(path, save_vectors=True).commit([DOC], [[1.0, 2.0]])
+    plain = IngestCheckpoint(path, save_vectors=False)
+    plain.commit([{**DOC, "text_for_embedding": "havuz 09:00'da açılır"}])
+    assert plain.vector("x") is None
+
+
+def test_commit_with_vectors_overwrites(tmp_path):
+    ckpt = IngestCheckpoint(tmp_path / "ckpt.sqlite3", save_vectors=True)
+    ckpt.commit([DOC], [[1.0, 2.0]])
+    ckpt.commit([DOC], [[3.0, 4.0]])
+    assert ckpt.vector("x") == [3.0, 4.0]
+    assert len(ckpt.committed()) == 1
+
+
+def test_incremental_plan_is_stable_with_duplicate_ids():
+    chromadb = pytest.importorskip("chromadb")
+    col = chromadb.EphemeralClient().create_collection("plan_test", embedding_function=None)
+    docs = [DOC, {"chunk_id": "y", "text_for_embedding": "otopark ücretsiz", "metadata": {}},
+            {**DOC, "text_for_embedding": "havuz 09:00'da açılır"}]     # "x" tekrar, farklı metin
+
+    def run():
+        new, changed, removed, unchanged = plan_incremental(iter(docs), col)
+        todo = new + changed
+        if todo:
+            col.upsert(ids=[d["chunk_id"] for d in todo], embeddings=[[0.0, 1.0]] * len(todo),
+                       documents=[d["text_for_embedding"] for d in todo],
+                       metadatas=[{HASH_FIELD: content_hash(d)} for d in todo])
+        return len(new), len(changed), len(removed), unchanged
+
+    assert run() == (2, 0, 0, 0)
+    assert run() == (0, 0, 0, 2)
+    assert col.get(ids=["x"])["documents"] == ["havuz 09:00'da açılır"]
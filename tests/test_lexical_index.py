@@ -0,0 +1,21 @@
+# tests/test_lexical_index.py  – Türkçe tokenizer
+import pytest
+
+from lexical_index import tokenize_tr
+
+
+@pytest.mark.parametrize("text, tokens", [
+    ("10:30'da", ["10", "30"]),
+    ("9'da", ["9"]),
+    ("24'lük", ["24"]),
+    ("08.00’de", ["08", "00"]),
+    ("lagoon'da", ["lagoon"]),
+    ("a'la", ["ala"]),
+    ("swim-up", ["swim", "up", "swimup"]),
+])
+def test_tokenize_tr_apostrophe_and_hyphen(text, tokens):
+    assert tokenize_tr(text) == tokens
+
+
+def test_numeric_suffix_matches_bare_number():
+    assert set(tokenize_tr("Havuz 10:30'da açılır")) >= set(tokenize_tr("10 30"))
@@ -0,0 +1,30 @@
+# tests/test_room_catalog.py  – oda kataloğu hızlı yolu
+from room_catalog import RoomCatalog
+
+BEDS = '[{"opsiyon_adi": "Çift", "yataklar": [{"adet": 1, "boyut": "2.0x2.0m"}]}]'
+CATALOG = RoomCatalog.from_metadatas([
+    {"oda_tipi": "Superior Room Swim-up", "maks_kapasite_yetiskin": 3, "swim_up": True,
+     "manzara": "Bahçe", "source_document": "page_3.pdf"},
+    {"oda_tipi": "Family Suite", "maks_kapasite_yetiskin": 4, "banyo_sayisi": 2,
+     "yatak_opsiyonlari_json": BEDS, "source_document": "page_4.pdf"},
+])
+
+
+def test_capacity_question_is_answered_from_catalog():
+    text, sources = CATALOG.answer("swim up odaların kapasitesi")
+    assert "Superior Room Swim-up: 3 yetişkin [1]" in text
+    assert sources[0]["source_document"] == "page_3.pdf"
+
+
+def test_beds_answered_when_present():
+    text, _ = CATALOG.answer("4 kişilik odalarda yatak")
+    assert "Family Suite: Çift: 1×2.0x2.0m" in text
+
+
+def test_missing_asked_field_falls_back_to_rag():
+    assert CATALOG.answer("swim up odalarda yatak") is None
+    assert CATALOG.answer("swim-up oda banyo") is None
+
+
+def test_unstructured_question_falls_back_to_rag():
+    assert CATALOG.answer("swim up odaların fiyatı") is None
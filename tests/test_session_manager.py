@@ -0,0 +1,136 @@
+# tests/test_session_manager.py  – oturum depoları (bellek içi + fakeredis)
+import time
+
+import pytest
+
+from session_manager import (
+    BookingState, MemorySessionStore, RedisSessionStore, SessionStore,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def store(server):
+    return RedisSessionStore(fakeredis.FakeRedis(server=server), ttl_s=60)
+
+
+def advance(step):
+    """Updater: state'i `step` adımına taşır, önceki adımı döndürür."""
+    return lambda st: (BookingState(step=step), st.step if st else None)
+
+
+# ───── BookingState ──────────────────────────────────────────────────────
+@pytest.mark.parametrize("st", [
+    BookingState(),
+    BookingState(step="child", date_in="2025-07-01", date_out="2025-07-05",
+                 rooms=2, adults=3, child_ages=[8, 5]),
+])
+def test_booking_state_round_trip(st):
+    assert BookingState.from_bytes(st.to_bytes()) == st
+
+
+def test_booking_state_unknown_version_restarts():
+    assert BookingState.from_bytes(b'[2,"rooms"]') is None
+    assert BookingState.from_bytes(b"[]") is None
+
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+    class Partial(SessionStore):
+        def get(self, user_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+# ───── RedisSessionStore ─────────────────────────────────────────────────
+def test_redis_get_put_delete(store):
+    assert store.get("u1") is None
+    st = BookingState(step="rooms", date_in="2025-07-01", date_out="2025-07-05")
+    store.put("u1", st)
+    assert store.get("u1") == st
+    assert store.get("u2") is None
+    store.delete("u1")
+    assert store.get("u1") is None
+
+
+def test_redis_update_creates_advances_and_deletes(store):
+    assert store.update("u1", advance("date_in")) is None
+    assert store.get("u1").step == "date_in"
+    assert store.update("u1", advance("date_out")) == "date_in"
+    assert store.get("u1").step == "date_out"
+    assert store.update("u1", lambda st: (None, "bitti")) == "bitti"
+    assert store.get("u1") is None
+
+
+def test_redis_keys_are_prefixed_and_expire(server):
+    r = fakeredis.FakeRedis(server=server)
+    store = RedisSessionStore(r, ttl_s=1, prefix="t:")
+    store.put("u1", BookingState())
+    assert r.exists("t:u1")
+    assert 0 < r.ttl("t:u1") <= 1
+    time.sleep(1.1)
+    assert store.get("u1") is None
+
+
+def test_redis_update_refreshes_ttl(server):
+    r = fakeredis.FakeRedis(server=server)
+    store = RedisSessionStore(r, ttl_s=100)
+    store.update("u1", advance("date_in"))
+    r.expire(store._key("u1"), 5)
+    store.update("u1", advance("date_out"))
+    assert r.ttl(store._key("u1")) > 5
+
+
+def test_redis_update_retries_on_watch_conflict(server, store):
+    other = RedisSessionStore(fakeredis.FakeRedis(server=server), ttl_s=60)
+    store.put("u1", BookingState(step="rooms"))
+    seen = []
+
+    def fn(st):
+        seen.append(st.step)
+        if len(seen) == 1:                  # WATCH sonrası başka worker yazar
+            other.put("u1", BookingState(step="adults"))
+        return BookingState(step=st.step + "+"), len(seen)
+
+    assert store.update("u1", fn) == 2
+    assert seen == ["rooms", "adults"]      # ikinci deneme güncel state'i görür
+    assert store.get("u1").step == "adults+"
+
+
+def test_redis_update_gives_up_after_max_retries(server):
+    store = RedisSessionStore(fakeredis.FakeRedis(server=server), max_retries=3)
+    other = RedisSessionStore(fakeredis.FakeRedis(server=server))
+    calls = []
+
+    def fn(st):
+        calls.append(1)
+        other.put("u1", BookingState(step=f"s{len(calls)}"))
+        return BookingState(step="mine"), None
+
+    with pytest.raises(RuntimeError):
+        store.update("u1", fn)
+    assert len(calls) == 3
+    assert store.get("u1").step == "s3"
+
+
+# ───── MemorySessionStore ────────────────────────────────────────────────
+def test_memory_store_idle_ttl_and_lru():
+    now = [0.0]
+    store = MemorySessionStore(shards=1, max_entries=2, idle_ttl_s=10, clock=lambda: now[0])
+    store.put("a", BookingState(step="rooms"))
+    store.put("b", BookingState())
+    store.put("c", BookingState())                      # sınır 2 → en eski "a" atılır
+    assert store.get("a") is None and store.evicted == 1
+    now[0] = 11
+    assert store.get("b") is None and store.expired == 1
+    assert store.update("c", lambda st: (st, st)) is None   # süresi dolmuş → None görür
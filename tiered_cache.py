@@ -0,0 +1,177 @@
+# tiered_cache.py  – bellek (LRU) + disk (SQLite) katmanlı anahtar/değer önbelleği
+"""
+İçerik adresli önbellekler için ortak depo.
+
+• 1. katman : süreç içi `OrderedDict` LRU (`max_items` kayıt)
+• 2. katman : SQLite dosyası (WAL), toplam boyut `max_bytes` aşılınca en eski
+              erişilen kayıtlar silinir.
+• Anahtarlar çağıran tarafta hash'lenir (ör. sha256), değerler ham `bytes`.
+
+Birden fazla süreç aynı dosyayı paylaşabilir; SQLite kilitlerini kullanır.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_MAX_ITEMS = 4096                  # bellek katmanı kayıt sınırı
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024     # disk katmanı boyut sınırı (512 MB)
+EVICT_TARGET      = 0.9                   # tahliye sonrası hedef doluluk oranı
+ATIME_RESOLUTION  = 60.0                  # diskte erişim zamanını en sık bu aralıkla güncelle (sn)
+
+
+class TieredCache:
+    """Thread-safe, iki katmanlı bytes önbelleği."""
+
+    def __init__(self, path: Path | str,
+                 max_items: int = DEFAULT_MAX_ITEMS,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+
+        self._db = sqlite3.connect(str(self.path), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " size INTEGER NOT NULL, atime REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS cache_atime ON cache(atime)")
+        self._disk_bytes = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+        self.hits_mem = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    # ── Okuma ───────────────────────────────────────────────────────────
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        """Bulunan anahtarları {key: value} olarak döndürür."""
+        found: Dict[str, bytes] = {}
+        pending: List[str] = []
+        with self._lock:
+            for k in keys:
+                if k in found:
+                    continue
+                v = self._mem.get(k)
+                if v is not None:
+                    self._mem.move_to_end(k)
+                    found[k] = v
+                    self.hits_mem += 1
+                else:
+                    pending.append(k)
+
+            if pending:
+                now = time.time()
+                for chunk in _chunks(list(dict.fromkeys(pending)), 500):
+                    marks = ",".join("?" * len(chunk))
+                    rows = self._db.execute(
+                        f"SELECT key, value FROM cache WHERE key IN ({marks})", chunk
+                    ).fetchall()
+                    for k, v in rows:
+                        found[k] = v
+                        self._remember(k, v)
+                        self.hits_disk += 1
+                    stale = [k for k, _ in rows
+                             if now - self._touched.get(k, 0.0) > ATIME_RESOLUTION]
+                    if stale:
+                        self._db.executemany("UPDATE cache SET atime=? WHERE key=?",
+                                             [(now, k) for k in stale])
+                        self._touched.update((k, now) for k in stale)
+                self.misses += sum(1 for k in pending if k not in found)
+        return found
+
+    # ── Yazma ───────────────────────────────────────────────────────────
+    def set(self, key: str, value: bytes) -> None:
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, bytes]]) -> None:
+        items = list(items)
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            for k, v in items:
+                self._remember(k, v)
+                self._touched[k] = now
+            self._db.execute("BEGIN")
+            try:
+                for k, v in items:
+                    old = self._db.execute("SELECT size FROM cache WHERE key=?",
+                                           (k,)).fetchone()
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache(key, value, size, atime) "
+                        "VALUES (?, ?, ?, ?)", (k, v, len(v), now))
+                    self._disk_bytes += len(v) - (old[0] if old else 0)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            if self._disk_bytes > self.max_bytes:
+                self._evict_disk()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._touched.clear()
+            self._db.execute("DELETE FROM cache")
+            self._disk_bytes = 0
+
+    # ── İç yardımcılar ──────────────────────────────────────────────────
+    def _remember(self, key: str, value: bytes) -> None:
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Disk katmanını en eski erişimden başlayarak hedef boyuta indirir."""
+        target = int(self.max_bytes * EVICT_TARGET)
+        victims: List[str] = []
+        freed = 0
+        for k, size in self._db.execute("SELECT key, size FROM cache ORDER BY atime"):
+            if self._disk_bytes - freed <= target:
+                break
+            victims.append(k)
+            freed += size
+        for chunk in _chunks(victims, 500):
+            marks = ",".join("?" * len(chunk))
+            self._db.execute(f"DELETE FROM cache WHERE key IN ({marks})", chunk)
+        for k in victims:
+            self._mem.pop(k, None)
+            self._touched.pop(k, None)
+        self._disk_bytes -= freed
+
+    # ── Raporlama ───────────────────────────────────────────────────────
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits_mem + self.hits_disk + self.misses
+            return {
+                "hits_mem":   self.hits_mem,
+                "hits_disk":  self.hits_disk,
+                "misses":     self.misses,
+                "hit_rate":   (self.hits_mem + self.hits_disk) / lookups if lookups else 0.0,
+                "mem_items":  len(self._mem),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+def _chunks(seq: List, size: int):
+    for i in range(0, len(seq), size):
+        yield seq[i : i + size]